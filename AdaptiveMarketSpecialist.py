@@ -3,11 +3,19 @@ from pandas import DataFrame
 import talib.abstract as ta
 import freqtrade.vendor.qtpylib.indicators as qtpylib
 import numpy as np
-from functools import reduce
-from technical.indicators import ichimoku
 import logging
 from datetime import datetime
 
+from ichimoku_kernel import technical_ichimoku
+from compact_frame import compact_from_config
+from condition_expr import all_of, any_of, col, evaluate, index, latest, tail_from_config
+from incremental_indicators import ATR, RSI, Full, HeikinAshi, Window, populate_incremental
+from strategy_profiler import profile_from_config
+from informative_features import InformativeFeatures
+from market_regime import RegimeService
+from notification_queue import notifications_from_config
+from signal_journal import journal_from_config
+
 class AdaptiveMarketSpecialist(IStrategy):
     # Strategy configuration
     timeframe = '5m'
@@ -56,82 +64,122 @@ class AdaptiveMarketSpecialist(IStrategy):
     use_sell_signal = True
     sell_profit_only = False
     ignore_roi_if_buy_signal = False
+
+    # indicator values kept in the signal journal next to buy/sell
+    journal_values = ('close_ha', 'support', 'resistance', 'atr', 'rsi', 'pullback', 'btc_relative')
     
     def __init__(self, config: dict) -> None:
         super().__init__(config)
         self.market_regime = "CHOPPY"  # Default
         self.last_regime_update = None
+        self.regime_service = RegimeService("BTC/USDT", default=self.market_regime)
+        self.btc_features = InformativeFeatures("BTC/USDT")
+        self.signal_journal = journal_from_config(self, tag='buy_tag', values=self.journal_values)
+        self.notifications = notifications_from_config(self, self.send_msg, self.format_alert)
 
     def determine_market_regime(self, current_time: datetime) -> str:
-        """Enhanced regime detection for all market types"""
+        """Latest BTC regime, computed once per candle for all pairs"""
         try:
             btc_df = self.dp.get_pair_dataframe("BTC/USDT", self.timeframe)
             if len(btc_df) < 100:
                 return self.market_regime
-                
-            close = btc_df['close']
-            high = btc_df['high']
-            low = btc_df['low']
-            
-            # Calculate indicators
-            ema25 = ta.EMA(close, 25).iloc[-1]
-            ema100 = ta.EMA(close, 100).iloc[-1]
-            current_close = close.iloc[-1]
-            adx = ta.ADX(high, low, close, 14).iloc[-1]
-            atr_pct = ta.ATR(high, low, close, 14).iloc[-1] / current_close
-            
-            # Bull market detection
-            bull_conditions = (
-                current_close > ema25 > ema100 and
-                adx > 25 and
-                atr_pct > 0.01
-            )
-            
-            # Choppy market detection
-            choppy_conditions = (
-                adx < 20 and
-                abs(ema25 - ema100)/current_close < 0.03 and
-                atr_pct < 0.008
-            )
-            
-            # Bear market detection
-            bear_conditions = (
-                current_close < ema25 < ema100 and
-                adx > 28
-            )
-            
-            if bull_conditions:
-                return "BULL"
-            elif choppy_conditions:
-                return "CHOPPY"
-            elif bear_conditions:
-                return "BEAR"
-            return "NEUTRAL"
+            return self.regime_service.latest(btc_df, self.timeframe)
                 
         except Exception as e:
             logging.error(f"Regime error: {e}")
             return self.market_regime
 
+    def regime_column(self, dataframe: DataFrame):
+        """Per-candle BTC regime aligned to this pair's candle dates"""
+        btc_df = self.dp.get_pair_dataframe("BTC/USDT", self.timeframe)
+        if len(btc_df) < 100:
+            return self.market_regime
+        return self.regime_service.align(dataframe['date'], btc_df, self.timeframe)
+
     def custom_stoploss(self, pair: str, trade, current_time, current_rate, current_profit, **kwargs) -> float:
-        """Regime-specific stop loss"""
+        # Regime of the last BTC candle closed at current_time, so backtests don't see later candles
+        # Regime at current_time, so backtests don't see the final regime
+        regime = self.regime_service.regime_at(self.timeframe, current_time, default=self.market_regime)
+
         # Dynamic trailing stops
-        if self.market_regime == "BULL":
+        if regime == "BULL":
             if current_profit > self.sell_params["bull_trailing_stop"]:
                 return -0.02  # 2% trailing in bulls
             return -0.04  # 4% initial stop
             
-        elif self.market_regime == "CHOPPY":
+        elif regime == "CHOPPY":
             if current_profit > self.sell_params["choppy_trailing_stop"]:
                 return -0.01  # 1% trailing in choppy
             return -0.03  # 3% initial stop
             
         return -0.05  # 5% stop for bears/neutral
 
+    def bot_start(self, **kwargs) -> None:
+        profile_from_config(self)
+
+    def send_msg(self, text: str) -> None:
+        if self.dp and hasattr(self.dp, 'send_msg'):
+            self.dp.send_msg(text)
+
+    @staticmethod
+    def format_alert(alert) -> str:
+        """The Telegram text of a queued buy/sell alert"""
+        f = alert.fields
+        if alert.kind == 'buy':
+            debug_info = [
+                f"Regime: {f['regime']}",
+                f"Rel Strength: {f['rel_strength']:.4f}",
+            ]
+            if f['regime'] == "CHOPPY":
+                debug_info.extend([
+                    f"Consolidating: {f['consolidating']}",
+                    f"Near Support: {f['near_support']}",
+                    f"Volume: {f['volume_spike']} ({f['volume_ratio']:.1f}x)",
+                    f"RSI: {f['rsi']:.1f}"
+                ])
+                
+            elif f['regime'] == "BULL":
+                debug_info.extend([
+                    f"Above Cloud: {f['above_cloud']}",
+                    f"Pullback: {f['pullback']*100:.1f}%",
+                    f"Volume: {f['volume_spike']} ({f['volume_ratio']:.1f}x)",
+                    f"RSI: {f['rsi']:.1f}"
+                ])
+                
+            msg = [
+                f"🚀 BUY: {alert.pair} ({f['regime']})",
+                "\n".join(debug_info),
+                f"Price: {f['price']:.6f}",
+                f"Support: {f['support']:.6f}",
+                f"Resistance: {f['resistance']:.6f}"
+            ]
+        else:
+            reasons = []
+            if f['profit']:
+                profit_pct = (f['price']/f['open']-1)*100
+                reasons.append(f"Profit: {profit_pct:.2f}%")
+            if f['resistance_touch']:
+                reasons.append(f"Resistance: {f['price']:.6f} > {f['resistance']*0.995:.6f}")
+            if f['max_hold']:
+                reasons.append("Max Hold")
+                
+            msg = [
+                f"⛔ SELL: {alert.pair} ({f['regime']})",
+                f"Reasons: {', '.join(reasons)}",
+                f"Price: {f['price']:.6f}"
+            ]
+        return "\n".join(msg)
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         # Update market regime
         current_time = self.dp.get_current_time() if hasattr(self.dp, 'get_current_time') else datetime.utcnow()
         self.market_regime = self.determine_market_regime(current_time)
-        dataframe['global_regime'] = self.market_regime
+        dataframe = populate_incremental(self, dataframe, metadata, self.compute_indicators,
+                                         self.incremental_indicators, compact=True)
+        return compact_from_config(self, dataframe)
+
+    def compute_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        dataframe['global_regime'] = self.regime_column(dataframe)
         
         # Heikin Ashi smoothing
         heikinashi = qtpylib.heikinashi(dataframe)
@@ -149,10 +197,8 @@ class AdaptiveMarketSpecialist(IStrategy):
         dataframe['consolidating'] = dataframe['range'] < dataframe['avg_range'] * 0.7
 
         # Ichimoku Cloud
-        ichi = ichimoku(dataframe, conversion_line_period=20, base_line_periods=60, 
-                       laggin_span=120, displacement=30)
-        for key in ['tenkan_sen', 'kijun_sen', 'senkou_span_a', 'senkou_span_b']:
-            dataframe[key] = ichi[key]
+        for key, values in self.ichimoku_lines(dataframe).items():
+            dataframe[key] = values
 
         # Momentum indicators
         dataframe['rsi'] = ta.RSI(dataframe['close_ha'], timeperiod=14)
@@ -163,153 +209,161 @@ class AdaptiveMarketSpecialist(IStrategy):
         dataframe['pullback'] = dataframe['close_ha'].pct_change(periods=8)
         
         # Relative strength to BTC
-        btc_close = self.dp.get_pair_dataframe("BTC/USDT", self.timeframe)['close']
-        if not btc_close.empty:
-            btc_close = btc_close.reindex(dataframe.index, method='ffill')
-            dataframe['btc_relative'] = dataframe['close_ha'] / btc_close
-        else:
-            dataframe['btc_relative'] = 1.0
+        dataframe['btc_relative'] = self.btc_relative(dataframe)
 
         return dataframe
 
+    @staticmethod
+    def ichimoku_lines(dataframe: DataFrame) -> dict:
+        ichi = technical_ichimoku(dataframe, conversion_line_period=20, base_line_periods=60,
+                                  laggin_span=120, displacement=30)
+        return {key: ichi[key] for key in ['tenkan_sen', 'kijun_sen', 'senkou_span_a', 'senkou_span_b']}
+
+    def btc_relative(self, dataframe: DataFrame):
+        btc_df = self.dp.get_pair_dataframe("BTC/USDT", self.timeframe)
+        if btc_df.empty:
+            return 1.0
+        # last BTC close at or before each candle, matched by date
+        btc_close = self.btc_features.join(dataframe, btc_df, self.timeframe, ['close'])['close']
+        return dataframe['close_ha'] / btc_close
+
+    def incremental_indicators(self):
+        return [
+            HeikinAshi('close_ha', 'high_ha', 'low_ha'),
+            Window('support', lambda df: ta.MIN(df['low'], timeperiod=20), lookback=19),
+            Window('resistance', lambda df: ta.MAX(df['high'], timeperiod=20), lookback=19),
+            Window('range', lambda df: df['high'] - df['low']),
+            Window('avg_range', lambda df: df['range'].rolling(window=20).mean(), lookback=19),
+            Window('consolidating', lambda df: df['range'] < df['avg_range'] * 0.7),
+            # senkou span b: 120-candle window displaced 29 forward
+            Window(['tenkan_sen', 'kijun_sen', 'senkou_span_a', 'senkou_span_b'], self.ichimoku_lines,
+                   lookback=148),
+            RSI('rsi', source='close_ha', period=14),
+            Window('mfi', lambda df: ta.MFI(df, timeperiod=14), lookback=14),
+            ATR('atr', period=14),
+            Window('pullback', lambda df: df['close_ha'].pct_change(periods=8), lookback=8),
+            # regime and BTC data come from outside this pair's candles
+            Full('global_regime', self.regime_column),
+            Full('btc_relative', self.btc_relative),
+        ]
+
     def populate_buy_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         pair = metadata['pair']
-        conditions = []
-        debug_info = [f"Regime: {self.market_regime}"]
+        tail = tail_from_config(self)
         
         # COMMON CONDITIONS (all regimes)
         # Relative strength
-        rel_strength = dataframe['btc_relative'] > self.buy_params['relative_strength']
-        conditions.append(rel_strength)
-        debug_info.append(f"Rel Strength: {dataframe['btc_relative'].iloc[-1]:.4f}")
+        rel_strength = col('btc_relative') > self.buy_params['relative_strength']
         
         # Volume above average
-        vol_ma = dataframe['volume'].rolling(window=20).mean()
+        vol_ma = col('volume').rolling(20).mean()
         
-        # REGIME-SPECIFIC CONDITIONS
-        if self.market_regime == "CHOPPY":
-            # Choppy market strategy
-            conditions.append(dataframe['consolidating'].rolling(
-                self.buy_params['choppy_consolidation']).min().astype(bool))
-            conditions.append(dataframe['close_ha'] < dataframe['support'] + dataframe['atr'])
-            
-            vol_cond = dataframe['volume'] > vol_ma * self.buy_params['choppy_volume_mult']
-            conditions.append(vol_cond)
-            
-            rsi_cond = (dataframe['rsi'] > self.buy_params['choppy_rsi_min']) & \
-                       (dataframe['rsi'] < self.buy_params['choppy_rsi_max'])
-            conditions.append(rsi_cond)
-            
-            debug_info.extend([
-                f"Consolidating: {conditions[-3].iloc[-1]}",
-                f"Near Support: {conditions[-2].iloc[-1]}",
-                f"Volume: {vol_cond.iloc[-1]} ({dataframe['volume'].iloc[-1]/vol_ma.iloc[-1]:.1f}x)",
-                f"RSI: {dataframe['rsi'].iloc[-1]:.1f}"
-            ])
-            
-        elif self.market_regime == "BULL":
-            # Bull market strategy
-            conditions.append(dataframe['close_ha'] > dataframe['senkou_span_a'])
-            conditions.append(dataframe['close_ha'] > dataframe['senkou_span_b'])
-            
-            # Pullback entry
-            pullback_cond = dataframe['pullback'] < self.buy_params['bull_pullback_pct']
-            conditions.append(pullback_cond)
-            
-            vol_cond = dataframe['volume'] > vol_ma * self.buy_params['bull_volume_mult']
-            conditions.append(vol_cond)
-            
-            rsi_cond = (dataframe['rsi'] > self.buy_params['bull_rsi_min']) & \
-                       (dataframe['rsi'] < self.buy_params['bull_rsi_max'])
-            conditions.append(rsi_cond)
-            
-            debug_info.extend([
-                f"Above Cloud: {conditions[-4].iloc[-1]}",
-                f"Pullback: {pullback_cond.iloc[-1]*100:.1f}%",
-                f"Volume: {vol_cond.iloc[-1]} ({dataframe['volume'].iloc[-1]/vol_ma.iloc[-1]:.1f}x)",
-                f"RSI: {dataframe['rsi'].iloc[-1]:.1f}"
-            ])
-            
-        else:  # BEAR/NEUTRAL
-            # Original bear strategy
-            conditions.append(dataframe['consolidating'].rolling(12).min().astype(bool))
-            conditions.append(dataframe['close_ha'] < dataframe['support'] + dataframe['atr'] * 1.5)
-            conditions.append(dataframe['volume'] > vol_ma * 2.2)
-            conditions.append(dataframe['rsi'] > 38)
-            
-        # Apply conditions
-        if conditions:
-            buy_signal = reduce(lambda x, y: x & y, conditions)
-            dataframe.loc[buy_signal, 'buy'] = 1
+        # REGIME-SPECIFIC CONDITIONS, chosen per candle from the BTC regime history
+        is_choppy = col('global_regime') == "CHOPPY"
+        is_bull = col('global_regime') == "BULL"
+
+        # Choppy market strategy
+        choppy_consolidating = col('consolidating').rolling(self.buy_params['choppy_consolidation']).min() != 0
+        near_support = col('close_ha') < col('support') + col('atr')
+        choppy_vol = col('volume') > vol_ma * self.buy_params['choppy_volume_mult']
+        choppy_signal = all_of(
+            choppy_consolidating,
+            near_support,
+            choppy_vol,
+            col('rsi') > self.buy_params['choppy_rsi_min'],
+            col('rsi') < self.buy_params['choppy_rsi_max'],
+        )
+
+        # Bull market strategy
+        above_cloud = (col('close_ha') > col('senkou_span_a')) & (col('close_ha') > col('senkou_span_b'))
+        # Pullback entry
+        pullback_cond = col('pullback') < self.buy_params['bull_pullback_pct']
+        bull_vol = col('volume') > vol_ma * self.buy_params['bull_volume_mult']
+        bull_signal = all_of(
+            above_cloud,
+            pullback_cond,
+            bull_vol,
+            col('rsi') > self.buy_params['bull_rsi_min'],
+            col('rsi') < self.buy_params['bull_rsi_max'],
+        )
+
+        # Original bear strategy (BEAR/NEUTRAL)
+        bear_signal = all_of(
+            col('consolidating').rolling(12).min() != 0,
+            col('close_ha') < col('support') + col('atr') * 1.5,
+            col('volume') > vol_ma * 2.2,
+            col('rsi') > 38,
+        )
+
+        buy_signal = all_of(
+            rel_strength,
+            any_of(
+                is_choppy & choppy_signal,
+                is_bull & bull_signal,
+                all_of(~is_choppy, ~is_bull, bear_signal),
+            ),
+        )
+        buy_signal = evaluate(buy_signal, dataframe, tail=tail)
+        dataframe.loc[buy_signal, 'buy'] = 1
             
-            # Debug info
-            if buy_signal.iloc[-1]:
-                last = dataframe.iloc[-1]
-                msg = [
-                    f"🚀 BUY: {pair} ({self.market_regime})",
-                    "\n".join(debug_info),
-                    f"Price: {last['close_ha']:.6f}",
-                    f"Support: {last['support']:.6f}",
-                    f"Resistance: {last['resistance']:.6f}"
-                ]
-                logging.info("\n".join(msg))
-                try:
-                    if self.dp and hasattr(self.dp, 'send_msg'):
-                        self.dp.send_msg("\n".join(msg))
-                except Exception as e:
-                    logging.error(f"Error sending message: {e}")
+        # Alert fields from the last candle only; the queue formats and sends them
+        if len(buy_signal) and buy_signal[-1]:
+            last = dataframe.iloc[-1]
+            # the regime the signal was decided with, not the latest BTC one
+            regime = last['global_regime']
+            fields = dict(regime=regime, rel_strength=last['btc_relative'], price=last['close_ha'],
+                          support=last['support'], resistance=last['resistance'], rsi=last['rsi'])
+            if regime == "CHOPPY":
+                fields.update(consolidating=latest(choppy_consolidating, dataframe),
+                              near_support=latest(near_support, dataframe),
+                              volume_spike=latest(choppy_vol, dataframe))
+            elif regime == "BULL":
+                fields.update(above_cloud=latest(above_cloud, dataframe),
+                              pullback=latest(pullback_cond, dataframe),
+                              volume_spike=latest(bull_vol, dataframe))
+            fields['volume_ratio'] = latest(col('volume') / vol_ma, dataframe)
+            self.notifications.put('buy', pair, last['date'], **fields)
 
         return dataframe
 
     def populate_sell_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         pair = metadata['pair']
-        conditions = []
-        
-        # Dynamic profit thresholds
-        if self.market_regime == "BULL":
-            profit_threshold = self.sell_params["bull_profit_threshold"]
-        else:
-            profit_threshold = self.sell_params["choppy_profit_threshold"]
+        tail = tail_from_config(self)
         
-        # 1. Profit target
-        profit_cond = dataframe['close_ha'] >= dataframe['open'] * (1 + profit_threshold)
-        conditions.append(profit_cond)
+        # 1. Profit target, with the threshold of each candle's regime
+        is_bull = col('global_regime') == "BULL"
+        profit_cond = any_of(
+            is_bull & (col('close_ha') >= col('open') * (1 + self.sell_params["bull_profit_threshold"])),
+            ~is_bull & (col('close_ha') >= col('open') * (1 + self.sell_params["choppy_profit_threshold"])),
+        )
+        conditions = [profit_cond]
         
         # 2. Resistance touch
-        resistance_cond = dataframe['close_ha'] >= dataframe['resistance'] * 0.995
+        resistance_cond = col('close_ha') >= col('resistance') * 0.995
         conditions.append(resistance_cond)
         
         # 3. Max hold period
+        max_hold = None
         if len(dataframe) > self.sell_params['max_hold_period']:
-            max_hold = dataframe.index >= (dataframe.index[-1] - self.sell_params['max_hold_period'])
+            max_hold = index() >= (dataframe.index[-1] - self.sell_params['max_hold_period'])
             conditions.append(max_hold)
         
         # Combine conditions
-        sell_signal = reduce(lambda x, y: x | y, conditions)
+        sell_signal = evaluate(any_of(*conditions), dataframe, tail=tail)
         dataframe.loc[sell_signal, 'sell'] = 1
         
-        # Debug info
-        if sell_signal.iloc[-1]:
+        # Alert fields; the queue formats and sends them
+        if len(sell_signal) and sell_signal[-1]:
             last = dataframe.iloc[-1]
-            reasons = []
-            if profit_cond.iloc[-1]:
-                profit_pct = (last['close_ha']/last['open']-1)*100
-                reasons.append(f"Profit: {profit_pct:.2f}%")
-            if resistance_cond.iloc[-1]:
-                reasons.append(f"Resistance: {last['close_ha']:.6f} > {last['resistance']*0.995:.6f}")
-            if 'max_hold' in locals() and max_hold.iloc[-1]:
-                reasons.append("Max Hold")
-                
-            msg = [
-                f"⛔ SELL: {pair} ({self.market_regime})",
-                f"Reasons: {', '.join(reasons)}",
-                f"Price: {last['close_ha']:.6f}"
-            ]
-            logging.info("\n".join(msg))
-            try:
-                if self.dp and hasattr(self.dp, 'send_msg'):
-                    self.dp.send_msg("\n".join(msg))
-            except Exception as e:
-                logging.error(f"Error sending message: {e}")
+            self.notifications.put(
+                'sell', pair, last['date'], regime=last['global_regime'], price=last['close_ha'],
+                open=last['open'], resistance=last['resistance'],
+                profit=latest(profit_cond, dataframe),
+                resistance_touch=latest(resistance_cond, dataframe),
+                max_hold=max_hold is not None and latest(max_hold, dataframe),
+            )
 
+        if self.signal_journal is not None:
+            # a tail evaluation only has signals for its last rows
+            self.signal_journal.save(pair, dataframe if tail is None else dataframe.iloc[-tail:])
         return dataframe
\ No newline at end of file
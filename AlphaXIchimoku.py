@@ -4,9 +4,33 @@ import numpy as np
 import pandas as pd
 import talib.abstract as ta
 from freqtrade.strategy import IStrategy
-from freqtrade.vendor.qtpylib import indicators as qtpylib
 from pandas import DataFrame
 
+from condition_expr import all_of, any_of, col, crossed_above, evaluate, tail_from_config
+from ichimoku_kernel import ichimoku
+from incremental_indicators import ADX, ATR, EMA, RSI, Window, populate_incremental
+from strategy_profiler import profile_from_config
+
+
+def ichimoku_lines(df: DataFrame) -> dict:
+    ichi = ichimoku(df['high'].values, df['low'].values, df['close'].values,
+                    conversion_period=9, base_period=26, span_b_period=52, displacement=26)
+    return {key: ichi[key] for key in ('tenkan', 'kijun', 'senkou_a', 'senkou_b')}
+
+
+def market_regime(df: DataFrame):
+    return np.select(
+        [
+            (df['adx'] > 25) & (df['volatility'] > df['volatility'].rolling(48).mean()),
+            (df['adx'] < 18)
+        ],
+        [
+            1,   # Bull
+            -1   # Choppy
+        ],
+        default=0  # Bear
+    )
+
 
 class AlphaXIchimoku(IStrategy):
     # === CONFIGURATION ===
@@ -29,17 +53,16 @@ class AlphaXIchimoku(IStrategy):
     trailing_stop_positive_offset = 0.03
 
     # === INDICATORS ===
+    def bot_start(self, **kwargs) -> None:
+        profile_from_config(self)
+
     def populate_indicators(self, df: DataFrame, metadata: dict) -> DataFrame:
-        # Ichimoku base
-        high_9 = df['high'].rolling(window=9).max()
-        low_9 = df['low'].rolling(window=9).min()
-        df['tenkan'] = (high_9 + low_9) / 2
+        return populate_incremental(self, df, metadata, self.compute_indicators, self.incremental_indicators)
 
-        high_26 = df['high'].rolling(window=26).max()
-        low_26 = df['low'].rolling(window=26).min()
-        df['kijun'] = (high_26 + low_26) / 2
-        df['senkou_a'] = ((df['tenkan'] + df['kijun']) / 2).shift(26)
-        df['senkou_b'] = (df['high'].rolling(window=52).max() + df['low'].rolling(window=52).min()).shift(26) / 2
+    def compute_indicators(self, df: DataFrame, metadata: dict) -> DataFrame:
+        # Ichimoku base
+        for key, values in ichimoku_lines(df).items():
+            df[key] = values
 
         df['ema_21'] = ta.EMA(df['close'], timeperiod=21)
         df['ema_50'] = ta.EMA(df['close'], timeperiod=50)
@@ -50,63 +73,63 @@ class AlphaXIchimoku(IStrategy):
         df['volatility'] = df['close'].rolling(20).std()
 
         # Regime detection
-        df['regime'] = np.select(
-            [
-                (df['adx'] > 25) & (df['volatility'] > df['volatility'].rolling(48).mean()),
-                (df['adx'] < 18)
-            ],
-            [
-                1,   # Bull
-                -1   # Choppy
-            ],
-            default=0  # Bear
-        )
+        df['regime'] = market_regime(df)
 
         return df
 
+    def incremental_indicators(self):
+        return [
+            # senkou_b: 52-candle window displaced 26 forward
+            Window(['tenkan', 'kijun', 'senkou_a', 'senkou_b'], ichimoku_lines, lookback=77),
+            EMA('ema_21', period=21),
+            EMA('ema_50', period=50),
+            RSI('rsi', period=14),
+            ADX('adx', period=14),
+            ATR('atr', period=14),
+            Window('volume_mean_slow', lambda df: df['volume'].rolling(window=20).mean(), lookback=19),
+            Window('volatility', lambda df: df['close'].rolling(20).std(), lookback=19),
+            Window('regime', market_regime, lookback=47),
+        ]
+
     # === ENTRY CONDITIONS ===
     def populate_entry_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
-        conditions = []
-
         # Bull regime breakout entry
-        bull_entry = (
-            (df['regime'] == 1) &
-            (df['close'] > df['ema_21']) &
-            (df['tenkan'] > df['kijun']) &
-            (df['volume'] > df['volume_mean_slow'] * 1.5) &
-            (df['rsi'] > 55)
+        bull_entry = all_of(
+            col('regime') == 1,
+            col('close') > col('ema_21'),
+            col('tenkan') > col('kijun'),
+            col('volume') > col('volume_mean_slow') * 1.5,
+            col('rsi') > 55,
         )
 
         # Bear regime momentum entry
-        bear_entry = (
-            (df['regime'] == 0) &
-            (df['close'] > df['ema_21']) &
-            (df['rsi'] > 60) &
-            (df['adx'] > 20)
+        bear_entry = all_of(
+            col('regime') == 0,
+            col('close') > col('ema_21'),
+            col('rsi') > 60,
+            col('adx') > 20,
         )
 
         # Choppy regime bounce entry
-        choppy_entry = (
-            (df['regime'] == -1) &
-            (df['rsi'] < 35) &
-            (qtpylib.crossed_above(df['rsi'], 35)) &
-            (df['close'] > df['tenkan']) &
-            (df['volume'] > df['volume_mean_slow'])
+        choppy_entry = all_of(
+            col('regime') == -1,
+            col('rsi') < 35,
+            crossed_above(col('rsi'), 35),
+            col('close') > col('tenkan'),
+            col('volume') > col('volume_mean_slow'),
         )
 
-        conditions.append(bull_entry | bear_entry | choppy_entry)
-
-        df.loc[np.all(conditions, axis=0), 'enter_long'] = 1
+        df.loc[evaluate(bull_entry | bear_entry | choppy_entry, df, tail=tail_from_config(self)), 'enter_long'] = 1
         return df
 
     # === EXIT CONDITIONS ===
     def populate_exit_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
-        exit_signal = (
-            (df['rsi'] < 48) |
-            (df['close'] < df['ema_21']) |
-            (df['tenkan'] < df['kijun'])
+        exit_signal = any_of(
+            col('rsi') < 48,
+            col('close') < col('ema_21'),
+            col('tenkan') < col('kijun'),
         )
-        df.loc[exit_signal, 'exit_long'] = 1
+        df.loc[evaluate(exit_signal, df, tail=tail_from_config(self)), 'exit_long'] = 1
         return df
 
     # === CUSTOM STOPLOSS ===
@@ -2,6 +2,10 @@ from freqtrade.strategy import IStrategy
 from pandas import DataFrame
 import talib.abstract as ta
 
+from condition_expr import all_of, any_of, col, evaluate, tail_from_config
+from incremental_indicators import ADX, EMA, RSI, Window, populate_incremental
+from strategy_profiler import profile_from_config
+
 class AlphaXScalper(IStrategy):
     INTERFACE_VERSION = 3
 
@@ -27,7 +31,13 @@ class AlphaXScalper(IStrategy):
 
     max_open_trades = 5
 
+    def bot_start(self, **kwargs) -> None:
+        profile_from_config(self)
+
     def populate_indicators(self, df: DataFrame, metadata: dict) -> DataFrame:
+        return populate_incremental(self, df, metadata, self.compute_indicators, self.incremental_indicators)
+
+    def compute_indicators(self, df: DataFrame, metadata: dict) -> DataFrame:
         df['rsi'] = ta.RSI(df, timeperiod=14)
         df['ema_fast'] = ta.EMA(df['close'], timeperiod=5)
         df['ema_slow'] = ta.EMA(df['close'], timeperiod=20)
@@ -35,22 +45,29 @@ class AlphaXScalper(IStrategy):
         df['price_change'] = df['close'].pct_change(3) * 100
         return df
 
+    def incremental_indicators(self):
+        return [
+            RSI('rsi', period=14),
+            EMA('ema_fast', period=5),
+            EMA('ema_slow', period=20),
+            ADX('adx', period=14),
+            Window('price_change', lambda df: df['close'].pct_change(3) * 100, lookback=3),
+        ]
+
     def populate_buy_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
-        df.loc[
-            (
-                (df['ema_fast'] > df['ema_slow']) &
-                (df['rsi'] > 55) &
-                (df['adx'] > 20) &
-                (df['price_change'] > 1)
-            ),
-            'buy'] = 1
+        buy = all_of(
+            col('ema_fast') > col('ema_slow'),
+            col('rsi') > 55,
+            col('adx') > 20,
+            col('price_change') > 1,
+        )
+        df.loc[evaluate(buy, df, tail=tail_from_config(self)), 'buy'] = 1
         return df
 
     def populate_sell_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
-        df.loc[
-            (
-                (df['rsi'] > 75) |
-                (df['price_change'] < -2)
-            ),
-            'sell'] = 1
+        sell = any_of(
+            col('rsi') > 75,
+            col('price_change') < -2,
+        )
+        df.loc[evaluate(sell, df, tail=tail_from_config(self)), 'sell'] = 1
         return df
@@ -2,11 +2,19 @@
 # AlphaXScalperV2.py
 # Rebuilt on 2025-08-02 to fix poor performance and apply dynamic exits
 
+from collections import OrderedDict
+
+from freqtrade.persistence import Trade
 from freqtrade.strategy import IStrategy
 from pandas import DataFrame
+import pandas as pd
 import talib.abstract as ta
 import numpy as np
 
+from condition_expr import all_of, col, evaluate, tail_from_config
+from incremental_indicators import ATR, EMA, RSI, Window, populate_incremental
+from strategy_profiler import profile_from_config
+
 class AlphaXScalperV2(IStrategy):
     timeframe = '5m'
     minimal_roi = { "0": 0.01 }
@@ -16,8 +24,29 @@ class AlphaXScalperV2(IStrategy):
     process_only_new_candles = True
     startup_candle_count = 50
     max_open_trades = 5
+    entry_cache_size = 64
+
+    def __init__(self, config: dict) -> None:
+        super().__init__(config)
+        self._entry_levels = OrderedDict()
+
+    def bot_start(self, **kwargs) -> None:
+        profile_from_config(self)
+
+    def bot_loop_start(self, current_time=None, **kwargs) -> None:
+        # confirm_trade_exit is skipped by stoploss-on-exchange fills,
+        # liquidations and some force exits, so also drop closed trades here
+        if self._entry_levels:
+            open_trades = {(trade.pair, trade.open_date_utc, trade.open_rate)
+                           for trade in Trade.get_trades_proxy(is_open=True)}
+            for key in [key for key in self._entry_levels if key not in open_trades]:
+                del self._entry_levels[key]
 
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        return populate_incremental(self, dataframe, metadata, self.compute_indicators,
+                                    self.incremental_indicators)
+
+    def compute_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         # Technical Indicators
         dataframe['ema20'] = ta.EMA(dataframe['close'], timeperiod=20)
         dataframe['ema50'] = ta.EMA(dataframe['close'], timeperiod=50)
@@ -26,23 +55,31 @@ class AlphaXScalperV2(IStrategy):
         dataframe['volume_mean_slow'] = dataframe['volume'].rolling(window=30).mean()
         return dataframe
 
-    def populate_buy_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        conditions = []
+    def incremental_indicators(self):
+        return [
+            EMA('ema20', period=20),
+            EMA('ema50', period=50),
+            RSI('rsi', period=4),
+            ATR('atr', period=14),
+            Window('volume_mean_slow', lambda df: df['volume'].rolling(window=30).mean(), lookback=29),
+        ]
 
-        # Basic checks
-        conditions.append(dataframe['volume'] > 0)
-        conditions.append(dataframe['volume'] > dataframe['volume_mean_slow'])
+    def populate_buy_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        buy = all_of(
+            # Basic checks
+            col('volume') > 0,
+            col('volume') > col('volume_mean_slow'),
 
-        # Momentum conditions
-        conditions.append(dataframe['rsi'] < 70)
-        conditions.append(dataframe['close'] > dataframe['ema20'])
-        conditions.append(dataframe['ema20'] > dataframe['ema50'])
+            # Momentum conditions
+            col('rsi') < 70,
+            col('close') > col('ema20'),
+            col('ema20') > col('ema50'),
 
-        # Price breakout (simple pattern)
-        conditions.append(dataframe['close'] > dataframe['close'].shift(1) * 1.003)
+            # Price breakout (simple pattern)
+            col('close') > col('close').shift(1) * 1.003,
+        )
 
-        if conditions:
-            dataframe.loc[np.all(conditions, axis=0), 'buy'] = 1
+        dataframe.loc[evaluate(buy, dataframe, tail=tail_from_config(self)), 'buy'] = 1
         return dataframe
 
     def populate_sell_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
@@ -50,43 +87,59 @@ class AlphaXScalperV2(IStrategy):
         dataframe['sell'] = 0
         return dataframe
 
+    def entry_levels(self, pair: str, trade):
+        """(sl_price, tp_price) from the ATR at the trade's entry candle.
+
+        Computed once per trade and kept in a bounded LRU, so the per-loop
+        callbacks are a dict lookup. The key includes the open rate, so a
+        position adjustment gets fresh levels. Entries of closed trades are
+        dropped on exit and, for exits that bypass confirm_trade_exit, at the
+        next bot_loop_start.
+        """
+        key = (pair, trade.open_date_utc, trade.open_rate)
+        levels = self._entry_levels.get(key)
+        if levels is not None:
+            self._entry_levels.move_to_end(key)
+            return levels
+        dataframe, _ = self.dp.get_analyzed_dataframe(pair, self.timeframe)
+        if dataframe is None or dataframe.empty:
+            return None
+        dates = pd.DatetimeIndex(dataframe['date'])
+        trade_atr = dataframe['atr'].iat[dates.get_indexer([trade.open_date_utc], method='nearest')[0]]
+        if not np.isfinite(trade_atr):
+            trade_atr = 0.01
+        # SL at 1x ATR below entry, TP at 1.5x ATR above
+        levels = (trade.open_rate - trade_atr, trade.open_rate + 1.5 * trade_atr)
+        self._entry_levels[key] = levels
+        if len(self._entry_levels) > self.entry_cache_size:
+            self._entry_levels.popitem(last=False)
+        return levels
+
     def custom_stoploss(self, pair: str, trade, current_time, current_rate, current_profit, **kwargs):
-        # Get ATR-based stoploss
-        atr = self.dp.get_indicator(pair, 'atr', self.timeframe)
-        if atr is None:
+        levels = self.entry_levels(pair, trade)
+        if levels is None:
             return 1  # don't exit
 
-        try:
-            trade_open_index = atr.index.get_loc(trade.open_date_utc, method='nearest')
-            trade_atr = atr.iloc[trade_open_index]
-        except Exception:
-            trade_atr = 0.01
-
         # Custom SL: 1x ATR from entry
-        sl_price = trade.open_rate - trade_atr
-        if current_rate < sl_price:
+        if current_rate < levels[0]:
             return 0.99  # trigger immediate exit
         return 1
 
     def custom_exit(self, pair: str, trade, current_time, current_rate, current_profit, **kwargs):
-        atr = self.dp.get_indicator(pair, 'atr', self.timeframe)
-        if atr is None:
+        levels = self.entry_levels(pair, trade)
+        if levels is None:
             return None
 
-        try:
-            trade_open_index = atr.index.get_loc(trade.open_date_utc, method='nearest')
-            trade_atr = atr.iloc[trade_open_index]
-        except Exception:
-            trade_atr = 0.01
-
-        # Dynamic TP: exit at 1.5x ATR profit
-        tp_price = trade.open_rate + 1.5 * trade_atr
-        sl_price = trade.open_rate - 1.0 * trade_atr
-
+        sl_price, tp_price = levels
         if current_rate >= tp_price:
             return 'atr_tp', 1
         elif current_rate <= sl_price:
             return 'atr_sl', 1
-        elif trade.duration > 45:
+        elif (current_time - trade.open_date_utc).total_seconds() / 60 > 45:
             return 'timeout', 1
         return None
+
+    def confirm_trade_exit(self, pair: str, trade, order_type: str, amount: float, rate: float,
+                           time_in_force: str, exit_reason: str, current_time, **kwargs) -> bool:
+        self._entry_levels.pop((pair, trade.open_date_utc, trade.open_rate), None)
+        return True
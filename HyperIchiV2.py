@@ -6,7 +6,30 @@ from pandas import DataFrame
 import talib.abstract as ta
 import freqtrade.vendor.qtpylib.indicators as qtpylib
 import numpy as np
-from functools import reduce
+
+import multi_period
+from compact_frame import compact_from_config
+from condition_expr import all_of, any_of, col, evaluate, tail_from_config
+from ichimoku_kernel import ichimoku
+from incremental_indicators import ADX, ATR, EMA, RSI, Window, populate_incremental
+from strategy_profiler import profile_from_config
+
+EMA_PERIODS = [8, 21, 55, 144]
+
+
+def ichimoku_lines(dataframe: DataFrame) -> dict:
+    ichi = ichimoku(dataframe['high'].values, dataframe['low'].values, dataframe['close'].values,
+                    conversion_period=9, base_period=26, span_b_period=52, displacement=26)
+    return {key: ichi[key] for key in ('tenkan', 'kijun', 'senkou_a', 'senkou_b')}
+
+
+def bullish(dataframe: DataFrame):
+    return (
+        (dataframe['close'] > dataframe['senkou_a']) & 
+        (dataframe['close'] > dataframe['senkou_b']) & 
+        (dataframe['tenkan'] > dataframe['kijun'])
+    ).astype(int)
+
 
 class HybridIchiV2(IStrategy):
     timeframe = '5m'
@@ -44,24 +67,23 @@ class HybridIchiV2(IStrategy):
             return 0.01  # Force exit if beyond threshold
         return 1
 
+    def bot_start(self, **kwargs) -> None:
+        profile_from_config(self)
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        dataframe = populate_incremental(self, dataframe, metadata, self.compute_indicators,
+                                         self.incremental_indicators, compact=True)
+        return compact_from_config(self, dataframe)
+
+    def compute_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         # Simplified EMA structure
-        ema_periods = [8, 21, 55, 144]
-        for period in ema_periods:
-            dataframe[f'ema_{period}'] = ta.EMA(dataframe, timeperiod=period)
+        emas = multi_period.ema(dataframe['close'].values, EMA_PERIODS)
+        for column, values in multi_period.named('ema_', EMA_PERIODS, emas).items():
+            dataframe[column] = values
         
         # Ichimoku Cloud
-        high_9 = dataframe['high'].rolling(window=9).max()
-        low_9 = dataframe['low'].rolling(window=9).min()
-        dataframe['tenkan'] = (high_9 + low_9) / 2
-        
-        high_26 = dataframe['high'].rolling(window=26).max()
-        low_26 = dataframe['low'].rolling(window=26).min()
-        dataframe['kijun'] = (high_26 + low_26) / 2
-        
-        dataframe['senkou_a'] = ((dataframe['tenkan'] + dataframe['kijun']) / 2).shift(26)
-        dataframe['senkou_b'] = (dataframe['high'].rolling(window=52).max() + 
-                                dataframe['low'].rolling(window=52).min()).shift(26) / 2
+        for key, values in ichimoku_lines(dataframe).items():
+            dataframe[key] = values
         
         # Momentum indicators
         dataframe['rsi'] = ta.RSI(dataframe, timeperiod=11)
@@ -70,59 +92,55 @@ class HybridIchiV2(IStrategy):
         dataframe['atr'] = ta.ATR(dataframe, timeperiod=14)
         
         # Trend detection
-        dataframe['bullish'] = (
-            (dataframe['close'] > dataframe['senkou_a']) & 
-            (dataframe['close'] > dataframe['senkou_b']) & 
-            (dataframe['tenkan'] > dataframe['kijun'])
-        ).astype(int)
+        dataframe['bullish'] = bullish(dataframe)
         
         return dataframe
 
+    def incremental_indicators(self):
+        return [EMA(f'ema_{period}', period=period) for period in EMA_PERIODS] + [
+            Window(['tenkan', 'kijun', 'senkou_a', 'senkou_b'], ichimoku_lines, lookback=77),
+            RSI('rsi', period=11),
+            Window('mfi', lambda df: ta.MFI(df, timeperiod=14), lookback=14),
+            ADX('adx', period=14),
+            ATR('atr', period=14),
+            Window('bullish', bullish),
+        ]
+
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        conditions = []
-        
-        # Core entry conditions (simplified)
-        conditions.append(
-            (dataframe['close'] > dataframe['ema_21']) &
-            (dataframe['ema_8'] > dataframe['ema_21']) &
-            (dataframe['bullish'] == 1)
-        )
-        
-        # Momentum confirmation
-        conditions.append(
-            (dataframe['rsi'] > 48) &
-            (dataframe['mfi'] > 45) &
-            (dataframe['adx'] > 22)
-        )
-        
-        # Volume spike filter
-        conditions.append(
-            dataframe['volume'] > dataframe['volume'].rolling(20).mean() * 1.8
-        )
-        
-        # Price breakout
-        conditions.append(
-            dataframe['close'] > dataframe['high'].rolling(5).max().shift(1)
+        entry = all_of(
+            # Core entry conditions (simplified)
+            col('close') > col('ema_21'),
+            col('ema_8') > col('ema_21'),
+            col('bullish') == 1,
+
+            # Momentum confirmation
+            col('rsi') > 48,
+            col('mfi') > 45,
+            col('adx') > 22,
+
+            # Volume spike filter
+            col('volume') > col('volume').rolling(20).mean() * 1.8,
+
+            # Price breakout
+            col('close') > col('high').rolling(5).max().shift(1),
         )
-        
-        if conditions:
-            dataframe.loc[
-                reduce(lambda x, y: x & y, conditions),
-                'enter_long'] = 1
-                
+
+        dataframe.loc[evaluate(entry, dataframe, tail=tail_from_config(self)), 'enter_long'] = 1
+
         return dataframe
 
     def populate_exit_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         # Exit on momentum loss
-        dataframe.loc[
-            (
-                (dataframe['rsi'] < 50) &
-                (dataframe['mfi'] < 50) &
-                (dataframe['close'] < dataframe['ema_21'])
-            ) |
-            (dataframe['tenkan'] < dataframe['kijun']),
-            'exit_long'] = 1
-            
+        exit_long = any_of(
+            all_of(
+                col('rsi') < 50,
+                col('mfi') < 50,
+                col('close') < col('ema_21'),
+            ),
+            col('tenkan') < col('kijun'),
+        )
+        dataframe.loc[evaluate(exit_long, dataframe, tail=tail_from_config(self)), 'exit_long'] = 1
+
         return dataframe
 ```
 
@@ -2,9 +2,13 @@
 # Freqtrade Ichimoku Cloud Strategy v1 (2025 Optimized)
 # -----------------------------------------------------
 import logging
-from freqtrade.strategy import IStrategy, Decimal, TAindicators, IntParameter
+from freqtrade.strategy import IStrategy, IntParameter
+import talib.abstract as ta
 from pandas import DataFrame, Series
 
+from condition_expr import all_of, col, evaluate, tail_from_config
+from ichimoku_kernel import ichimoku
+
 logger = logging.getLogger(__name__)
 
 class IchiV1(IStrategy):
@@ -25,58 +29,58 @@ class IchiV1(IStrategy):
     cloud_width_min = 0.03
     
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        # Ichimoku Cloud Calculation
-        ichi = TAindicators.ichimoku(dataframe, 
-            conversion_line_period=9,
-            base_line_period=26,
-            laggin_line_period=52,
-            displacement=26
+        # Ichimoku Cloud Calculation (technical's convention: spans shifted
+        # displacement - 1 forward, chikou the same distance back)
+        ichi = ichimoku(dataframe['high'].values, dataframe['low'].values, dataframe['close'].values,
+            conversion_period=9,
+            base_period=26,
+            span_b_period=52,
+            displacement=25
         )
         
-        dataframe['tenkan'] = ichi['tenkan_sen']
-        dataframe['kijun'] = ichi['kijun_sen']
-        dataframe['senkou_a'] = ichi['senkou_span_a']
-        dataframe['senkou_b'] = ichi['senkou_span_b']
-        dataframe['chikou'] = ichi['chikou_span']
+        dataframe['tenkan'] = ichi['tenkan']
+        dataframe['kijun'] = ichi['kijun']
+        dataframe['senkou_a'] = ichi['senkou_a']
+        dataframe['senkou_b'] = ichi['senkou_b']
+        dataframe['chikou'] = ichi['chikou']
         
         # Cloud boundaries
-        dataframe['cloud_top'] = dataframe[['senkou_a','senkou_b']].max(axis=1)
-        dataframe['cloud_bot'] = dataframe[['senkou_a','senkou_b']].min(axis=1)
-        dataframe['cloud_width'] = (dataframe['cloud_top'] - dataframe['cloud_bot']) / dataframe['cloud_bot']
+        dataframe['cloud_top'] = ichi['cloud_top']
+        dataframe['cloud_bot'] = ichi['cloud_bottom']
+        dataframe['cloud_width'] = ichi['cloud_width']
         
         # Volume filter (20-period MA)
-        dataframe['vol_ma'] = TAindicators.sma(dataframe['volume'], 20)
+        dataframe['vol_ma'] = ta.SMA(dataframe['volume'], timeperiod=20)
         
         # ADX for trend strength
-        dataframe['adx'] = TAindicators.adx(dataframe, 14)
+        dataframe['adx'] = ta.ADX(dataframe, timeperiod=14)
         
         # RSI for overbought check
-        dataframe['rsi'] = TAindicators.rsi(dataframe, 14)
+        dataframe['rsi'] = ta.RSI(dataframe, timeperiod=14)
         
         return dataframe
 
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
-        dataframe.loc[
+        entry = all_of(
             # Core Ichimoku signals
-            (dataframe['close'] > dataframe['cloud_top']) &
-            (dataframe['tenkan'] > dataframe['kijun']) &
-            (dataframe['chikou'] > dataframe['chikou'].shift(26)) &
+            col('close') > col('cloud_top'),
+            col('tenkan') > col('kijun'),
+            col('chikou') > col('chikou').shift(26),
             
             # Volume breakout
-            (dataframe['volume'] > dataframe['vol_ma'] * 1.5) &
+            col('volume') > col('vol_ma') * 1.5,
             
             # 2025 Optimizations
-            (dataframe['cloud_width'] > self.cloud_width_min) &
-            (dataframe['adx'] > 25) &
-            (dataframe['rsi'] < 65),
-            
-            'enter_long'] = 1
+            col('cloud_width') > self.cloud_width_min,
+            col('adx') > 25,
+            col('rsi') < 65,
+        )
+        dataframe.loc[evaluate(entry, dataframe, tail=tail_from_config(self)), 'enter_long'] = 1
         
         return dataframe
 
     def populate_exit_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         # Simple exit: price crosses below cloud
-        dataframe.loc[
-            (dataframe['close'] < dataframe['cloud_bot']),
-            'exit_long'] = 1
+        exit_cloud = col('close') < col('cloud_bot')
+        dataframe.loc[evaluate(exit_cloud, dataframe, tail=tail_from_config(self)), 'exit_long'] = 1
         return dataframe
@@ -1,36 +1,195 @@
-from flask import Flask, jsonify
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, Response, g, jsonify, request
+import numpy as np
 import requests
 
+from indicators import IndicatorEngine, batch_signals, pad_series, sma, wilder_rsi
+from metrics import Registry
+from price_cache import Expiring, PriceCache, granularity_ttl
+from refresher import SignalRefresher
+from ring_series import RingSeries
+from series_codec import (ARROW_MIMETYPE, COLUMNAR_MIMETYPE, encode_arrow, encode_columnar,
+                          encode_json, lttb_indices, minmax_indices, pa)
+from series_store import SeriesStore
+from transport import CircuitOpenError, Transport
+
+COINGECKO_API_URL = os.environ.get('COINGECKO_API_URL', 'https://api.coingecko.com/api/v3')
+PRICE_CACHE_TTL = float(os.environ['PRICE_CACHE_TTL']) if os.environ.get('PRICE_CACHE_TTL') else None
+PRICE_CACHE_SIZE = int(os.environ.get('PRICE_CACHE_SIZE', 256))
+PRICE_STORE_DIR = os.environ.get('PRICE_STORE_DIR', '.price_store')
+# price rings and indicator engines kept resident, least recently used dropped first
+RESIDENT_SERIES = int(os.environ.get('RESIDENT_SERIES', PRICE_CACHE_SIZE))
+PRICE_RING_MAX_POINTS = int(os.environ.get('PRICE_RING_MAX_POINTS', 10000))
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+UPSTREAM_READ_TIMEOUT = float(os.environ.get('UPSTREAM_READ_TIMEOUT', 10))
+UPSTREAM_RETRIES = int(os.environ.get('UPSTREAM_RETRIES', 2))
+UPSTREAM_BACKOFF = float(os.environ.get('UPSTREAM_BACKOFF', 0.3))
+UPSTREAM_POOL_SIZE = int(os.environ.get('UPSTREAM_POOL_SIZE', 32))
+UPSTREAM_BREAKER_FAILURES = int(os.environ.get('UPSTREAM_BREAKER_FAILURES', 5))
+UPSTREAM_BREAKER_RESET = float(os.environ.get('UPSTREAM_BREAKER_RESET', 30))
+BATCH_FETCH_WORKERS = int(os.environ.get('BATCH_FETCH_WORKERS', 16))
+MAX_BATCH_SYMBOLS = int(os.environ.get('MAX_BATCH_SYMBOLS', 250))
+# CoinGecko's market_chart takes 1..365 days on the public API
+MAX_DAYS = int(os.environ.get('MAX_DAYS', 365))
+# /series answers in JSON up to this many values unless the client asks for binary
+SERIES_JSON_MAX_VALUES = int(os.environ.get('SERIES_JSON_MAX_VALUES', 20000))
+# Setting SIGNAL_REFRESH_SYMBOLS switches `/` to serving snapshots kept fresh
+# by a background thread (one per gunicorn worker).
+SIGNAL_REFRESH_SYMBOLS = [s for s in os.environ.get('SIGNAL_REFRESH_SYMBOLS', '').split(',') if s]
+SIGNAL_REFRESH_INTERVAL = float(os.environ.get('SIGNAL_REFRESH_INTERVAL', 60))
+SIGNAL_REFRESH_JITTER = float(os.environ.get('SIGNAL_REFRESH_JITTER', 5))
+SIGNAL_REFRESH_MAX_BACKOFF = float(os.environ.get('SIGNAL_REFRESH_MAX_BACKOFF', 900))
+SIGNAL_REFRESH_BUDGET = int(os.environ.get('SIGNAL_REFRESH_BUDGET', 120))
+
 app = Flask(__name__)
+metrics = Registry()
+upstream_fetch_seconds = metrics.histogram(
+    'upstream_fetch_seconds', 'Upstream market_chart request latency.', ['endpoint'])
+json_decode_seconds = metrics.histogram(
+    'json_decode_seconds', 'Time spent decoding upstream JSON.', ['endpoint'])
+indicator_compute_seconds = metrics.histogram(
+    'indicator_compute_seconds', 'Indicator computation time.', ['mode'])
+request_seconds = metrics.histogram(
+    'request_seconds', 'Total request latency.', ['route'])
+actions_total = metrics.counter('signal_actions_total', 'Signals emitted.', ['action'])
+errors_total = metrics.counter('errors_total', 'Errors by kind.', ['kind'])
+not_enough_data_total = metrics.counter(
+    'not_enough_data_total', 'Analyses skipped for lack of price history.')
+price_cache = PriceCache(maxsize=PRICE_CACHE_SIZE, ttl=PRICE_CACHE_TTL)
+series_store = SeriesStore(PRICE_STORE_DIR) if PRICE_STORE_DIR else None
+transport = Transport(
+    pool_maxsize=UPSTREAM_POOL_SIZE,
+    connect_timeout=UPSTREAM_CONNECT_TIMEOUT,
+    read_timeout=UPSTREAM_READ_TIMEOUT,
+    retries=UPSTREAM_RETRIES,
+    backoff_factor=UPSTREAM_BACKOFF,
+    failure_threshold=UPSTREAM_BREAKER_FAILURES,
+    reset_timeout=UPSTREAM_BREAKER_RESET,
+)
+indicator_engines = OrderedDict()
+indicator_engines_lock = threading.Lock()
+price_rings = OrderedDict()
+price_rings_lock = threading.Lock()
+fetch_pool = ThreadPoolExecutor(max_workers=BATCH_FETCH_WORKERS)
 
-def fetch_prices(symbol='bitcoin', currency='usd', days=30):
-    url = f'https://api.coingecko.com/api/v3/coins/{symbol}/market_chart'
+def download_market_chart(symbol='bitcoin', currency='usd', days=30):
+    url = f'{COINGECKO_API_URL}/coins/{symbol}/market_chart'
     params = {'vs_currency': currency, 'days': days}
-    response = requests.get(url, params=params)
-    data = response.json()
+    with upstream_fetch_seconds.time('market_chart'):
+        response = transport.get(url, params)
+    with json_decode_seconds.time('market_chart'):
+        data = response.json()
+    timestamps = [price[0] for price in data['prices']]
     prices = [price[1] for price in data['prices']]
-    return prices
+    return timestamps, prices
+
+def download_market_chart_range(symbol, currency, start, end):
+    url = f'{COINGECKO_API_URL}/coins/{symbol}/market_chart/range'
+    params = {'vs_currency': currency, 'from': int(start), 'to': int(end)}
+    with upstream_fetch_seconds.time('market_chart_range'):
+        response = transport.get(url, params)
+    with json_decode_seconds.time('market_chart_range'):
+        data = response.json()
+    timestamps = [price[0] for price in data['prices']]
+    prices = [price[1] for price in data['prices']]
+    return timestamps, prices
+
+def resident(table, lock, key, factory=None):
+    """`table[key]`, created by `factory()` if given and missing, else None.
+
+    Keeps at most RESIDENT_SERIES entries, dropping the least recently used.
+    """
+    with lock:
+        value = table.get(key)
+        if value is None:
+            if factory is None:
+                return None
+            value = table[key] = factory()
+        table.move_to_end(key)
+        while len(table) > RESIDENT_SERIES:
+            table.popitem(last=False)
+    return value
+
+def get_price_ring(key, create=True):
+    def new_ring():
+        days = key[-1]
+        capacity = int(float(days) * 86400 // granularity_ttl(days)) + 2
+        return RingSeries(min(capacity, PRICE_RING_MAX_POINTS))
+    return resident(price_rings, price_rings_lock, key, new_ring if create else None)
+
+def load_market_chart(symbol='bitcoin', currency='usd', days=30):
+    key = (symbol, currency, days)
+    step = granularity_ttl(days)
+    window = float(days) * 86400
+    # a ring is only created once there are points to put in it
+    ring = get_price_ring(key, create=False)
+    if ring is None and series_store is not None:
+        stored = series_store.read(key)
+        if stored is not None and len(stored[0]):
+            ring = get_price_ring(key)
+            if not len(ring):
+                ring.extend(*stored)
+
+    # Only ask upstream for the points after the newest one we hold; a full
+    # download is needed only when nothing usable is held.
+    last = ring.last_timestamp if ring is not None else None
+    now = time.time()
+    try:
+        if last is None or now - last / 1000 >= window:
+            timestamps, prices = download_market_chart(symbol, currency, days)
+        elif now - last / 1000 >= step:
+            timestamps, prices = download_market_chart_range(symbol, currency, last / 1000 + 1, now)
+        else:
+            return ring.arrays()
+    except (CircuitOpenError, requests.RequestException, ValueError) as e:
+        errors_total.inc('circuit_open' if isinstance(e, CircuitOpenError) else 'upstream')
+        if ring is None or not len(ring):
+            raise
+        errors_total.inc('served_stale')
+        # upstream unhealthy: serve the last good series, retry soon
+        return Expiring(ring.arrays(), min(step, UPSTREAM_BREAKER_RESET))
+
+    if ring is None:
+        ring = get_price_ring(key)
+    if ring.extend(timestamps, prices, min_spacing=step * 1000):
+        ring.trim(ring.last_timestamp - window * 1000)
+        if series_store is not None:
+            series_store.append(key, timestamps, prices)
+    return ring.arrays()
+
+def fetch_market_chart(symbol='bitcoin', currency='usd', days=30):
+    return price_cache.get((symbol, currency, days),
+                           lambda: load_market_chart(symbol, currency, days))
+
+def fetch_prices(symbol='bitcoin', currency='usd', days=30):
+    return fetch_market_chart(symbol, currency, days)[1]
 
 def compute_rsi(prices, period=14):
-    deltas = [prices[i+1] - prices[i] for i in range(len(prices)-1)]
-    gains = [delta if delta > 0 else 0 for delta in deltas]
-    losses = [-delta if delta < 0 else 0 for delta in deltas]
-    avg_gain = sum(gains[:period]) / period
-    avg_loss = sum(losses[:period]) / period
-    rs = avg_gain / avg_loss if avg_loss != 0 else 0
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    return float(wilder_rsi(prices, period)[-1])
 
 def compute_moving_average(prices, period):
     return sum(prices[-period:]) / period
 
-def analyze_market():
-    prices = fetch_prices()
+def get_indicator_engine(key):
+    return resident(indicator_engines, indicator_engines_lock, key, lambda: IndicatorEngine(10, 30, 14))
+
+def analyze_market(symbol='bitcoin', currency='usd', days=30):
+    timestamps, prices = fetch_market_chart(symbol, currency, days)
     if len(prices) < 50:
+        not_enough_data_total.inc()
         return {'status': 'Not enough data'}
-    short_ma = compute_moving_average(prices, 10)
-    long_ma = compute_moving_average(prices, 30)
-    rsi = compute_rsi(prices, 14)
+    # Indicator state stays resident per series; only points newer than the
+    # last one seen are fed through, the first call seeds it in one pass.
+    with indicator_compute_seconds.time('single'):
+        indicators = get_indicator_engine((symbol, currency, days)).ingest(timestamps, prices)
+    short_ma = indicators['short_ma']
+    long_ma = indicators['long_ma']
+    rsi = indicators['rsi']
 
     if rsi > 70 and short_ma < long_ma:
         action = 'SELL'
@@ -38,6 +197,7 @@ def analyze_market():
         action = 'BUY'
     else:
         action = 'HOLD'
+    actions_total.inc(action)
 
     return {
         'short_ma': short_ma,
@@ -46,9 +206,163 @@ def analyze_market():
         'action': action
     }
 
+def analyze_markets(symbols, currency='usd', days=30):
+    futures = {symbol: fetch_pool.submit(fetch_prices, symbol, currency, days) for symbol in symbols}
+    results = {}
+    series = {}
+    for symbol, future in futures.items():
+        try:
+            prices = future.result()
+        except Exception as e:
+            errors_total.inc('fetch')
+            results[symbol] = {'status': 'error', 'error': str(e)}
+            continue
+        if len(prices) < 50:
+            not_enough_data_total.inc()
+            results[symbol] = {'status': 'Not enough data'}
+        else:
+            series[symbol] = prices
+
+    if series:
+        with indicator_compute_seconds.time('batch'):
+            matrix, lengths = pad_series(list(series.values()))
+            short_ma, long_ma, rsi, action = batch_signals(matrix, lengths, 10, 30, 14)
+        for i, symbol in enumerate(series):
+            actions_total.inc(str(action[i]))
+            results[symbol] = {
+                'short_ma': float(short_ma[i]),
+                'long_ma': float(long_ma[i]),
+                'rsi': float(rsi[i]),
+                'action': str(action[i])
+            }
+    return {symbol: results[symbol] for symbol in symbols}
+
+refresher = None
+if SIGNAL_REFRESH_SYMBOLS:
+    refresher = SignalRefresher(
+        analyze_market, SIGNAL_REFRESH_SYMBOLS,
+        interval=SIGNAL_REFRESH_INTERVAL,
+        jitter=SIGNAL_REFRESH_JITTER,
+        max_backoff=SIGNAL_REFRESH_MAX_BACKOFF,
+        budget=SIGNAL_REFRESH_BUDGET,
+    ).start()
+
+def indicator_series(symbol='bitcoin', currency='usd', days=30):
+    timestamps, prices = fetch_market_chart(symbol, currency, days)
+    with indicator_compute_seconds.time('series'):
+        return {
+            'timestamp': timestamps,
+            'price': prices,
+            'short_ma': sma(prices, 10),
+            'long_ma': sma(prices, 30),
+            'rsi': wilder_rsi(prices, 14),
+        }
+
+def negotiate_series_format(values):
+    requested = request.args.get('format')
+    if requested:
+        return requested
+    best = request.accept_mimetypes.best_match(
+        ['application/json', COLUMNAR_MIMETYPE, 'application/octet-stream', ARROW_MIMETYPE])
+    if best == ARROW_MIMETYPE and pa is not None:
+        return 'arrow'
+    if best in (COLUMNAR_MIMETYPE, 'application/octet-stream'):
+        return 'binary'
+    explicit_json = 'application/json' in request.accept_mimetypes.values()
+    return 'json' if explicit_json or values <= SERIES_JSON_MAX_VALUES else 'binary'
+
+def request_days():
+    """The `days` query argument, or None if it is outside 1..MAX_DAYS."""
+    days = request.args.get('days', 30, type=int)
+    return days if 1 <= days <= MAX_DAYS else None
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        request_seconds.observe(time.perf_counter() - start, request.url_rule.rule if request.url_rule else 'unmatched')
+    if response.status_code >= 500:
+        errors_total.inc('http_5xx')
+    return response
+
 @app.route('/')
 def home():
-    return jsonify(analyze_market())
+    if refresher is None:
+        return jsonify(analyze_market())
+    snapshot = refresher.snapshot(SIGNAL_REFRESH_SYMBOLS[0])
+    if snapshot is None:
+        return jsonify({'status': 'Warming up'}), 503
+    return jsonify(dict(snapshot['result'], updated_at=snapshot['updated_at'],
+                        age=snapshot['age'], stale=snapshot['stale']))
+
+@app.route('/signals')
+def signals():
+    if refresher is None:
+        return jsonify({'error': 'background refresh is disabled'}), 404
+    return jsonify(refresher.snapshots())
+
+@app.route('/analyze')
+def analyze():
+    symbols = [s for s in request.args.get('symbols', 'bitcoin').split(',') if s]
+    symbols = list(dict.fromkeys(symbols))
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        return jsonify({'error': f'at most {MAX_BATCH_SYMBOLS} symbols per request'}), 400
+    currency = request.args.get('currency', 'usd')
+    days = request_days()
+    if days is None:
+        return jsonify({'error': f'days must be between 1 and {MAX_DAYS}'}), 400
+    return jsonify(analyze_markets(symbols, currency, days))
+
+@app.route('/series')
+def series():
+    symbol = request.args.get('symbol', 'bitcoin')
+    currency = request.args.get('currency', 'usd')
+    days = request_days()
+    if days is None:
+        return jsonify({'error': f'days must be between 1 and {MAX_DAYS}'}), 400
+    points = request.args.get('points', type=int)
+    if points is not None and points < 3:
+        return jsonify({'error': 'points must be at least 3'}), 400
+    try:
+        columns = indicator_series(symbol, currency, days)
+    except Exception as e:
+        errors_total.inc('fetch')
+        return jsonify({'status': 'error', 'error': str(e)}), 502
+
+    if points is not None:
+        method = request.args.get('downsample', 'lttb')
+        if method == 'lttb':
+            keep = lttb_indices(columns['timestamp'], columns['price'], points)
+        elif method == 'minmax':
+            keep = minmax_indices(columns['price'], points)
+        else:
+            return jsonify({'error': f'unknown downsample method {method!r}'}), 400
+        columns = {name: np.asarray(values)[keep] for name, values in columns.items()}
+
+    fmt = negotiate_series_format(len(columns) * len(columns['price']))
+    if fmt == 'json':
+        return Response(encode_json(columns), mimetype='application/json')
+    if fmt == 'binary':
+        return Response(encode_columnar(columns), mimetype=COLUMNAR_MIMETYPE)
+    if fmt == 'arrow' and pa is not None:
+        return Response(encode_arrow(columns), mimetype=ARROW_MIMETYPE)
+    return jsonify({'error': f'unsupported format {fmt!r}'}), 406
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(price_cache.stats())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/transport/stats')
+def transport_stats():
+    return jsonify(transport.stats())
 
 if __name__ == '__main__':
     app.run(debug=True)
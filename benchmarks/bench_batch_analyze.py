@@ -0,0 +1,103 @@
+"""Compare `/analyze` batching against looping the single-symbol path.
+
+    python benchmarks/bench_batch_analyze.py --latency 0.05 --counts 1,10,50,200
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import batch_signals, pad_series  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def start_stub(port, latency):
+    # out of process so stub JSON generation doesn't compete for our GIL
+    proc = subprocess.Popen([sys.executable, os.path.join(HERE, 'coingecko_stub.py'),
+                             '--port', str(port), '--latency', str(latency)],
+                            stdout=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'{url}/__stats')
+            return proc, f'{url}/api/v3'
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError('CoinGecko stub did not start')
+
+
+def loop_single(app, symbols):
+    return {symbol: single_compute(app, app.fetch_prices(symbol)) for symbol in symbols}
+
+
+def single_compute(app, prices):
+    short_ma = app.compute_moving_average(prices, 10)
+    long_ma = app.compute_moving_average(prices, 30)
+    rsi = app.compute_rsi(prices, 14)
+    return short_ma, long_ma, rsi
+
+
+def loop_compute(app, series):
+    return [single_compute(app, prices) for prices in series]
+
+
+def batch_compute(series):
+    matrix, lengths = pad_series(series)
+    return batch_signals(matrix, lengths)
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--counts', default='1,10,50,200')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    stub, api_url = start_stub(args.port, args.latency)
+    os.environ['COINGECKO_API_URL'] = api_url
+    os.environ['PRICE_CACHE_TTL'] = '0'  # every call goes upstream
+    import app
+
+    results = []
+    for count in [int(c) for c in args.counts.split(',')]:
+        symbols = [f'coin-{i}' for i in range(count)]
+        row = {
+            'symbols': count,
+            'loop_s': timed(loop_single, app, symbols, repeat=args.repeat),
+            'batch_s': timed(app.analyze_markets, symbols, repeat=args.repeat),
+        }
+
+        # indicator math only, inputs already in memory
+        series = [app.fetch_prices(s) for s in symbols]
+        row['loop_compute_s'] = timed(loop_compute, app, series, repeat=args.repeat)
+        row['batch_compute_s'] = timed(batch_compute, series, repeat=args.repeat)
+        row['speedup'] = row['loop_s'] / row['batch_s']
+        results.append(row)
+        print(json.dumps(row))
+
+    stub.terminate()
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'latency_s': args.latency, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Per-candle time and dataframe memory of BB_RPB_TSL_RNG.populate_indicators
+in live mode, where only the active parameter values get columns, and in
+hyperopt mode, where every value of the swept ranges does.
+
+    python benchmarks/bench_bb_rpb_ranges.py --candles 1000 --repeat 20
+
+Needs the strategy's own dependencies (freqtrade, TA-Lib, pandas_ta,
+technical) importable.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import types
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import talib.abstract as ta  # noqa: E402
+
+RANGED = ('buy_cci_length', 'buy_rmi_length', 'base_nb_candles_sell')
+
+
+def load_strategy():
+    path = os.path.join(ROOT, 'BB_RPB_TSL_RNG')
+    module = types.ModuleType('BB_RPB_TSL_RNG')
+    module.__file__ = path
+    with open(path) as f:
+        exec(compile(f.read(), path, 'exec'), module.__dict__)
+    return module
+
+
+def synthetic_ohlcv(n, seed, base=100.0):
+    rng = np.random.default_rng(seed)
+    close = base * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.002, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.002, n)))
+    return pd.DataFrame({'date': pd.date_range('2024-01-01', periods=n, freq='5min', tz='UTC'),
+                         'open': open_, 'high': high, 'low': low, 'close': close,
+                         'volume': rng.random(n) * 1000})
+
+
+class StubDataProvider:
+    def __init__(self, btc):
+        self.btc = btc
+
+    def get_pair_dataframe(self, pair, timeframe=None):
+        return self.btc
+
+
+def make_strategy(module, runmode, btc):
+    strategy = module.BB_RPB_TSL_RNG({'runmode': runmode})
+    strategy.dp = StubDataProvider(btc)
+    if runmode == 'hyperopt':
+        # what hyperopt does to the parameters of the spaces it sweeps
+        for name in RANGED:
+            parameter = getattr(strategy, name)
+            parameter.in_space = True
+            parameter.optimize = True
+    return strategy
+
+
+def check_ranges(module, strategy, frame):
+    """The batched columns match the per-value indicator calls they replaced."""
+    for val in strategy.active_range(strategy.buy_cci_length):
+        assert np.array_equal(frame[f'cci_length_{val}'], ta.CCI(frame, val), equal_nan=True), val
+    for val in strategy.active_range(strategy.buy_rmi_length):
+        assert np.array_equal(frame[f'rmi_length_{val}'], module.RMI(frame, length=val, mom=4),
+                              equal_nan=True), val
+    for val in strategy.active_range(strategy.base_nb_candles_sell):
+        assert np.array_equal(frame[f'ma_sell_{val}'], ta.EMA(frame, timeperiod=val), equal_nan=True), val
+
+
+def measure(module, runmode, pair, btc, repeat):
+    strategy = make_strategy(module, runmode, btc)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frame = strategy.populate_indicators(pair.copy(), {'pair': 'ETH/USDT'})
+        times.append(time.perf_counter() - start)
+    check_ranges(module, strategy, frame)
+    return {
+        'mode': runmode,
+        'columns': frame.shape[1],
+        'ranged_columns': sum(len(strategy.active_range(getattr(strategy, name))) for name in RANGED),
+        'per_candle_ms': float(np.median(times)) * 1e3,
+        'memory_kib': int(frame.memory_usage(deep=True).sum()) / 1024,
+    }, frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candles', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    module = load_strategy()
+    pair = synthetic_ohlcv(args.candles, 1)
+    btc = synthetic_ohlcv(args.candles, 2, 40000.0)
+    results = []
+    frames = {}
+    for runmode in ('live', 'hyperopt'):
+        row, frames[runmode] = measure(module, runmode, pair, btc, args.repeat)
+        row['candles'] = args.candles
+        results.append(row)
+        print(json.dumps(row))
+    shared = [column for column in frames['live'].columns if column in frames['hyperopt'].columns]
+    for column in shared:
+        live, hyperopt = frames['live'][column], frames['hyperopt'][column]
+        assert live.equals(hyperopt), column
+    print(f'{len(shared)} live columns identical in hyperopt mode; ranged columns match the per-value calls')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
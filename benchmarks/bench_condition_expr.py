@@ -0,0 +1,283 @@
+"""Entry/exit condition evaluation: the fused, chunked `condition_expr`
+path against the pandas `reduce(&)` path it replaced, on 100k-candle frames.
+
+    python benchmarks/bench_condition_expr.py --candles 100000
+
+Two parts. A synthetic six-clause condition at three selectivities shows
+the evaluator on its own, including the tracemalloc peak of each path.
+BB_RPB_TSL_RNG's populate_buy_trend/populate_sell_trend then run as they
+are now and as they were (kept below as `ReducePath`) on the same
+indicator frame. Both parts check the outputs are identical and exit
+non-zero if not. The strategy part needs freqtrade, TA-Lib, pandas_ta and
+technical importable.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from functools import reduce
+
+import numpy as np
+import freqtrade.vendor.qtpylib.indicators as qtpylib
+import pandas as pd
+from pandas import DataFrame
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_strategies import PHASES, MarketData, make_strategy, own_method  # noqa: E402
+from condition_expr import all_of, col, evaluate  # noqa: E402
+
+
+def best_of(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def peak_kib(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def synthetic(candles, repeat):
+    rng = np.random.default_rng(7)
+    frame = pd.DataFrame({name: rng.normal(size=candles) for name in 'abcdefgh'})
+    rows = []
+    # the first clause's threshold sets how often the rest has to be looked at
+    for selectivity, threshold in (('50%', 0.0), ('5%', 1.645), ('0.1%', 3.09)):
+        def pandas_path():
+            conditions = [
+                frame['a'] > threshold,
+                frame['b'] < frame['c'] * 1.5,
+                frame['d'] - frame['e'] > frame['f'] / 100,
+                frame['g'].shift(1) < frame['g'],
+                frame['h'] > -1,
+                frame['c'] + frame['d'] < 2,
+            ]
+            return reduce(lambda x, y: x & y, conditions).to_numpy()
+
+        condition = all_of(
+            col('a') > threshold,
+            col('b') < col('c') * 1.5,
+            col('d') - col('e') > col('f') / 100,
+            col('g').shift(1) < col('g'),
+            col('h') > -1,
+            col('c') + col('d') < 2,
+        )
+        same = np.array_equal(pandas_path(), evaluate(condition, frame))
+        rows.append({
+            'part': 'synthetic',
+            'selectivity': selectivity,
+            'reduce_ms': best_of(pandas_path, repeat) * 1e3,
+            'fused_ms': best_of(lambda: evaluate(condition, frame), repeat) * 1e3,
+            'unchunked_ms': best_of(lambda: evaluate(condition, frame, chunk=candles), repeat) * 1e3,
+            'reduce_peak_kib': peak_kib(pandas_path),
+            'fused_peak_kib': peak_kib(lambda: evaluate(condition, frame)),
+            'identical': same,
+        })
+    return rows
+
+
+class ReducePath:
+    """BB_RPB_TSL_RNG's entry/exit methods as they were, for comparison."""
+
+
+    def populate_buy_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+
+        conditions = []
+        dataframe.loc[:, 'buy_tag'] = ''
+
+        if self.buy_is_dip_enabled.value:
+
+            is_dip = (
+                (dataframe[f'rmi_length_{self.buy_rmi_length.value}'] < self.buy_rmi.value) &
+                (dataframe[f'cci_length_{self.buy_cci_length.value}'] <= self.buy_cci.value) &
+                (dataframe['srsi_fk'] < self.buy_srsi_fk.value)
+            )
+
+        if self.buy_is_break_enabled.value:
+
+            is_break = (
+
+                (   (dataframe['bb_delta'] > self.buy_bb_delta.value)                                   #"buy_bb_delta": 0.025 0.036
+                    &                                                                                   #"buy_bb_width": 0.095 0.133
+                    (dataframe['bb_width'] > self.buy_bb_width.value)
+                )
+                &
+                (dataframe['closedelta'] > dataframe['close'] * self.buy_closedelta.value / 1000 ) &    # from BinH
+                (dataframe['close'] < dataframe['bb_lowerband3'] * self.buy_bb_factor.value)
+            )
+
+        is_local_uptrend = (                                                                            # from NFI next gen
+
+                (dataframe['ema_26'] > dataframe['ema_12']) &
+                (dataframe['ema_26'] - dataframe['ema_12'] > dataframe['open'] * self.buy_ema_diff.value) &
+                (dataframe['ema_26'].shift() - dataframe['ema_12'].shift() > dataframe['open'] / 100) &
+                (dataframe['close'] < dataframe['bb_lowerband2'] * self.buy_bb_factor.value) &
+                (dataframe['closedelta'] > dataframe['close'] * self.buy_closedelta.value / 1000 )
+            )
+
+        is_ewo = (                                                                                      # from SMA offset
+                (dataframe['rsi_fast'] < self.buy_rsi_fast.value) &
+                (dataframe['close'] < dataframe['ema_8'] * self.buy_ema_low.value) &
+                (dataframe['EWO'] > self.buy_ewo.value) &
+                (dataframe['close'] < dataframe['ema_16'] * self.buy_ema_high.value) &
+                (dataframe['rsi'] < self.buy_rsi.value)
+            )
+
+        is_ewo_2 = (
+                (dataframe['rsi_fast'] < self.buy_rsi_fast.value) &
+                (dataframe['close'] < dataframe['ema_8'] * self.buy_ema_low_2.value) &
+                (dataframe['EWO'] > self.buy_ewo_high.value) &
+                (dataframe['close'] < dataframe['ema_16'] * self.buy_ema_high_2.value) &
+                (dataframe['rsi'] < self.buy_rsi.value)
+            )
+
+        is_cofi = (
+                (dataframe['open'] < dataframe['ema_8'] * self.buy_ema_cofi.value) &
+                (qtpylib.crossed_above(dataframe['fastk'], dataframe['fastd'])) &
+                (dataframe['fastk'] < self.buy_fastk.value) &
+                (dataframe['fastd'] < self.buy_fastd.value) &
+                (dataframe['adx'] > self.buy_adx.value) &
+                (dataframe['EWO'] > self.buy_ewo_high.value)
+            )
+
+        is_nfi_32 = (
+                (dataframe['rsi_slow'] < dataframe['rsi_slow'].shift(1)) &
+                (dataframe['rsi_fast'] < 46) &
+                (dataframe['rsi'] > 19) &
+                (dataframe['close'] < dataframe['sma_15'] * 0.942) &
+                (dataframe['cti'] < -0.86)
+            )
+
+        is_nfi_33 = (
+                (dataframe['close'] < (dataframe['ema_13'] * 0.978)) &
+                (dataframe['EWO'] > 8) &
+                (dataframe['cti'] < -0.88) &
+                (dataframe['rsi'] < 32) &
+                (dataframe['r_14'] < -98.0) &
+                (dataframe['volume'] < (dataframe['volume_mean_4'] * 2.5))
+            )
+
+        is_BB_checked = is_dip & is_break
+
+        conditions.append(is_BB_checked)          # ~1.7 89%
+        dataframe.loc[is_BB_checked, 'buy_tag'] += 'bb '
+
+        conditions.append(is_local_uptrend)       # ~3.84 90.2%
+        dataframe.loc[is_local_uptrend, 'buy_tag'] += 'local uptrend '
+
+        conditions.append(is_ewo)                 # ~2.26 93.5%
+        dataframe.loc[is_ewo, 'buy_tag'] += 'ewo '
+
+        conditions.append(is_ewo_2)               # ~3.68 90.3%
+        dataframe.loc[is_ewo_2, 'buy_tag'] += 'ewo2 '
+
+        conditions.append(is_cofi)                # ~3.21 90.8%
+        dataframe.loc[is_cofi, 'buy_tag'] += 'cofi '
+
+        conditions.append(is_nfi_32)              # ~2.43 91.3%
+        dataframe.loc[is_nfi_32, 'buy_tag'] += 'nfi 32 '
+
+        conditions.append(is_nfi_33)              # ~0.11 100%
+        dataframe.loc[is_nfi_33, 'buy_tag'] += 'nfi 33 '
+
+        if conditions:
+            dataframe.loc[reduce(lambda x, y: x | y, conditions), 'buy' ] = 1
+
+        return dataframe
+
+    def populate_sell_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
+        conditions = []
+
+        conditions.append(
+            (
+                (dataframe['close'] > dataframe['sma_9'])&
+                (dataframe['close'] > (dataframe[f'ma_sell_{self.base_nb_candles_sell.value}'] * self.high_offset_2.value)) &
+                (dataframe['rsi']>50)&
+                (dataframe['volume'] > 0)&
+                (dataframe['rsi_fast'] > dataframe['rsi_slow'])
+
+            )
+            |
+            (
+                (dataframe['sma_9'] > (dataframe['sma_9'].shift(1) + dataframe['sma_9'].shift(1)*0.005 )) &
+                (dataframe['close'] < dataframe['hma_50'])&
+                (dataframe['close'] > (dataframe[f'ma_sell_{self.base_nb_candles_sell.value}'] * self.high_offset.value)) &
+                (dataframe['volume'] > 0)&
+                (dataframe['rsi_fast']>dataframe['rsi_slow'])
+            )
+
+        )
+
+        if conditions:
+            dataframe.loc[
+                reduce(lambda x, y: x | y, conditions),
+                'sell'
+            ]=1
+
+        return dataframe
+
+
+def strategy(candles, repeat):
+    data = MarketData(candles)
+    current = make_strategy('BB_RPB_TSL_RNG', data)
+    frame = data.frame('PAIR0/USDT', current.timeframe)
+    current.dp.current_time = frame['date'].iat[-1].to_pydatetime()
+    frame = current.populate_indicators(frame, {'pair': 'PAIR0/USDT'})
+    legacy = type('ReducePath', (ReducePath, type(current)), {})(current.config)
+    legacy.dp = current.dp
+
+    def signals(strategy):
+        def run():
+            result = frame.copy(deep=False)
+            for phase in ('entry', 'exit'):
+                result = own_method(strategy, PHASES[phase])(result, {'pair': 'PAIR0/USDT'})
+            return result
+        return run
+
+    old, new = signals(legacy)(), signals(current)()
+    same = all(np.array_equal(old[column].fillna(0).to_numpy(dtype=float), new[column].fillna(0).to_numpy(dtype=float))
+               for column in ('buy', 'sell') if column in old or column in new)
+    same = same and (old['buy_tag'].astype(str).to_numpy() == new['buy_tag'].astype(str).to_numpy()).all()
+    return [{
+        'part': 'BB_RPB_TSL_RNG entry+exit',
+        'reduce_ms': best_of(signals(legacy), repeat) * 1e3,
+        'fused_ms': best_of(signals(current), repeat) * 1e3,
+        'reduce_peak_kib': peak_kib(signals(legacy)),
+        'fused_peak_kib': peak_kib(signals(current)),
+        'identical': bool(same),
+    }]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candles', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--no-strategy', action='store_true', help='only the synthetic part')
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    rows = synthetic(args.candles, args.repeat)
+    if not args.no_strategy:
+        rows += strategy(args.candles, args.repeat)
+    for row in rows:
+        print(json.dumps(row))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+    if not all(row['identical'] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Bytes transferred and JSON parse time per refresh: full 30-day download vs delta.
+
+    python benchmarks/bench_delta_fetch.py --refreshes 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coingecko_stub import StubServer  # noqa: E402
+
+
+def measure(url, params, refreshes):
+    sizes, parse = [], []
+    for _ in range(refreshes):
+        response = requests.get(url, params=params)
+        body = response.content
+        t0 = time.perf_counter()
+        data = json.loads(body)
+        parse.append(time.perf_counter() - t0)
+        sizes.append(len(body))
+        assert 'prices' in data
+    return {
+        'bytes_per_refresh': statistics.mean(sizes),
+        'parse_ms_per_refresh': statistics.mean(parse) * 1000,
+        'points_per_refresh': len(data['prices']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--refreshes', type=int, default=20)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--symbol', default='bitcoin')
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    stub = StubServer().start()
+    base = f'{stub.api_url}/coins/{args.symbol}'
+    now = time.time()
+    step = 3600 if args.days <= 90 else 86400
+
+    result = {
+        'full': measure(f'{base}/market_chart', {'vs_currency': 'usd', 'days': args.days}, args.refreshes),
+        # what load_market_chart asks for once one new point is due
+        'delta': measure(f'{base}/market_chart/range',
+                         {'vs_currency': 'usd', 'from': int(now - step), 'to': int(now)}, args.refreshes),
+    }
+    result['bytes_ratio'] = result['full']['bytes_per_refresh'] / result['delta']['bytes_per_refresh']
+    result['parse_ratio'] = result['full']['parse_ms_per_refresh'] / result['delta']['parse_ms_per_refresh']
+    print(json.dumps(result, indent=2))
+    stub.stop()
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Callback latency of AlphaXScalperV2.custom_stoploss/custom_exit with the
+per-trade entry-level cache, against the previous per-call ATR lookup.
+
+Simulates a day of bot loops (one every --throttle seconds) with 5 open
+trades. A new 5m candle is analysed every 5 minutes, and each trade is
+closed and reopened every --hold minutes so the cache also sees misses.
+
+    python benchmarks/bench_entry_atr.py --throttle 5
+
+Needs freqtrade and TA-Lib importable.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AlphaXScalperV2 import AlphaXScalperV2  # noqa: E402
+
+CANDLE = timedelta(minutes=5)
+WINDOW = 1000
+
+
+class PerCallLookup(AlphaXScalperV2):
+    """The callbacks as they were: fetch the ATR series and search it every call."""
+
+    def custom_stoploss(self, pair, trade, current_time, current_rate, current_profit, **kwargs):
+        atr = self.dp.get_indicator(pair, 'atr', self.timeframe)
+        if atr is None:
+            return 1
+        try:
+            trade_open_index = atr.index.get_loc(trade.open_date_utc, method='nearest')
+            trade_atr = atr.iloc[trade_open_index]
+        except Exception:
+            trade_atr = 0.01
+        sl_price = trade.open_rate - trade_atr
+        if current_rate < sl_price:
+            return 0.99
+        return 1
+
+    def custom_exit(self, pair, trade, current_time, current_rate, current_profit, **kwargs):
+        atr = self.dp.get_indicator(pair, 'atr', self.timeframe)
+        if atr is None:
+            return None
+        try:
+            trade_open_index = atr.index.get_loc(trade.open_date_utc, method='nearest')
+            trade_atr = atr.iloc[trade_open_index]
+        except Exception:
+            trade_atr = 0.01
+        tp_price = trade.open_rate + 1.5 * trade_atr
+        sl_price = trade.open_rate - 1.0 * trade_atr
+        if current_rate >= tp_price:
+            return 'atr_tp', 1
+        elif current_rate <= sl_price:
+            return 'atr_sl', 1
+        elif (current_time - trade.open_date_utc).total_seconds() / 60 > 45:
+            return 'timeout', 1
+        return None
+
+
+class StubTrade:
+    def __init__(self, pair, open_date_utc, open_rate):
+        self.pair = pair
+        self.open_date_utc = open_date_utc
+        self.open_rate = open_rate
+
+
+class StubDataProvider:
+    def __init__(self):
+        self.frames = {}
+
+    def get_analyzed_dataframe(self, pair, timeframe):
+        frame = self.frames[pair]
+        return frame, frame['date'].iat[-1]
+
+    def get_indicator(self, pair, name, timeframe=None):
+        frame = self.frames[pair]
+        return pd.Series(frame[name].values, index=pd.DatetimeIndex(frame['date']), name=name)
+
+
+def synthetic_market(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    atr = pd.Series(np.abs(rng.normal(0, 0.004, n)) * close).rolling(14).mean().to_numpy()
+    dates = pd.date_range('2024-01-01', periods=n, freq=CANDLE, tz='UTC')
+    return pd.DataFrame({'date': dates, 'close': close, 'atr': atr})
+
+
+def simulate(klass, markets, pairs, ticks, throttle, hold):
+    strategy = klass({'runmode': 'dry_run'})
+    strategy.dp = dp = StubDataProvider()
+    start = markets[pairs[0]]['date'].iat[WINDOW]
+    trades = {}
+    latencies = []
+    exits = 0
+    for tick in range(ticks):
+        now = start + timedelta(seconds=tick * throttle)
+        candle = WINDOW + int((now - start) / CANDLE)
+        for index, pair in enumerate(pairs):
+            market = markets[pair]
+            if tick % int(CANDLE.total_seconds() // throttle) == 0:
+                dp.frames[pair] = market.iloc[candle - WINDOW:candle].reset_index(drop=True)
+            rate = market['close'].iat[candle]
+            trade = trades.get(pair)
+            # a fixed schedule, so both variants see the same trades
+            if trade is None or (now - trade.open_date_utc) >= timedelta(minutes=hold + index):
+                if trade is not None:
+                    strategy.confirm_trade_exit(pair, trade, 'market', 1.0, rate, 'GTC', 'exit_signal', now)
+                trade = trades[pair] = StubTrade(pair, market['date'].iat[candle - 1], rate)
+            profit = rate / trade.open_rate - 1
+            t0 = time.perf_counter_ns()
+            strategy.custom_stoploss(pair, trade, now, rate, profit)
+            t1 = time.perf_counter_ns()
+            if strategy.custom_exit(pair, trade, now, rate, profit) is not None:
+                exits += 1
+            t2 = time.perf_counter_ns()
+            latencies += [t1 - t0, t2 - t1]
+    latencies = np.array(latencies) / 1e3
+    return {
+        'variant': klass.__name__,
+        'calls': len(latencies),
+        'mean_us': float(latencies.mean()),
+        'p50_us': float(np.percentile(latencies, 50)),
+        'p99_us': float(np.percentile(latencies, 99)),
+        'total_s': float(latencies.sum() / 1e6),
+        'exit_signals': exits,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trades', type=int, default=5)
+    parser.add_argument('--throttle', type=float, default=5.0, help='seconds between bot loops')
+    parser.add_argument('--hours', type=float, default=24.0)
+    parser.add_argument('--hold', type=int, default=120, help='minutes before a trade is rotated')
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    pairs = [f'PAIR{i}/USDT' for i in range(args.trades)]
+    candles = WINDOW + int(args.hours * 12) + 2
+    markets = {pair: synthetic_market(candles, seed) for seed, pair in enumerate(pairs)}
+    ticks = int(args.hours * 3600 / args.throttle)
+    results = [simulate(klass, markets, pairs, ticks, args.throttle, args.hold)
+               for klass in (PerCallLookup, AlphaXScalperV2)]
+    for row in results:
+        print(json.dumps(row))
+    print(f'p50 speedup: {results[0]["p50_us"] / results[1]["p50_us"]:.1f}x')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Validate the shared Ichimoku kernel bit-for-bit and time it against the
+pandas formulations the strategies used before.
+
+    python benchmarks/bench_ichimoku.py --sizes 1000,10000,100000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ichimoku_kernel import ichimoku, technical_ichimoku  # noqa: E402
+
+
+def synthetic_ohlc(n, seed=0, nan_rate=0.0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = np.abs(rng.normal(0, 0.005, n)) * close
+    df = pd.DataFrame({'open': close, 'high': close + spread, 'low': close - spread, 'close': close})
+    if nan_rate:
+        df.loc[rng.random(n) < nan_rate, ['high', 'low']] = np.nan
+    return df
+
+
+def reference_alphax(df):
+    """AlphaXIchimoku / HybridIchiV2 before the kernel."""
+    high_9 = df['high'].rolling(window=9).max()
+    low_9 = df['low'].rolling(window=9).min()
+    tenkan = (high_9 + low_9) / 2
+    high_26 = df['high'].rolling(window=26).max()
+    low_26 = df['low'].rolling(window=26).min()
+    kijun = (high_26 + low_26) / 2
+    senkou_a = ((tenkan + kijun) / 2).shift(26)
+    senkou_b = (df['high'].rolling(window=52).max() + df['low'].rolling(window=52).min()).shift(26) / 2
+    return {'tenkan': tenkan, 'kijun': kijun, 'senkou_a': senkou_a, 'senkou_b': senkou_b}
+
+
+def reference_allweather(df):
+    """ichi_allweather_15m before the kernel."""
+    tenkan = (df['high'].rolling(9).max() + df['low'].rolling(9).min()) / 2
+    kijun = (df['high'].rolling(26).max() + df['low'].rolling(26).min()) / 2
+    senkou_b = (df['high'].rolling(52).max() + df['low'].rolling(52).min()) / 2
+    senkou_a = (tenkan + kijun) / 2
+    return {'tenkan': tenkan, 'kijun': kijun,
+            'senkou_a': senkou_a.shift(26), 'senkou_b': senkou_b.shift(26)}
+
+
+def reference_technical(df, conversion_line_period=20, base_line_periods=60, laggin_span=120, displacement=30):
+    """technical.indicators.ichimoku, as used by AdaptiveMarketSpecialist and IchiV1."""
+    tenkan = (df['high'].rolling(window=conversion_line_period).max()
+              + df['low'].rolling(window=conversion_line_period).min()) / 2
+    kijun = (df['high'].rolling(window=base_line_periods).max()
+             + df['low'].rolling(window=base_line_periods).min()) / 2
+    leading_a = (tenkan + kijun) / 2
+    leading_b = (df['high'].rolling(window=laggin_span).max()
+                 + df['low'].rolling(window=laggin_span).min()) / 2
+    return {
+        'tenkan_sen': tenkan,
+        'kijun_sen': kijun,
+        'senkou_span_a': leading_a.shift(displacement - 1),
+        'senkou_span_b': leading_b.shift(displacement - 1),
+        'chikou_span': df['close'].shift(-displacement + 1),
+    }
+
+
+def reference_cloud(senkou_a, senkou_b):
+    """IchiV1 cloud boundaries."""
+    frame = pd.DataFrame({'senkou_a': senkou_a, 'senkou_b': senkou_b})
+    top = frame[['senkou_a', 'senkou_b']].max(axis=1)
+    bot = frame[['senkou_a', 'senkou_b']].min(axis=1)
+    return {'cloud_top': top, 'cloud_bottom': bot, 'cloud_width': (top - bot) / bot}
+
+
+def check(name, ours, theirs):
+    for key, expected in theirs.items():
+        got = np.asarray(ours[key])
+        expected = np.asarray(expected, dtype=np.float64)
+        if not np.array_equal(got, expected, equal_nan=True):
+            bad = np.flatnonzero(~((got == expected) | (np.isnan(got) & np.isnan(expected))))
+            raise AssertionError(f'{name}.{key} differs at {len(bad)} rows, first {bad[:5]}')
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    results = []
+    for n in [int(s) for s in args.sizes.split(',')]:
+        for nan_rate in (0.0, 0.001):
+            df = synthetic_ohlc(n, nan_rate=nan_rate)
+            h, l, c = df['high'].values, df['low'].values, df['close'].values
+            kernel = ichimoku(h, l, c, 9, 26, 52, 26)
+            check('alphax', kernel, reference_alphax(df))
+            check('allweather', kernel, reference_allweather(df))
+            check('technical', technical_ichimoku(df, 20, 60, 120, 30), reference_technical(df))
+            tech = technical_ichimoku(df, 9, 26, 52, 26)
+            check('technical_9_26_52', tech, reference_technical(df, 9, 26, 52, 26))
+            check('cloud', ichimoku(h, l, c, 9, 26, 52, 25),
+                  reference_cloud(tech['senkou_span_a'], tech['senkou_span_b']))
+
+        row = {
+            'candles': n,
+            'pandas_s': best_of(lambda: reference_alphax(df), args.repeat),
+            'kernel_s': best_of(lambda: ichimoku(df['high'].values, df['low'].values,
+                                                 df['close'].values, 9, 26, 52, 26), args.repeat),
+        }
+        row['speedup'] = row['pandas_s'] / row['kernel_s']
+        results.append(row)
+        print(json.dumps(row))
+
+    print('all kernel outputs match the pandas references bit-for-bit')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
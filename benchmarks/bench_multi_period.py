@@ -0,0 +1,120 @@
+"""Time the multi-period EMA/SMA/RSI/CCI kernel against one TA-Lib call per
+period, at 1, 8 and 80 periods, and check the two agree bit-for-bit.
+
+`one_pass_s` is EMA as a single NumPy traversal for all periods (closed-form
+`indicators.ewm` over a periods x time matrix), kept for comparison: it
+loses to TA-Lib's C loop at every size, which is why the kernel does not
+use it.
+
+    python benchmarks/bench_multi_period.py --sizes 1000,10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import talib
+import talib.abstract as ta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import multi_period  # noqa: E402
+from indicators import ewm  # noqa: E402
+
+
+def synthetic_ohlc(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 40000 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    spread = np.abs(rng.normal(0, 0.002, n)) * close
+    return pd.DataFrame({'open': close, 'high': close + spread, 'low': close - spread, 'close': close,
+                         'volume': rng.random(n) * 1000})
+
+
+def one_pass_ema(values, periods):
+    """All periods in one closed-form recursion; rows start at their SMA seed."""
+    periods = np.asarray(periods)
+    n = len(values)
+    starts = periods - 1
+    alpha = 2.0 / (periods + 1)
+    steps = np.arange(n)
+    live = steps >= starts[:, None]
+    inputs = np.where(live, values, 0.0)
+    inputs[np.arange(len(periods)), starts] = np.cumsum(values)[starts] / periods / alpha
+    return np.where(live, ewm(inputs, alpha, 0.0), np.nan)
+
+
+def families(df):
+    """name -> (kernel(periods), one_call(period), abstract_call(period))"""
+    h, l, c = df['high'].values, df['low'].values, df['close'].values
+    return {
+        'ema': (lambda p: multi_period.ema(c, p), lambda p: talib.EMA(c, p),
+                lambda p: ta.EMA(df, timeperiod=p)),
+        'sma': (lambda p: multi_period.sma(c, p), lambda p: talib.SMA(c, p),
+                lambda p: ta.SMA(df, timeperiod=p)),
+        'rsi': (lambda p: multi_period.rsi(c, p), lambda p: talib.RSI(c, p),
+                lambda p: ta.RSI(df, timeperiod=p)),
+        'cci': (lambda p: multi_period.cci(h, l, c, p), lambda p: talib.CCI(h, l, c, p),
+                lambda p: ta.CCI(df, timeperiod=p)),
+    }
+
+
+def check(name, periods, batch, single):
+    for row, period in enumerate(periods):
+        expected = single(period)
+        got = batch[row]
+        if not np.array_equal(got, expected, equal_nan=True):
+            raise AssertionError(f'{name}({period}) differs from TA-Lib')
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000')
+    parser.add_argument('--counts', default='1,8,80', help='number of periods per batch')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    results = []
+    for n in [int(s) for s in args.sizes.split(',')]:
+        df = synthetic_ohlc(n)
+        for name, (kernel, single, abstract) in families(df).items():
+            for count in [int(s) for s in args.counts.split(',')]:
+                # the spread BB_RPB_TSL_RNG sweeps for its sell EMA: 5, 6, ...
+                periods = list(range(5, 5 + count))
+                check(name, periods, kernel(periods), single)
+                row = {
+                    'candles': n,
+                    'indicator': name,
+                    'periods': count,
+                    'talib_s': best_of(lambda: [single(p) for p in periods], args.repeat),
+                    'talib_abstract_s': best_of(lambda: [abstract(p) for p in periods], args.repeat),
+                    'kernel_s': best_of(lambda: kernel(periods), args.repeat),
+                }
+                if name == 'ema':
+                    close = df['close'].values
+                    row['one_pass_s'] = best_of(lambda: one_pass_ema(close, periods), args.repeat)
+                row['speedup_vs_talib'] = row['talib_s'] / row['kernel_s']
+                row['speedup_vs_abstract'] = row['talib_abstract_s'] / row['kernel_s']
+                results.append(row)
+                print(json.dumps(row))
+
+    print('all kernel outputs match TA-Lib bit-for-bit')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
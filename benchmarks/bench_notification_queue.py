@@ -0,0 +1,115 @@
+"""Trade alerts sent synchronously from the analysis loop against the
+`notification_queue` worker, with a slow message sink.
+
+    python benchmarks/bench_notification_queue.py --pairs 300 --alerts 0.2 --sink-ms 200
+
+Every candle, a fraction `--alerts` of the pairs fires an alert. The
+synchronous path formats and sends each one inside the loop, as
+AdaptiveMarketSpecialist used to. The queued path only `put`s the fields.
+The script reports the time the loop spends on alerts per candle, then
+waits for the queue to drain and reports messages sent, delivery delay and
+the queue's stats. A second queued run with `--maxsize` and `--rate` small
+enough to overflow shows the drop accounting. Needs nothing beyond the
+standard library.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notification_queue import NotificationQueue  # noqa: E402
+
+
+def format_alert(alert):
+    f = alert.fields
+    return "\n".join([
+        f"🚀 BUY: {alert.pair} ({f['regime']})",
+        f"Regime: {f['regime']}\nRel Strength: {f['rel_strength']:.4f}\nRSI: {f['rsi']:.1f}",
+        f"Price: {f['price']:.6f}",
+        f"Support: {f['support']:.6f}",
+        f"Resistance: {f['resistance']:.6f}",
+    ])
+
+
+def alerts(pairs, fraction, candles, seed=3):
+    rng = random.Random(seed)
+    for candle in range(candles):
+        yield candle, [(f'PAIR{i}/USDT', dict(regime='CHOPPY', rel_strength=rng.random(), rsi=rng.uniform(20, 80),
+                                              price=rng.uniform(1, 100), support=1.0, resistance=2.0))
+                       for i in range(pairs) if rng.random() < fraction]
+
+
+class Sink:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.messages = 0
+
+    def __call__(self, text):
+        time.sleep(self.seconds)
+        self.messages += 1
+
+
+def synchronous(args):
+    sink = Sink(args.sink_ms / 1e3)
+    loop = []
+    for candle, fired in alerts(args.pairs, args.alerts, args.candles):
+        t0 = time.perf_counter()
+        for pair, fields in fired:
+            sink(format_alert(type('Alert', (), {'pair': pair, 'fields': fields})))
+        loop.append(time.perf_counter() - t0)
+    return {'mode': 'synchronous', 'loop_s_per_candle': sum(loop) / len(loop), 'messages': sink.messages}
+
+
+def queued(args, maxsize, rate, mode):
+    sink = Sink(args.sink_ms / 1e3)
+    queue = NotificationQueue(sink, format_alert, maxsize=maxsize, interval=args.interval, rate=rate, per=1.0)
+    loop = []
+    t_start = time.perf_counter()
+    for candle, fired in alerts(args.pairs, args.alerts, args.candles):
+        t0 = time.perf_counter()
+        for pair, fields in fired:
+            queue.put('buy', pair, candle, **fields)
+        loop.append(time.perf_counter() - t0)
+    drained = queue.flush(timeout=120)
+    result = {
+        'mode': mode,
+        'loop_s_per_candle': sum(loop) / len(loop),
+        'drain_s': time.perf_counter() - t_start,
+        'drained': drained,
+        'messages': sink.messages,
+        'stats': queue.stats(),
+    }
+    queue.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pairs', type=int, default=300)
+    parser.add_argument('--alerts', type=float, default=0.2, help='fraction of pairs alerting per candle')
+    parser.add_argument('--candles', type=int, default=3)
+    parser.add_argument('--sink-ms', type=float, default=200.0)
+    parser.add_argument('--interval', type=float, default=0.2)
+    parser.add_argument('--maxsize', type=int, default=50, help='queue size of the overload run')
+    parser.add_argument('--rate', type=float, default=1.0, help='messages per second of the overload run')
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    results = [
+        synchronous(args),
+        queued(args, maxsize=1000, rate=20, mode='queued'),
+        queued(args, maxsize=args.maxsize, rate=args.rate, mode='queued, overloaded'),
+    ]
+    for row in results:
+        print(json.dumps(row))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Candle-close burst of a strategy over many pairs: the serial in-process
+loop against `parallel_analysis` with a persistent worker pool.
+
+    python benchmarks/bench_parallel_analysis.py --pairs 300 --workers 4
+
+Each round moves every pair (and BTC/USDT) one candle forward and times
+what the bot does between candle close and having signals for all pairs:
+prefetch plus the per-pair populate_* calls for the pool, the populate_*
+calls alone for the serial loop. The first round includes worker start-up
+and is reported separately. `idle_s` times one more `bot_loop_start`
+in the same candle, as freqtrade's throttle loop makes between candles; it
+should submit nothing. The pool's buy/sell/buy_tag columns must match
+the serial ones; the script exits non-zero if they do not. Needs the
+strategy's dependencies (freqtrade, TA-Lib, pandas_ta, technical)
+importable.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_strategies import (INFORMATIVE, PHASES, ROOT, STRATEGIES, MarketData, StubDataProvider,  # noqa: E402
+                              load_strategy, own_method)
+from parallel_analysis import ParallelAnalysis  # noqa: E402
+
+COLUMNS = ('buy', 'sell', 'buy_tag')
+
+
+class RollingData(MarketData):
+    """Synthetic history of which the last `candles` rows up to `now` are visible."""
+
+    def __init__(self, candles, rounds):
+        super().__init__(candles + rounds)
+        self.window = candles
+        self.now = candles
+        self._full = {}
+
+    def frame(self, pair, timeframe):
+        key = (pair, timeframe)
+        if key not in self._full:
+            self._full[key] = super().frame(pair, timeframe)
+        return self._full[key].iloc[self.now - self.window:self.now].reset_index(drop=True)
+
+    def informative(self, timeframe):
+        return self.frame(INFORMATIVE, timeframe)
+
+
+class WhitelistProvider(StubDataProvider):
+    def __init__(self, data, pairs):
+        super().__init__(data)
+        self.pairs = pairs
+
+    def current_whitelist(self):
+        return list(self.pairs)
+
+
+def make(klass, data, pairs, runmode):
+    strategy = klass({'runmode': runmode, 'strategy': klass.__name__, 'timeframe': klass.timeframe,
+                      'stake_currency': 'USDT', 'dry_run': True})
+    strategy.dp = WhitelistProvider(data, pairs)
+    return strategy
+
+
+def candle(strategy, pairs):
+    """freqtrade's per-pair analysis loop; returns the signal columns per pair."""
+    out = {}
+    for pair in pairs:
+        frame = strategy.dp.get_pair_dataframe(pair, strategy.timeframe)
+        strategy.dp.current_time = frame['date'].iat[-1].to_pydatetime()
+        for names in PHASES.values():
+            method = own_method(strategy, names)
+            if method is not None:
+                frame = method(frame, {'pair': pair})
+        out[pair] = {column: frame[column].to_numpy() for column in COLUMNS if column in frame.columns}
+    return out
+
+
+def same(left, right):
+    for pair, columns in left.items():
+        for column, values in columns.items():
+            other = right[pair].get(column)
+            if values.dtype == object or (other is not None and other.dtype == object):
+                values = ['' if v is None or v != v else v for v in values]
+                other = None if other is None else ['' if v is None or v != v else v for v in other]
+                if values != other:
+                    return False
+            elif other is None or not np.array_equal(np.nan_to_num(values), np.nan_to_num(other)):
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--strategy', default='BB_RPB_TSL_RNG')
+    parser.add_argument('--pairs', type=int, default=300)
+    parser.add_argument('--candles', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    klass = load_strategy(args.strategy)
+    data = RollingData(args.candles, args.rounds + 1)
+    pairs = data.pairs(args.pairs)
+    serial = make(klass, data, pairs, 'dry_run')
+    pooled = make(klass, data, pairs, 'dry_run')
+    pooled.parallel_analysis = ParallelAnalysis(os.path.join(ROOT, STRATEGIES[args.strategy]), args.strategy,
+                                                pooled.config, workers=args.workers, columns=COLUMNS)
+    pooled.parallel_pairs = set()
+    rows = []
+    mismatched = 0
+    try:
+        for round_ in range(args.rounds + 1):
+            data.now += 1
+            t0 = time.perf_counter()
+            expected = candle(serial, pairs)
+            t1 = time.perf_counter()
+            pooled.bot_loop_start(serial.dp.current_time)
+            got = candle(pooled, pairs)
+            t2 = time.perf_counter()
+            pooled.bot_loop_start(serial.dp.current_time)
+            t3 = time.perf_counter()
+            mismatched += not same(expected, got)
+            rows.append({'round': round_, 'serial_s': t1 - t0, 'pool_s': t2 - t1, 'idle_s': t3 - t2})
+            print(json.dumps(rows[-1]))
+    finally:
+        pooled.parallel_analysis.close()
+    steady = rows[1:] or rows
+    result = {
+        'strategy': args.strategy,
+        'pairs': args.pairs,
+        'candles': args.candles,
+        'workers': pooled.parallel_analysis.workers,
+        'cpus': os.cpu_count(),
+        'first_round_pool_s': rows[0]['pool_s'],
+        'serial_s': float(np.median([row['serial_s'] for row in steady])),
+        'pool_s': float(np.median([row['pool_s'] for row in steady])),
+        'idle_s': float(np.median([row['idle_s'] for row in steady])),
+        'mismatched_rounds': mismatched,
+    }
+    result['speedup'] = result['serial_s'] / result['pool_s']
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Hammer `app.fetch_prices` from many threads against the CoinGecko stub.
+
+    python benchmarks/bench_price_cache.py --threads 32 --requests 2000 --latency 0.2
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coingecko_stub import StubServer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--symbols', default='bitcoin')
+    args = parser.parse_args()
+
+    stub = StubServer(latency=args.latency).start()
+    os.environ['COINGECKO_API_URL'] = stub.api_url
+    import app
+
+    symbols = args.symbols.split(',')
+    per_thread = args.requests // args.threads
+    latencies = []
+    lock = threading.Lock()
+    start = threading.Barrier(args.threads)
+
+    def worker(i):
+        start.wait()
+        local = []
+        for j in range(per_thread):
+            t0 = time.perf_counter()
+            app.fetch_prices(symbols[(i + j) % len(symbols)])
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    result = {
+        'requests': len(latencies),
+        'elapsed_s': elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+        'upstream_calls': stub.stats()['calls'],
+        'cache': app.price_cache.stats(),
+    }
+    print(json.dumps(result, indent=2))
+    stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Cost of the signal journal in a backtest and speed of reading it back:
+a pass without the journal, a pass that journals every pair, and the
+`replay()` reader over a date range.
+
+    python benchmarks/bench_signal_journal.py --candles 10000 --pairs 20
+
+`signals_for()` must return exactly the buy/sell columns the strategy
+computed; the script exits non-zero if it does not. Journals go to a
+temporary directory unless --directory is given. Needs the strategy's
+dependencies (freqtrade, TA-Lib) importable.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_strategies import PHASES, MarketData, StubDataProvider, load_strategy, own_method  # noqa: E402
+
+
+def backtest_pass(klass, data, pairs, directory=None):
+    config = {'runmode': 'backtest', 'strategy': klass.__name__, 'timeframe': klass.timeframe,
+              'stake_currency': 'USDT', 'dry_run': True}
+    if directory is not None:
+        config['signal_journal'] = {'directory': directory}
+    strategy = klass(config)
+    strategy.dp = StubDataProvider(data)
+    frames = {}
+    t0 = time.perf_counter()
+    for pair in pairs:
+        frame = data.frame(pair, strategy.timeframe)
+        strategy.dp.current_time = frame['date'].iat[-1].to_pydatetime()
+        for names in PHASES.values():
+            method = own_method(strategy, names)
+            if method is not None:
+                frame = method(frame, {'pair': pair})
+        frames[pair] = frame
+    return time.perf_counter() - t0, frames, getattr(strategy, 'signal_journal', None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--strategy', default='AdaptiveMarketSpecialist')
+    parser.add_argument('--candles', type=int, default=10000)
+    parser.add_argument('--pairs', type=int, default=20)
+    parser.add_argument('--directory', default=None, help='journal directory (default: a temporary one)')
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    klass = load_strategy(args.strategy)
+    data = MarketData(args.candles)
+    pairs = data.pairs(args.pairs)
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.directory or scratch
+        plain, _, _ = backtest_pass(klass, data, pairs)
+        journaled, computed, journal = backtest_pass(klass, data, pairs, directory)
+        if journal is None:
+            parser.error(f'{args.strategy} does not keep a signal journal')
+        mismatched = []
+        for pair in pairs:
+            frame = data.frame(pair, klass.timeframe)
+            stored = journal.signals_for(pair, frame, journal.segment(frame))
+            if stored is None or not all(np.array_equal(computed[pair][column].fillna(0).to_numpy(),
+                                                        stored[column].to_numpy())
+                                         for column in journal.signals):
+                mismatched.append(pair)
+        # post-trade analysis: the last quarter of every pair, straight from the files
+        frame = data.frame(pairs[0], klass.timeframe)
+        start = frame['date'].iat[len(frame) * 3 // 4]
+        t0 = time.perf_counter()
+        rows = 0
+        for pair in pairs:
+            segment = journal.segment(data.frame(pair, klass.timeframe))
+            rows += len(journal.replay(pair, start=start, segment=segment))
+        reader = time.perf_counter() - t0
+        size = sum(os.path.getsize(os.path.join(journal.directory, name)) for name in os.listdir(journal.directory))
+
+    result = {
+        'strategy': args.strategy,
+        'candles': args.candles,
+        'pairs': args.pairs,
+        'compute_s': plain,
+        'compute_and_journal_s': journaled,
+        'journal_overhead': journaled / plain - 1,
+        'reader_rows': rows,
+        'reader_ms': reader * 1e3,
+        'journal_kib': size / 1024,
+        'mismatched_pairs': mismatched,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+"""Offline cost of every strategy: populate_indicators, entry and exit
+population timed and memory-profiled separately, against synthetic or CSV
+OHLCV, with a stub DataProvider standing in for freqtrade's.
+
+    python benchmarks/bench_strategies.py --sizes 1000,10000 --pairs 1,50 \\
+        --output results.json
+    python benchmarks/bench_strategies.py --strategies BB_RPB_TSL_RNG --csv data/ \
+        --profile profiles/
+
+Times are summed over all pairs (plus the median per pair). Peak memory
+is per pair, from a separate tracemalloc pass over the first pair, since
+tracing slows the timed pass down. `--profile DIR` adds a third pass
+under `strategy_profiler` and writes a hot-column report and collapsed
+stacks per run. The JSON output carries the commit and
+library versions so runs can be compared over time. Needs the strategies'
+own dependencies (freqtrade, TA-Lib, pandas_ta, technical) importable.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+import zlib
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from strategy_profiler import StrategyProfiler  # noqa: E402
+from strategy_runtime import own_method  # noqa: E402,F401
+
+# class name -> file it lives in
+STRATEGIES = {
+    'AdaptiveMarketSpecialist': 'AdaptiveMarketSpecialist.py',
+    'AlphaXIchimoku': 'AlphaXIchimoku.py',
+    'AlphaXScalper': 'AlphaXScalper.py',
+    'AlphaXScalperV2': 'AlphaXScalperV2.py',
+    'IchiV1': 'IchiV1.py',
+    'ichiV1Final': 'ichiV1Final.py',
+    'HybridIchiV2': 'HyperIchiV2.py',
+    'ichi_allweather_15m': 'ichiV3.py',
+    'BB_RPB_TSL_RNG': 'BB_RPB_TSL_RNG',
+}
+PHASES = {
+    'indicators': ('populate_indicators',),
+    'entry': ('populate_entry_trend', 'populate_buy_trend'),
+    'exit': ('populate_exit_trend', 'populate_sell_trend'),
+}
+INFORMATIVE = 'BTC/USDT'
+
+
+def load_strategy(name):
+    path = os.path.join(ROOT, STRATEGIES[name])
+    with open(path) as f:
+        source = f.read()
+    # HyperIchiV2.py keeps its code inside a markdown fence
+    fenced = re.search(r'```python\n(.*?)```', source, re.S)
+    if fenced:
+        source = fenced.group(1)
+    module = types.ModuleType(os.path.splitext(os.path.basename(path))[0])
+    module.__file__ = path
+    exec(compile(source, path, 'exec'), module.__dict__)
+    return getattr(module, name)
+
+
+def synthetic_ohlcv(n, timeframe, seed, base=100.0):
+    rng = np.random.default_rng(seed)
+    close = base * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.002, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.002, n)))
+    freq = pd.Timedelta(timeframe.replace('m', 'min') if timeframe.endswith('m') else timeframe)
+    dates = pd.date_range(end='2024-06-01', periods=n, freq=freq, tz='UTC')
+    return pd.DataFrame({'date': dates, 'open': open_, 'high': high, 'low': low, 'close': close,
+                         'volume': rng.random(n) * 1000})
+
+
+class MarketData:
+    """OHLCV per (pair, timeframe): the CSV files in a directory, or synthetic.
+
+    CSV files are named after the pair (`ETH_USDT.csv`) and hold date, open,
+    high, low, close and volume; only their last `candles` rows are used.
+    When more pairs are asked for than there are files, files are reused.
+    """
+
+    def __init__(self, candles, csv_dir=None):
+        self.candles = candles
+        self.files = {}
+        if csv_dir:
+            for path in sorted(glob.glob(os.path.join(csv_dir, '*.csv'))):
+                self.files[os.path.splitext(os.path.basename(path))[0].replace('_', '/')] = path
+        self._informative = {}
+
+    def pairs(self, count):
+        tradable = [pair for pair in self.files if pair != INFORMATIVE]
+        if not tradable:
+            return [f'PAIR{i}/USDT' for i in range(count)]
+        return [tradable[i % len(tradable)] if i < len(tradable) else f'{tradable[i % len(tradable)]}#{i}'
+                for i in range(count)]
+
+    def frame(self, pair, timeframe):
+        path = self.files.get(pair.split('#')[0])
+        if path is None:
+            seed = zlib.crc32(pair.encode())
+            return synthetic_ohlcv(self.candles, timeframe, seed, 40000.0 if pair == INFORMATIVE else 100.0)
+        frame = pd.read_csv(path).tail(self.candles).reset_index(drop=True)
+        frame['date'] = pd.to_datetime(frame['date'], utc=True)
+        return frame
+
+    def informative(self, timeframe):
+        if timeframe not in self._informative:
+            self._informative[timeframe] = self.frame(INFORMATIVE, timeframe)
+        return self._informative[timeframe]
+
+
+class StubDataProvider:
+    """The parts of freqtrade's DataProvider the strategies call."""
+
+    def __init__(self, data):
+        self.data = data
+        self.analyzed = {}
+        self.current_time = None
+        self.messages = 0
+
+    def get_pair_dataframe(self, pair, timeframe=None):
+        if pair == INFORMATIVE:
+            return self.data.informative(timeframe)
+        return self.data.frame(pair, timeframe)
+
+    def get_analyzed_dataframe(self, pair, timeframe):
+        frame = self.analyzed.get(pair)
+        if frame is None:
+            return pd.DataFrame(), None
+        return frame, frame['date'].iat[-1]
+
+    def get_indicator(self, pair, name, timeframe=None):
+        frame = self.analyzed.get(pair)
+        if frame is None or name not in frame.columns:
+            return None
+        return pd.Series(frame[name].values, index=pd.DatetimeIndex(frame['date']), name=name)
+
+    def get_current_time(self):
+        return self.current_time
+
+    def send_msg(self, message, **kwargs):
+        self.messages += 1
+
+
+def make_strategy(name, data):
+    klass = load_strategy(name)
+    strategy = klass({'runmode': 'backtest', 'strategy': name, 'timeframe': klass.timeframe,
+                      'stake_currency': 'USDT', 'dry_run': True})
+    strategy.dp = StubDataProvider(data)
+    return strategy
+
+
+def run_pair(strategy, pair, raw, times=None, memory=None):
+    dp = strategy.dp
+    dp.current_time = raw['date'].iat[-1].to_pydatetime()
+    metadata = {'pair': pair}
+    frame = raw.copy()
+    for phase, names in PHASES.items():
+        method = own_method(strategy, names)
+        if method is None:
+            continue
+        if memory is not None:
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            frame = method(frame, metadata)
+            memory[phase] = (tracemalloc.get_traced_memory()[1] - start) / 1024
+        else:
+            t0 = time.perf_counter()
+            frame = method(frame, metadata)
+            times[phase].append(time.perf_counter() - t0)
+        if phase == 'indicators':
+            dp.analyzed[pair] = frame
+    # the next pair's analysis should not see this one's frame in memory
+    dp.analyzed.pop(pair, None)
+
+
+def profile(name, data, pairs, directory, stem):
+    strategy = make_strategy(name, data)
+    profiler = StrategyProfiler().attach(strategy)
+    try:
+        for pair in pairs:
+            run_pair(strategy, pair, data.frame(pair, strategy.timeframe), times={phase: [] for phase in PHASES})
+    finally:
+        profiler.detach()
+    os.makedirs(directory, exist_ok=True)
+    report = os.path.join(directory, f'{stem}.txt')
+    with open(report, 'w') as f:
+        f.write(profiler.report() + '\n')
+    profiler.write_collapsed(os.path.join(directory, f'{stem}.folded'))
+    return report
+
+
+def bench(name, candles, pair_count, csv_dir, measure_memory, profile_dir=None):
+    data = MarketData(candles, csv_dir)
+    strategy = make_strategy(name, data)
+    pairs = data.pairs(pair_count)
+    times = {phase: [] for phase in PHASES}
+    first = None
+    for pair in pairs:
+        raw = data.frame(pair, strategy.timeframe)
+        if first is None:
+            first = (pair, raw)
+        run_pair(strategy, pair, raw, times=times)
+    row = {'strategy': name, 'timeframe': strategy.timeframe, 'candles': len(first[1]), 'pairs': pair_count}
+    for phase, samples in times.items():
+        row[phase] = {'total_s': float(np.sum(samples)), 'per_pair_ms': float(np.median(samples)) * 1e3} \
+            if samples else None
+    if measure_memory:
+        memory = {}
+        tracemalloc.start()
+        try:
+            run_pair(make_strategy(name, data), *first, memory=memory)
+        finally:
+            tracemalloc.stop()
+        for phase in PHASES:
+            if row[phase] is not None:
+                row[phase]['peak_kib'] = memory[phase]
+    if profile_dir:
+        row['profile'] = profile(name, data, pairs, profile_dir, f'{name}-{candles}x{pair_count}')
+    return row
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', '-C', ROOT, 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--strategies', default=','.join(STRATEGIES))
+    parser.add_argument('--sizes', default='1000,10000,100000', help='candles per pair')
+    parser.add_argument('--pairs', default='1,50,500')
+    parser.add_argument('--csv', default=None, help='directory of <BASE>_<QUOTE>.csv OHLCV files')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--profile', default=None, metavar='DIR',
+                        help='write per-column profiles and collapsed stacks here')
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    results = []
+    for name in args.strategies.split(','):
+        if name not in STRATEGIES:
+            parser.error(f'unknown strategy {name}; choose from {", ".join(STRATEGIES)}')
+        for candles in [int(s) for s in args.sizes.split(',')]:
+            for pair_count in [int(s) for s in args.pairs.split(',')]:
+                try:
+                    row = bench(name, candles, pair_count, args.csv, not args.no_memory, args.profile)
+                except Exception as e:
+                    # one broken strategy should not lose the others' numbers
+                    row = {'strategy': name, 'candles': candles, 'pairs': pair_count,
+                           'error': f'{type(e).__name__}: {e}'}
+                results.append(row)
+                print(json.dumps(row))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
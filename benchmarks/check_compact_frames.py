@@ -0,0 +1,108 @@
+"""Check that `compact_frames` leaves a strategy's signals unchanged, and
+measure what it saves.
+
+    python benchmarks/check_compact_frames.py --csv data/ --candles 20000
+    python benchmarks/check_compact_frames.py --strategies BB_RPB_TSL_RNG --pairs 300
+
+Every pair is analysed twice, with float64 frames and with compaction.
+Entry/exit flags and tags must match row for row; the script exits
+non-zero if any differ and lists the columns, so they can go in the
+strategy's `compact_exclude`. It also reports the largest relative error
+of each narrowed indicator column, the analyzed frames' resident size
+summed over all pairs, and the entry+exit stage time. Run it against real
+history (--csv) before enabling compaction for a strategy: synthetic data
+only shows the mechanics. Needs the strategies' dependencies importable.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_strategies import PHASES, MarketData, StubDataProvider, load_strategy, own_method  # noqa: E402
+from compact_frame import indicator_error, signal_differences  # noqa: E402
+
+DEFAULT = ('AdaptiveMarketSpecialist', 'HybridIchiV2', 'ichi_allweather_15m', 'BB_RPB_TSL_RNG')
+
+
+def analyze(klass, data, pairs, compact):
+    config = {'runmode': 'backtest', 'strategy': klass.__name__, 'timeframe': klass.timeframe,
+              'stake_currency': 'USDT', 'dry_run': True, 'compact_frames': compact}
+    strategy = klass(config)
+    strategy.dp = StubDataProvider(data)
+    frames = {}
+    signal_seconds = 0.0
+    for pair in pairs:
+        frame = data.frame(pair, strategy.timeframe)
+        strategy.dp.current_time = frame['date'].iat[-1].to_pydatetime()
+        for phase, names in PHASES.items():
+            method = own_method(strategy, names)
+            if method is None:
+                continue
+            t0 = time.perf_counter()
+            frame = method(frame, {'pair': pair})
+            if phase != 'indicators':
+                signal_seconds += time.perf_counter() - t0
+            else:
+                strategy.dp.analyzed[pair] = frame
+        frames[pair] = frame
+    return frames, signal_seconds
+
+
+def check(name, data, pairs):
+    klass = load_strategy(name)
+    reference, reference_s = analyze(klass, data, pairs, False)
+    compacted, compacted_s = analyze(klass, data, pairs, True)
+    differences = {}
+    errors = {}
+    for pair in pairs:
+        for column, count in signal_differences(reference[pair], compacted[pair]).items():
+            differences[column] = differences.get(column, 0) + count
+        for column, error in indicator_error(reference[pair], compacted[pair]).items():
+            errors[column] = max(errors.get(column, 0.0), error)
+    reference_kib = sum(frame.memory_usage(deep=True).sum() for frame in reference.values()) / 1024
+    compacted_kib = sum(frame.memory_usage(deep=True).sum() for frame in compacted.values()) / 1024
+    return {
+        'strategy': name,
+        'pairs': len(pairs),
+        'candles': len(next(iter(reference.values()))),
+        'signal_differences': differences,
+        'worst_indicator_error': dict(sorted(errors.items(), key=lambda item: item[1], reverse=True)[:5]),
+        'float64_kib': reference_kib,
+        'compact_kib': compacted_kib,
+        'memory_ratio': compacted_kib / reference_kib,
+        'float64_signal_s': reference_s,
+        'compact_signal_s': compacted_s,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--strategies', default=','.join(DEFAULT))
+    parser.add_argument('--candles', type=int, default=5000)
+    parser.add_argument('--pairs', type=int, default=20)
+    parser.add_argument('--csv', default=None, help='directory of <BASE>_<QUOTE>.csv OHLCV files')
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    data = MarketData(args.candles, args.csv)
+    pairs = data.pairs(args.pairs)
+    results = []
+    for name in args.strategies.split(','):
+        try:
+            row = check(name, data, pairs)
+        except Exception as e:
+            row = {'strategy': name, 'error': f'{type(e).__name__}: {e}'}
+        results.append(row)
+        print(json.dumps(row))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if any(row.get('signal_differences') or 'error' in row for row in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
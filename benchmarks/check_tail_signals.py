@@ -0,0 +1,122 @@
+"""Check that tail-only live signals match full-frame ones, and measure the
+per-pair entry/exit latency of both against the history length.
+
+    python benchmarks/check_tail_signals.py --candles 20000 --cuts 200
+    python benchmarks/check_tail_signals.py --strategies AdaptiveMarketSpecialist --rows 3
+
+Indicators are computed once per strategy. The frame is then cut at
+`--cuts` points near its end, and each cut runs the entry/exit methods
+twice: as a backtest (whole frame) and as a dry-run bot with
+`"tail_signals"`. The last `--rows` rows of every signal and tag column
+must agree. The script exits non-zero and lists the columns if any
+differ. The timing part runs both modes on the last `--lengths` candles of
+the same frame, so the tail latency should stay flat while the full-frame
+latency grows. Needs the strategies' dependencies importable.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_strategies import PHASES, MarketData, StubDataProvider, load_strategy, own_method  # noqa: E402
+from compact_frame import signal_differences  # noqa: E402
+
+DEFAULT = ('AdaptiveMarketSpecialist', 'HybridIchiV2', 'AlphaXIchimoku', 'AlphaXScalper', 'AlphaXScalperV2',
+           'IchiV1', 'ichiV1Final', 'ichi_allweather_15m', 'BB_RPB_TSL_RNG')
+PAIR = 'PAIR0/USDT'
+
+
+def make(klass, data, runmode, rows):
+    strategy = klass({'runmode': runmode, 'strategy': klass.__name__, 'timeframe': klass.timeframe,
+                      'stake_currency': 'USDT', 'dry_run': True, 'tail_signals': {'rows': rows}})
+    strategy.dp = StubDataProvider(data)
+    return strategy
+
+
+def signals(strategy, frame):
+    frame = frame.copy(deep=False)
+    for phase in ('entry', 'exit'):
+        method = own_method(strategy, PHASES[phase])
+        if method is not None:
+            frame = method(frame, {'pair': PAIR})
+    return frame
+
+
+def best_of(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def check(name, data, cuts, rows, lengths, repeat):
+    klass = load_strategy(name)
+    full = make(klass, data, 'backtest', rows)
+    tail = make(klass, data, 'dry_run', rows)
+    frame = data.frame(PAIR, klass.timeframe)
+    full.dp.current_time = tail.dp.current_time = frame['date'].iat[-1].to_pydatetime()
+    frame = own_method(full, PHASES['indicators'])(frame, {'pair': PAIR})
+    # the regime the dry-run instance would have set in its own populate_indicators
+    tail.market_regime = getattr(full, 'market_regime', None)
+
+    differences = {}
+    for cut in np.linspace(len(frame) // 2, len(frame), cuts, dtype=int):
+        reference = signals(full, frame.iloc[:cut]).iloc[-rows:]
+        candidate = signals(tail, frame.iloc[:cut]).iloc[-rows:]
+        for column, count in signal_differences(reference, candidate).items():
+            differences[column] = differences.get(column, 0) + count
+
+    latency = {}
+    for length in lengths:
+        window = frame.iloc[-length:].reset_index(drop=True)
+        latency[length] = {
+            'full_ms': best_of(lambda: signals(full, window), repeat) * 1e3,
+            'tail_ms': best_of(lambda: signals(tail, window), repeat) * 1e3,
+        }
+    return {
+        'strategy': name,
+        'rows': rows,
+        'cuts': cuts,
+        'signal_differences': differences,
+        'latency': latency,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--strategies', default=','.join(DEFAULT))
+    parser.add_argument('--candles', type=int, default=20000)
+    parser.add_argument('--cuts', type=int, default=100)
+    parser.add_argument('--rows', type=int, default=1)
+    parser.add_argument('--lengths', default='500,5000,20000')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--csv', default=None, help='directory of <BASE>_<QUOTE>.csv OHLCV files')
+    parser.add_argument('--output', default=None, help='write JSON results here')
+    args = parser.parse_args()
+
+    data = MarketData(args.candles, args.csv)
+    lengths = [min(int(length), args.candles) for length in args.lengths.split(',')]
+    results = []
+    for name in args.strategies.split(','):
+        try:
+            row = check(name, data, args.cuts, args.rows, lengths, args.repeat)
+        except Exception as e:
+            row = {'strategy': name, 'error': f'{type(e).__name__}: {e}'}
+        results.append(row)
+        print(json.dumps(row))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if any(row.get('signal_differences') or 'error' in row for row in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Local stand-in for the CoinGecko `market_chart` API.
+
+Run it standalone and point the service at it:
+
+    python benchmarks/coingecko_stub.py --port 8001
+    COINGECKO_API_URL=http://127.0.0.1:8001/api/v3 gunicorn app:app
+
+or start it in-process with `StubServer().start()`.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _step_seconds(days):
+    days = float(days)
+    if days <= 1:
+        return 5 * 60
+    if days <= 90:
+        return 60 * 60
+    return 24 * 60 * 60
+
+
+def price_at(symbol, ts):
+    """Deterministic price for `symbol` at unix time `ts`, so overlapping
+    `market_chart` and `market_chart/range` responses agree."""
+    rng = random.Random(symbol)
+    base = 100.0 + rng.random() * 1000.0
+    phase = rng.random() * 2 * math.pi
+    days = ts / 86400.0
+    noise = random.Random(f'{symbol}:{int(ts)}').gauss(0.0, 0.002)
+    return base * (1 + 0.1 * math.sin(2 * math.pi * days / 7 + phase)
+                   + 0.02 * math.sin(2 * math.pi * days * 3 + phase) + noise)
+
+
+def make_series(symbol, days, now=None, points=None):
+    """`prices` for the last `days` ending at `now`, at CoinGecko granularity."""
+    step = _step_seconds(days)
+    now = int(now if now is not None else time.time())
+    end = now - now % step
+    n = points if points is not None else int(float(days) * 86400 // step)
+    return [[(end - (n - 1 - i) * step) * 1000, price_at(symbol, end - (n - 1 - i) * step)]
+            for i in range(n)]
+
+
+def make_range(symbol, start, end):
+    """`prices` between unix times `start` and `end` (inclusive)."""
+    step = _step_seconds((end - start) / 86400.0)
+    first = int(start) + (-int(start)) % step
+    return [[ts * 1000, price_at(symbol, ts)] for ts in range(first, int(end) + 1, step)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        if url.path == '/__stats':
+            return self._send_json(200, server.stats())
+
+        parts = url.path.strip('/').split('/')
+        # /api/v3/coins/<symbol>/market_chart[/range]
+        if (len(parts) not in (5, 6) or parts[:3] != ['api', 'v3', 'coins']
+                or parts[4] != 'market_chart' or parts[5:] not in ([], ['range'])):
+            return self._send_json(404, {'error': 'not found'})
+
+        symbol = parts[3]
+        query = parse_qs(url.query)
+        with server.lock:
+            server.calls += 1
+            server.calls_by_symbol[symbol] = server.calls_by_symbol.get(symbol, 0) + 1
+        if server.latency:
+            time.sleep(server.latency)
+        if parts[5:] == ['range']:
+            prices = make_range(symbol, float(query['from'][0]), float(query['to'][0]))
+        else:
+            prices = make_series(symbol, query.get('days', ['30'])[0], points=server.points)
+        self._send_json(200, {'prices': prices})
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, points=None):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.points = points
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.calls_by_symbol = {}
+        self._thread = None
+
+    @property
+    def api_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/api/v3'
+
+    def stats(self):
+        with self.lock:
+            return {'calls': self.calls, 'calls_by_symbol': dict(self.calls_by_symbol)}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to sleep per request')
+    parser.add_argument('--points', type=int, default=None, help='override number of points per series')
+    args = parser.parse_args()
+    server = StubServer(args.host, args.port, latency=args.latency, points=args.points)
+    print(f'CoinGecko stub listening on {server.api_url}')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
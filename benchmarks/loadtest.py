@@ -0,0 +1,210 @@
+"""Load-test `app:app` under gunicorn against the local CoinGecko stub.
+
+    python benchmarks/loadtest.py --workers 4 --threads 2 --concurrency 32 \\
+        --duration 20 --latency 0.1 --points 720 --output results.json
+
+Starts the stub and gunicorn as subprocesses, drives the service with
+keep-alive HTTP clients and reports requests/sec, latency percentiles and
+how many calls reached the upstream. Results are JSON so runs can be
+compared across changes.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import Counter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, proc, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'{proc.args[0]} exited with {proc.returncode}')
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'{url} did not come up within {timeout}s')
+
+
+def stub_calls(port):
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/__stats') as r:
+        return json.load(r)['calls']
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def drive(port, path, concurrency, duration, requests_limit):
+    latencies = []
+    statuses = Counter()
+    errors = Counter()
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+    remaining = [requests_limit]
+
+    def take():
+        if requests_limit is None:
+            return time.monotonic() < stop_at
+        with lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local, local_status, local_errors = [], Counter(), Counter()
+        while take():
+            t0 = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                local.append(time.perf_counter() - t0)
+                local_status[response.status] += 1
+            except (OSError, http.client.HTTPException) as e:
+                local_errors[type(e).__name__] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            statuses.update(local_status)
+            errors.update(local_errors)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0, sorted(latencies), statuses, errors
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--worker-class', default=None, help='gunicorn worker class (default: sync/gthread)')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent client connections')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--requests', type=int, default=None, help='stop after this many requests instead')
+    parser.add_argument('--warmup', type=float, default=1.0, help='seconds of load discarded before measuring')
+    parser.add_argument('--path', default='/', help='request path, e.g. /analyze?symbols=bitcoin,ethereum')
+    parser.add_argument('--latency', type=float, default=0.05, help='stub upstream latency in seconds')
+    parser.add_argument('--points', type=int, default=None, help='points per market_chart payload')
+    parser.add_argument('--env', action='append', default=[], help='extra KEY=VALUE for the service')
+    parser.add_argument('--output', default=None, help='write JSON results here (default: stdout)')
+    args = parser.parse_args()
+
+    stub_port, app_port = free_port(), free_port()
+    store_dir = tempfile.mkdtemp(prefix='loadtest-store-')
+    procs = []
+    try:
+        stub_cmd = [sys.executable, os.path.join(HERE, 'coingecko_stub.py'),
+                    '--port', str(stub_port), '--latency', str(args.latency)]
+        if args.points is not None:
+            stub_cmd += ['--points', str(args.points)]
+        stub = subprocess.Popen(stub_cmd, stdout=subprocess.DEVNULL)
+        procs.append(stub)
+        wait_for(f'http://127.0.0.1:{stub_port}/__stats', stub)
+
+        env = dict(os.environ,
+                   COINGECKO_API_URL=f'http://127.0.0.1:{stub_port}/api/v3',
+                   PRICE_STORE_DIR=store_dir)
+        env.update(item.split('=', 1) for item in args.env)
+        gunicorn_cmd = [sys.executable, '-m', 'gunicorn', 'app:app',
+                        '--bind', f'127.0.0.1:{app_port}',
+                        '--workers', str(args.workers), '--threads', str(args.threads),
+                        '--log-level', 'warning']
+        if args.worker_class:
+            gunicorn_cmd += ['--worker-class', args.worker_class]
+        app = subprocess.Popen(gunicorn_cmd, cwd=ROOT, env=env)
+        procs.append(app)
+        wait_for(f'http://127.0.0.1:{app_port}/metrics', app)
+
+        if args.warmup:
+            drive(app_port, args.path, args.concurrency, args.warmup, None)
+        calls_before = stub_calls(stub_port)
+        elapsed, latencies, statuses, errors = drive(
+            app_port, args.path, args.concurrency, args.duration, args.requests)
+        upstream_calls = stub_calls(stub_port) - calls_before
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+        for proc in reversed(procs):
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+    result = {
+        'config': {
+            'workers': args.workers,
+            'threads': args.threads,
+            'worker_class': args.worker_class,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'requests': args.requests,
+            'path': args.path,
+            'upstream_latency': args.latency,
+            'points': args.points,
+            'env': args.env,
+        },
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'finished_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'elapsed_s': elapsed,
+        'requests': len(latencies),
+        'requests_per_s': len(latencies) / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'p50': (percentile(latencies, 0.50) or 0) * 1000,
+            'p95': (percentile(latencies, 0.95) or 0) * 1000,
+            'p99': (percentile(latencies, 0.99) or 0) * 1000,
+            'max': (latencies[-1] if latencies else 0) * 1000,
+        },
+        'status_codes': {str(k): v for k, v in sorted(statuses.items())},
+        'client_errors': dict(errors),
+        'upstream_calls': upstream_calls,
+    }
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Opt-in compact dtypes for strategy indicator frames.
+
+A live bot keeps every pair's analyzed dataframe in memory, and nearly all
+of it is float64 indicator columns. `compact` stores those as float32, 0/1
+columns (`bb_bottom_cross`, `bullish`, the buy/sell flags) as uint8 and
+other small integer codes as the narrowest integer type. OHLCV stays
+float64 so order prices and the trade maths see the exchange's values.
+
+float32 keeps about seven significant digits, so a comparison that sits
+within rounding distance of its threshold can flip. That is why this is
+opt-in, per strategy: `benchmarks/check_compact_frames.py` replays
+historical data through a strategy with and without compaction and fails
+if any entry/exit signal differs. Columns that must stay float64 go in the
+strategy's `compact_exclude` or the config's `exclude` list.
+"""
+import numpy as np
+
+KEEP = ('date', 'open', 'high', 'low', 'close', 'volume')
+SIGNALS = ('buy', 'sell', 'enter_long', 'exit_long', 'enter_short', 'exit_short')
+
+
+def _is_flag(values):
+    values = values[~np.isnan(values)] if values.dtype.kind == 'f' else values
+    return bool(np.isin(values, (0, 1)).all())
+
+
+def narrow_dtype(values):
+    """The dtype `compact` stores an indicator column's `values` as, or None."""
+    dtype = values.dtype
+    if dtype == np.float64:
+        return np.float32
+    if dtype.kind in 'iu' and dtype.itemsize > 1:
+        if _is_flag(values):
+            return np.uint8
+        if len(values):
+            low, high = values.min(), values.max()
+            for candidate in (np.int8, np.int16, np.int32):
+                info = np.iinfo(candidate)
+                if info.min <= low and high <= info.max:
+                    return candidate if np.dtype(candidate).itemsize < dtype.itemsize else None
+        return None
+    if dtype == object and len(values) and all(isinstance(value, (bool, np.bool_)) for value in values):
+        return bool
+    return None
+
+
+def compact(dataframe, exclude=()):
+    """`dataframe` with indicator columns narrowed; untouched columns are shared."""
+    dtypes = {}
+    flags = []
+    for column, dtype in dataframe.dtypes.items():
+        if column in KEEP or column in exclude or not isinstance(dtype, np.dtype):
+            continue
+        if dtype.kind == 'f' and column in SIGNALS:
+            if _is_flag(dataframe[column].to_numpy()):
+                flags.append(column)
+        elif dtype == np.float64 or (dtype.kind in 'iu' and dtype.itemsize > 1) or dtype == object:
+            narrowed = narrow_dtype(dataframe[column].to_numpy())
+            if narrowed is not None:
+                dtypes[column] = narrowed
+    if not dtypes and not flags:
+        return dataframe
+    if len(dtypes) * 4 > len(dataframe.columns):
+        dataframe = dataframe.astype(dtypes)
+    else:
+        # astype with a dict rebuilds every column; a frame that is mostly
+        # compact already (the incremental engine's) only needs these
+        dataframe = dataframe.copy(deep=False)
+        for column, dtype in dtypes.items():
+            dataframe[column] = dataframe[column].astype(dtype)
+    for column in flags:
+        # NaN means "no signal", the same as 0
+        dataframe[column] = dataframe[column].fillna(0).astype(np.uint8)
+    return dataframe
+
+
+def compact_exclude(strategy):
+    """The columns to keep at full width, or None if compaction is off.
+
+    `"compact_frames": true` compacts everything but the strategy's
+    `compact_exclude`; a dict may add an `exclude` list of its own.
+    """
+    options = (getattr(strategy, 'config', None) or {}).get('compact_frames')
+    if not options:
+        return None
+    exclude = tuple(getattr(strategy, 'compact_exclude', ()))
+    if isinstance(options, dict):
+        exclude += tuple(options.get('exclude', ()))
+    return exclude
+
+
+def compact_from_config(strategy, dataframe):
+    """`compact(dataframe)` if the config has `"compact_frames"`; else `dataframe`."""
+    exclude = compact_exclude(strategy)
+    if exclude is None:
+        return dataframe
+    return compact(dataframe, exclude)
+
+
+def signal_differences(reference, compacted, columns=None):
+    """`{column: rows that differ}` between two analyzed frames' signal columns.
+
+    NaN and 0 count as the same "no signal"; tag columns compare as strings.
+    """
+    if columns is None:
+        columns = [column for column in reference.columns
+                   if column in SIGNALS or column.endswith('_tag')]
+    out = {}
+    for column in columns:
+        if column not in reference.columns and column not in compacted.columns:
+            continue
+        if column not in reference.columns or column not in compacted.columns:
+            out[column] = len(reference)
+            continue
+        left, right = reference[column], compacted[column]
+        if left.dtype.kind in 'fiub' and right.dtype.kind in 'fiub':
+            differ = left.fillna(0).to_numpy(dtype=np.float64) != right.fillna(0).to_numpy(dtype=np.float64)
+        else:
+            differ = left.fillna('').astype(str).to_numpy() != right.fillna('').astype(str).to_numpy()
+        count = int(differ.sum())
+        if count:
+            out[column] = count
+    return out
+
+
+def indicator_error(reference, compacted):
+    """`{column: max relative error}` of the float columns compaction narrowed."""
+    out = {}
+    for column in compacted.columns:
+        if column in reference.columns and compacted[column].dtype == np.float32 \
+                and reference[column].dtype == np.float64:
+            want = reference[column].to_numpy()
+            got = compacted[column].to_numpy(dtype=np.float64)
+            finite = np.isfinite(want) & np.isfinite(got)
+            scale = np.maximum(np.abs(want[finite]), np.finfo(np.float32).tiny)
+            out[column] = float(np.max(np.abs(got[finite] - want[finite]) / scale)) if finite.any() else 0.0
+    return out
@@ -0,0 +1,520 @@
+"""Entry/exit conditions as expression trees, evaluated in fused chunks.
+
+Written with pandas, every comparison and every `&` in a condition list
+allocates a full-length temporary, and `reduce(lambda x, y: x & y, ...)`
+adds one more per combine. Here a strategy writes the same logic against
+`col('close')`, `col('ema_8')`, ... and gets a tree instead:
+
+    is_ewo = all_of(col('rsi_fast') < 35, col('close') < col('ema_8') * 0.94, col('EWO') > -5.5)
+    dataframe.loc[evaluate(is_ewo, dataframe), 'buy'] = 1
+
+`evaluate` compiles the tree once into nested closures over the frame's
+NumPy arrays and runs it over the rows in cache-sized chunks. Within a
+chunk `all_of` stops at the first child that is false on every row (and
+`any_of` at the first that is true everywhere), so the expensive tail of a
+selective condition is rarely computed at all. Temporaries are chunk-sized
+and die in cache. Semantics follow pandas: NaN compares false, `shift`
+fills with NaN, and `crossed_above`/`crossed_below` match qtpylib's.
+
+Operands may be column names (via `col`), numbers, rolling windows
+(`col('volume').rolling(20).mean()`), the frame's index (`index()`), or
+full-length arrays and Series for anything else.
+
+A live bot only acts on the last closed candle. `evaluate(..., tail=n)`
+computes the last `n` rows and leaves the rest false. Every node knows its
+`lookback`, the rows before a result that its shifts and rolling windows
+read, so only the last `n + lookback` rows of the frame are touched and
+the cost does not grow with the history length. Backtests keep
+evaluating the whole frame. `tail_from_config` picks the mode and
+`tail_differences` checks a tail result against the full-frame one.
+"""
+import operator
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from strategy_runtime import LIVE_RUNMODES, runmode
+
+# rows per chunk: a few float64 columns of this length fit in L2
+CHUNK = 4096
+
+_COMPARE = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+            '==': operator.eq, '!=': operator.ne}
+_ARITH = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv}
+_ROLLING = {'mean': np.mean, 'sum': np.sum, 'min': np.min, 'max': np.max,
+            'std': lambda values, axis: np.std(values, axis=axis, ddof=1)}
+
+
+class Expr:
+    """A value per row: a column, a constant, or arithmetic on them."""
+
+    def __add__(self, other):
+        return Arith('+', self, other)
+
+    def __radd__(self, other):
+        return Arith('+', other, self)
+
+    def __sub__(self, other):
+        return Arith('-', self, other)
+
+    def __rsub__(self, other):
+        return Arith('-', other, self)
+
+    def __mul__(self, other):
+        return Arith('*', self, other)
+
+    def __rmul__(self, other):
+        return Arith('*', other, self)
+
+    def __truediv__(self, other):
+        return Arith('/', self, other)
+
+    def __rtruediv__(self, other):
+        return Arith('/', other, self)
+
+    def __lt__(self, other):
+        return Compare('<', self, other)
+
+    def __le__(self, other):
+        return Compare('<=', self, other)
+
+    def __gt__(self, other):
+        return Compare('>', self, other)
+
+    def __ge__(self, other):
+        return Compare('>=', self, other)
+
+    def __eq__(self, other):
+        return Compare('==', self, other)
+
+    def __ne__(self, other):
+        return Compare('!=', self, other)
+
+    __hash__ = object.__hash__
+
+    def shift(self, periods=1):
+        return Shift(self, periods)
+
+    def rolling(self, window):
+        return _RollingWindow(self, window)
+
+
+class _RollingWindow:
+    """`expr.rolling(n)`, waiting for its aggregate like pandas' Rolling."""
+
+    def __init__(self, child, window):
+        self.child = child
+        self.window = window
+
+    def mean(self):
+        return Rolling(self.child, self.window, 'mean')
+
+    def sum(self):
+        return Rolling(self.child, self.window, 'sum')
+
+    def min(self):
+        return Rolling(self.child, self.window, 'min')
+
+    def max(self):
+        return Rolling(self.child, self.window, 'max')
+
+    def std(self):
+        return Rolling(self.child, self.window, 'std')
+
+
+class Condition:
+    """A boolean per row."""
+
+    def __and__(self, other):
+        return all_of(self, other)
+
+    def __rand__(self, other):
+        return all_of(other, self)
+
+    def __or__(self, other):
+        return any_of(self, other)
+
+    def __ror__(self, other):
+        return any_of(other, self)
+
+    def __invert__(self):
+        return Not(self)
+
+    def shift(self, periods=1):
+        return ShiftedCondition(self, periods)
+
+
+def _expr(value):
+    if isinstance(value, (Expr, Condition)):
+        return value
+    if isinstance(value, (pd.Series, np.ndarray)):
+        return Array(value)
+    return Const(value)
+
+
+def _condition(value):
+    value = _expr(value)
+    return value if isinstance(value, Condition) else Truthy(value)
+
+
+class _Compiler:
+    """Resolves column names to the frame's arrays, once per evaluation.
+
+    `dataframe` may be the trailing slice of a longer frame starting at row
+    `offset`; full-length array operands are cut to match.
+    """
+
+    def __init__(self, dataframe, tail=None, offset=0):
+        self.dataframe = dataframe
+        self.length = len(dataframe)
+        self.tail = tail
+        self.offset = offset
+        self._arrays = {}
+
+    def array(self, name):
+        array = self._arrays.get(name)
+        if array is None:
+            array = self._arrays[name] = self.dataframe[name].to_numpy()
+        return array
+
+
+def _window(array, start, stop):
+    """`array[start:stop]`, NaN-padded where the range runs off either end."""
+    if start >= 0 and stop <= len(array):
+        return array[start:stop]
+    out = np.full(stop - start, np.nan, dtype=array.dtype if array.dtype.kind in 'fcO' else np.float64)
+    lo, hi = max(start, 0), min(stop, len(array))
+    if lo < hi:
+        out[lo - start:hi - start] = array[lo:hi]
+    return out
+
+
+class Col(Expr):
+    lookback = 0
+
+    def __init__(self, name):
+        self.name = name
+
+    def compile(self, compiler):
+        array = compiler.array(self.name)
+        return lambda start, stop: _window(array, start, stop)
+
+    def __repr__(self):
+        return f'col({self.name!r})'
+
+
+class Array(Expr):
+    lookback = 0
+
+    def __init__(self, values):
+        self.values = values
+
+    def compile(self, compiler):
+        array = self.values.to_numpy() if isinstance(self.values, pd.Series) else np.asarray(self.values)
+        if len(array) != compiler.offset + compiler.length:
+            raise ValueError(f'array operand has {len(array)} rows, the frame {compiler.offset + compiler.length}')
+        array = array[compiler.offset:]
+        return lambda start, stop: _window(array, start, stop)
+
+
+class Index(Expr):
+    lookback = 0
+
+    def compile(self, compiler):
+        index = compiler.dataframe.index
+        if isinstance(index, pd.RangeIndex):
+            first, step, length = index.start, index.step, compiler.length
+
+            def positions(start, stop):
+                rows = np.arange(start, stop)
+                out = first + step * rows.astype(np.float64)
+                out[(rows < 0) | (rows >= length)] = np.nan
+                return out
+            return positions
+        array = index.to_numpy()
+        return lambda start, stop: _window(array, start, stop)
+
+    def __repr__(self):
+        return 'index()'
+
+
+class Const(Expr):
+    lookback = 0
+
+    def __init__(self, value):
+        self.value = value
+
+    def compile(self, compiler):
+        value = self.value
+        return lambda start, stop: value
+
+    def __repr__(self):
+        return repr(self.value)
+
+
+class Arith(Expr):
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = _expr(left)
+        self.right = _expr(right)
+        self.lookback = max(self.left.lookback, self.right.lookback)
+
+    def compile(self, compiler):
+        function = _ARITH[self.op]
+        left = self.left.compile(compiler)
+        right = self.right.compile(compiler)
+        return lambda start, stop: function(left(start, stop), right(start, stop))
+
+    def __repr__(self):
+        return f'({self.left!r} {self.op} {self.right!r})'
+
+
+class Shift(Expr):
+    def __init__(self, child, periods):
+        self.child = _expr(child)
+        self.periods = periods
+        self.lookback = self.child.lookback + max(periods, 0)
+
+    def compile(self, compiler):
+        child = self.child.compile(compiler)
+        periods = self.periods
+        # columns pad with NaN past either end, so this is pandas' shift
+        return lambda start, stop: child(start - periods, stop - periods)
+
+    def __repr__(self):
+        return f'{self.child!r}.shift({self.periods})'
+
+
+class Rolling(Expr):
+    """pandas' `rolling(window).<how>()` with the default min_periods."""
+
+    def __init__(self, child, window, how):
+        self.child = _expr(child)
+        self.window = window
+        self.how = how
+        self.lookback = self.child.lookback + window - 1
+
+    def compile(self, compiler):
+        child = self.child.compile(compiler)
+        window = self.window
+        if compiler.tail is None:
+            # whole frame: let pandas do it, so backtests match it exactly
+            values = pd.Series(np.asarray(child(0, compiler.length), dtype=np.float64))
+            full = getattr(values.rolling(window), self.how)().to_numpy()
+            return lambda start, stop: _window(full, start, stop)
+        function = _ROLLING[self.how]
+
+        def rolling(start, stop):
+            # NaN padding before the first row gives pandas' leading NaNs
+            values = np.asarray(child(start - window + 1, stop), dtype=np.float64)
+            return function(sliding_window_view(values, window), axis=1)
+        return rolling
+
+    def __repr__(self):
+        return f'{self.child!r}.rolling({self.window}).{self.how}()'
+
+
+class Compare(Condition):
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = _expr(left)
+        self.right = _expr(right)
+        self.lookback = max(self.left.lookback, self.right.lookback)
+
+    def compile(self, compiler):
+        function = _COMPARE[self.op]
+        left = self.left.compile(compiler)
+        right = self.right.compile(compiler)
+        return lambda start, stop: np.asarray(function(left(start, stop), right(start, stop)))
+
+    def __repr__(self):
+        return f'({self.left!r} {self.op} {self.right!r})'
+
+
+class Truthy(Condition):
+    """An expression used as a condition: non-zero and not NaN."""
+
+    def __init__(self, child):
+        self.child = child
+        self.lookback = child.lookback
+
+    def compile(self, compiler):
+        child = self.child.compile(compiler)
+
+        def truthy(start, stop):
+            values = np.asarray(child(start, stop))
+            if values.dtype == bool:
+                return values
+            return (values == values) & (values != 0)
+        return truthy
+
+
+class _Combine(Condition):
+    def __init__(self, children):
+        self.children = children
+        self.lookback = max(child.lookback for child in children)
+
+    def __repr__(self):
+        return f'{type(self).__name__.lower()}({", ".join(map(repr, self.children))})'
+
+
+class All(_Combine):
+    def compile(self, compiler):
+        children = [child.compile(compiler) for child in self.children]
+
+        def run(start, stop):
+            out = np.array(children[0](start, stop), dtype=bool)
+            for child in children[1:]:
+                if not out.any():
+                    break
+                out &= child(start, stop)
+            return out
+        return run
+
+
+class Any(_Combine):
+    def compile(self, compiler):
+        children = [child.compile(compiler) for child in self.children]
+
+        def run(start, stop):
+            out = np.array(children[0](start, stop), dtype=bool)
+            for child in children[1:]:
+                if out.all():
+                    break
+                out |= child(start, stop)
+            return out
+        return run
+
+
+class Not(Condition):
+    def __init__(self, child):
+        self.child = child
+        self.lookback = child.lookback
+
+    def compile(self, compiler):
+        child = self.child.compile(compiler)
+        return lambda start, stop: ~np.asarray(child(start, stop), dtype=bool)
+
+
+class ShiftedCondition(Condition):
+    """A condition on an earlier row; false where that row does not exist."""
+
+    def __init__(self, child, periods):
+        self.child = child
+        self.periods = periods
+        self.lookback = child.lookback + max(periods, 0)
+
+    def compile(self, compiler):
+        child = self.child.compile(compiler)
+        periods = self.periods
+        length = compiler.length
+
+        def shifted(start, stop):
+            lo, hi = start - periods, stop - periods
+            out = np.zeros(stop - start, dtype=bool)
+            a, b = max(lo, 0), min(hi, length)
+            if a < b:
+                out[a - lo:b - lo] = child(a, b)
+            return out
+        return shifted
+
+
+def _flatten(kind, conditions):
+    out = []
+    for condition in conditions:
+        condition = _condition(condition)
+        out.extend(condition.children if type(condition) is kind else [condition])
+    return out
+
+
+def col(name):
+    """The column `name` of the frame being evaluated."""
+    return Col(name)
+
+
+def index():
+    """The frame's index labels, e.g. to flag the last n rows."""
+    return Index()
+
+
+def all_of(*conditions):
+    return All(_flatten(All, conditions))
+
+
+def any_of(*conditions):
+    return Any(_flatten(Any, conditions))
+
+
+def crossed_above(left, right):
+    """qtpylib.crossed_above: above now, at or below on the previous row."""
+    left, right = _expr(left), _expr(right)
+    return all_of(left > right, left.shift(1) <= right.shift(1))
+
+
+def crossed_below(left, right):
+    left, right = _expr(left), _expr(right)
+    return all_of(left < right, left.shift(1) >= right.shift(1))
+
+
+def _compiler(dataframe, lookback, tail):
+    """A compiler over just the rows the last `tail` results can read."""
+    if tail is None:
+        return _Compiler(dataframe)
+    offset = max(len(dataframe) - tail - lookback, 0)
+    return _Compiler(dataframe.iloc[offset:], tail, offset)
+
+
+def evaluate_many(conditions, dataframe, chunk=CHUNK, tail=None):
+    """`{name: bool array}` for a dict of conditions, chunk by chunk together,
+    so each chunk's columns are loaded into cache once for all of them.
+
+    With `tail` only the last `tail` rows are computed; the others are false.
+    """
+    conditions = {name: _condition(condition) for name, condition in conditions.items()}
+    lookback = max((condition.lookback for condition in conditions.values()), default=0)
+    compiler = _compiler(dataframe, lookback, tail)
+    compiled = {name: condition.compile(compiler) for name, condition in conditions.items()}
+    offset, length = compiler.offset, compiler.length
+    first = 0 if tail is None else max(length - tail, 0)
+    out = {name: np.zeros(len(dataframe), dtype=bool) for name in compiled}
+    for start in range(first, length, chunk):
+        stop = min(start + chunk, length)
+        for name, run in compiled.items():
+            out[name][offset + start:offset + stop] = run(start, stop)
+    return out
+
+
+def evaluate(condition, dataframe, chunk=CHUNK, tail=None):
+    """The condition as a bool array over the frame's rows."""
+    return evaluate_many({None: condition}, dataframe, chunk, tail)[None]
+
+
+def latest(value, dataframe):
+    """A condition or expression at the frame's last row, for log messages."""
+    value = _expr(value)
+    compiler = _compiler(dataframe, value.lookback, 1)
+    result = np.asarray(value.compile(compiler)(compiler.length - 1, compiler.length))
+    return result.item() if result.ndim == 0 else result[0]
+
+
+def tail_differences(condition, dataframe, tail):
+    """Row positions in the last `tail` rows where tail and full evaluation disagree."""
+    first = max(len(dataframe) - tail, 0)
+    full = evaluate(condition, dataframe)[first:]
+    return np.flatnonzero(full != evaluate(condition, dataframe, tail=tail)[first:]) + first
+
+
+def tail_from_config(strategy):
+    """Rows live signals are computed for, from the config's `"tail_signals"`;
+    None (the whole frame) in backtests and when it is not set.
+
+    `"tail_signals": true` computes the last candle only; a dict may set
+    `rows`, e.g. to keep a few recent signals visible in the UI.
+    """
+    config = getattr(strategy, 'config', None) or {}
+    options = config.get('tail_signals')
+    if not options or runmode(config) not in LIVE_RUNMODES:
+        return None
+    rows = options.get('rows', 1) if isinstance(options, dict) else 1
+    return max(int(rows), 1)
@@ -2,6 +2,8 @@ from freqtrade.strategy import IStrategy, Decimal
 import pandas as pd  
 import talib.abstract as ta  
 
+from condition_expr import all_of, col, evaluate, tail_from_config
+
 class ichiV1Final(IStrategy):  
     INTERFACE_VERSION = 3  
     timeframe = '15m'  
@@ -22,9 +24,10 @@ class ichiV1Final(IStrategy):
         return dataframe  
 
     def populate_entry_trend(self, dataframe: pd.DataFrame, metadata: dict) -> pd.DataFrame:  
-        dataframe.loc[  
-            (dataframe['close'] > dataframe['senkou_a']) &  # Price above cloud  
-            (dataframe['rsi'] < 45) &  # Oversold RSI  
-            (dataframe['volume'] > 0),  # Liquidity check [citation:9]  
-            'enter_long'] = 1  
+        entry = all_of(  
+            col('close') > col('senkou_a'),  # Price above cloud  
+            col('rsi') < 45,  # Oversold RSI  
+            col('volume') > 0,  # Liquidity check [citation:9]  
+        )  
+        dataframe.loc[evaluate(entry, dataframe, tail=tail_from_config(self)), 'enter_long'] = 1  
         return dataframe
\ No newline at end of file
@@ -3,9 +3,12 @@ from freqtrade.strategy import IStrategy
 import talib.abstract as ta
 import pandas as pd
 import numpy as np
-import freqtrade.vendor.qtpylib.indicators as qtpylib
 from datetime import datetime
 
+from ichimoku_kernel import ichimoku
+from compact_frame import compact_from_config
+from condition_expr import all_of, col, crossed_above, evaluate, tail_from_config
+
 class ichi_allweather_15m(IStrategy):
     # Optimized parameters
     buy_params = {
@@ -47,64 +50,52 @@ class ichi_allweather_15m(IStrategy):
             default=1
         )
         
-        # Ichimoku Cloud
-        high_9 = dataframe['high'].rolling(9).max()
-        low_9 = dataframe['low'].rolling(9).min()
-        dataframe['tenkan_sen'] = (high_9 + low_9) / 2
-        
-        high_26 = dataframe['high'].rolling(26).max()
-        low_26 = dataframe['low'].rolling(26).min()
-        dataframe['kijun_sen'] = (high_26 + low_26) / 2
-        
-        high_52 = dataframe['high'].rolling(52).max()
-        low_52 = dataframe['low'].rolling(52).min()
-        dataframe['senkou_b'] = (high_52 + low_52) / 2
-        dataframe['senkou_a'] = ((dataframe['tenkan_sen'] + dataframe['kijun_sen']) / 2)
-        
-        # Shift clouds forward
-        dataframe['senkou_a'] = dataframe['senkou_a'].shift(26)
-        dataframe['senkou_b'] = dataframe['senkou_b'].shift(26)
+        # Ichimoku Cloud (spans shifted 26 candles forward)
+        ichi = ichimoku(dataframe['high'].values, dataframe['low'].values, dataframe['close'].values,
+                        conversion_period=9, base_period=26, span_b_period=52, displacement=26)
+        dataframe['tenkan_sen'] = ichi['tenkan']
+        dataframe['kijun_sen'] = ichi['kijun']
+        dataframe['senkou_a'] = ichi['senkou_a']
+        dataframe['senkou_b'] = ichi['senkou_b']
         
         # Volume spike detection
         dataframe['volume_ma'] = ta.SMA(dataframe['volume'], 20)
         dataframe['volume_spike'] = dataframe['volume'] > self.buy_params['volume_multiplier'] * dataframe['volume_ma']
         
-        return dataframe
+        return compact_from_config(self, dataframe)
 
     def populate_buy_trend(self, dataframe: pd.DataFrame, metadata: dict) -> pd.DataFrame:
         p = self.buy_params
         
         # Bull market conditions
-        bull_cond = (
-            (dataframe['market_regime'] == 1) &
-            (dataframe['close'] > dataframe['senkou_a']) &
-            (dataframe['close'] > dataframe['senkou_b']) &
-            (dataframe['rsi'] > p['bull_rsi_entry']) &
-            (dataframe['rsi'] < 65) &
-            (dataframe['volume_spike'])
+        bull_cond = all_of(
+            col('market_regime') == 1,
+            col('close') > col('senkou_a'),
+            col('close') > col('senkou_b'),
+            col('rsi') > p['bull_rsi_entry'],
+            col('rsi') < 65,
+            col('volume_spike'),
         )
         
         # Bear market conditions
-        bear_cond = (
-            (dataframe['market_regime'] == 2) &
-            (dataframe['rsi'] < p['bear_rsi_entry']) &
-            (dataframe['close'] < dataframe['senkou_a']) &
-            (qtpylib.crossed_above(dataframe['close'], dataframe['kijun_sen']))
+        bear_cond = all_of(
+            col('market_regime') == 2,
+            col('rsi') < p['bear_rsi_entry'],
+            col('close') < col('senkou_a'),
+            crossed_above(col('close'), col('kijun_sen')),
         )
         
         # Choppy market conditions
-        choppy_cond = (
-            (dataframe['market_regime'] == 3) &
-            (dataframe['atr_pct'] > p['choppy_atr_entry']) &
-            (dataframe['volume_spike']) &
-            (qtpylib.crossed_above(dataframe['close'], dataframe['senkou_a'])) &
-            (dataframe['close'] > dataframe['ema_50'])
+        choppy_cond = all_of(
+            col('market_regime') == 3,
+            col('atr_pct') > p['choppy_atr_entry'],
+            col('volume_spike'),
+            crossed_above(col('close'), col('senkou_a')),
+            col('close') > col('ema_50'),
         )
         
         # Set buy signals
-        dataframe.loc[bull_cond, 'buy'] = 1
-        dataframe.loc[bear_cond, 'buy'] = 1
-        dataframe.loc[choppy_cond, 'buy'] = 1
+        dataframe.loc[evaluate(bull_cond | bear_cond | choppy_cond, dataframe, tail=tail_from_config(self)), 'buy'] = 1
         
         return dataframe
 
@@ -112,21 +103,19 @@ class ichi_allweather_15m(IStrategy):
         p = self.sell_params
         
         # Bull market exit
-        bull_exit = (dataframe['market_regime'] == 1) & (dataframe['rsi'] > p['bull_rsi_exit'])
+        bull_exit = (col('market_regime') == 1) & (col('rsi') > p['bull_rsi_exit'])
         
         # Bear market exit
-        bear_exit = (dataframe['market_regime'] == 2) & (dataframe['close'] > dataframe['senkou_a'] * 1.018)
+        bear_exit = (col('market_regime') == 2) & (col('close') > col('senkou_a') * 1.018)
         
         # Choppy market exit
-        choppy_exit = (
-            (dataframe['market_regime'] == 3) &
-            (dataframe["close"] < dataframe["close"].shift(1) * (1 - p['trailing_stop_distance']))
+        choppy_exit = all_of(
+            col('market_regime') == 3,
+            col('close') < col('close').shift(1) * (1 - p['trailing_stop_distance']),
         )
         
         # Set sell signals
-        dataframe.loc[bull_exit, 'sell'] = 1
-        dataframe.loc[bear_exit, 'sell'] = 1
-        dataframe.loc[choppy_exit, 'sell'] = 1
+        dataframe.loc[evaluate(bull_exit | bear_exit | choppy_exit, dataframe, tail=tail_from_config(self)), 'sell'] = 1
         
         return dataframe
 
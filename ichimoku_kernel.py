@@ -0,0 +1,158 @@
+"""Shared Ichimoku kernel for the Ichimoku strategies.
+
+`ichimoku` computes every line from plain high/low/close arrays. Rolling
+extrema use the van Herk/Gil-Werman block scheme (two vectorised prefix
+scans per window, O(n) regardless of window length); `MonotonicDeque` is
+the equivalent for feeding one candle at a time. Results are bit-for-bit
+identical to the pandas `rolling().max()/min()` + `shift()` formulation
+the strategies used before (see benchmarks/bench_ichimoku.py).
+"""
+from collections import deque
+
+import numpy as np
+from pandas import DataFrame, Series
+
+
+def _rolling_extreme(values, window, ufunc, neutral):
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    out = np.full(n, np.nan)
+    if window < 1 or n < window:
+        return out
+    if window == 1:
+        return values.copy()
+    blocks = -(-n // window)
+    padded = np.full(blocks * window, neutral)
+    padded[:n] = values
+    grid = padded.reshape(blocks, window)
+    # a window ending at i spans at most two blocks: the tail of one (suffix
+    # scan) and the head of the next (prefix scan)
+    prefix = ufunc.accumulate(grid, axis=1).ravel()
+    suffix = ufunc.accumulate(grid[:, ::-1], axis=1)[:, ::-1].ravel()
+    ufunc(suffix[:n - window + 1], prefix[window - 1:n], out=out[window - 1:])
+    return out
+
+
+def rolling_max(values, window):
+    """Max over the trailing `window` values; NaN until the window is full
+    or while it contains a NaN, like `Series.rolling(window).max()`."""
+    return _rolling_extreme(values, window, np.maximum, -np.inf)
+
+
+def rolling_min(values, window):
+    """Min counterpart of `rolling_max`."""
+    return _rolling_extreme(values, window, np.minimum, np.inf)
+
+
+def shift(values, periods):
+    """`Series.shift(periods)` for arrays, padding with NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if periods == 0:
+        out[:] = values
+    elif periods > 0:
+        out[periods:] = values[:-periods]
+    else:
+        out[:periods] = values[-periods:]
+    return out
+
+
+class MonotonicDeque:
+    """Rolling max (or min) over the last `window` pushes in amortised O(1)."""
+
+    def __init__(self, window, mode='max'):
+        self.window = window
+        self._better = (lambda a, b: a >= b) if mode == 'max' else (lambda a, b: a <= b)
+        self._items = deque()
+        self._count = 0
+        self._nan_until = -1
+
+    def push(self, value):
+        i = self._count
+        self._count += 1
+        if value != value:
+            # a NaN poisons every window that contains it
+            self._nan_until = i + self.window - 1
+        else:
+            while self._items and self._better(value, self._items[-1][1]):
+                self._items.pop()
+            self._items.append((i, value))
+        while self._items and self._items[0][0] <= i - self.window:
+            self._items.popleft()
+        if self._count < self.window or i <= self._nan_until or not self._items:
+            return np.nan
+        return self._items[0][1]
+
+
+def ichimoku(high, low, close, conversion_period=9, base_period=26, span_b_period=52,
+             displacement=26, chikou_displacement=None):
+    """All Ichimoku lines from high/low/close arrays.
+
+    `senkou_a`/`senkou_b` are the leading spans shifted forward by
+    `displacement`; `chikou` is close shifted back by `chikou_displacement`
+    (defaults to `displacement`). Cloud top/bottom ignore a missing span the
+    way `DataFrame.max(axis=1)` does, and `cloud_width` is relative to the
+    bottom.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    if chikou_displacement is None:
+        chikou_displacement = displacement
+
+    tenkan = (rolling_max(high, conversion_period) + rolling_min(low, conversion_period)) / 2
+    base_high = rolling_max(high, base_period)
+    base_low = rolling_min(low, base_period)
+    kijun = (base_high + base_low) / 2
+    leading_a = (tenkan + kijun) / 2
+    if span_b_period == 2 * base_period:
+        # the classic 26/52 pair: a 52 window is two back-to-back 26 windows
+        span_high = np.maximum(base_high, shift(base_high, base_period))
+        span_low = np.minimum(base_low, shift(base_low, base_period))
+    else:
+        span_high = rolling_max(high, span_b_period)
+        span_low = rolling_min(low, span_b_period)
+    leading_b = (span_high + span_low) / 2
+    senkou_a = shift(leading_a, displacement)
+    senkou_b = shift(leading_b, displacement)
+    cloud_top = np.fmax(senkou_a, senkou_b)
+    cloud_bottom = np.fmin(senkou_a, senkou_b)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cloud_width = (cloud_top - cloud_bottom) / cloud_bottom
+    return {
+        'tenkan': tenkan,
+        'kijun': kijun,
+        'leading_senkou_a': leading_a,
+        'leading_senkou_b': leading_b,
+        'senkou_a': senkou_a,
+        'senkou_b': senkou_b,
+        'chikou': shift(close, -chikou_displacement),
+        'cloud_top': cloud_top,
+        'cloud_bottom': cloud_bottom,
+        'cloud_width': cloud_width,
+    }
+
+
+def technical_ichimoku(dataframe: DataFrame, conversion_line_period=9, base_line_periods=26,
+                       laggin_span=52, displacement=26) -> dict:
+    """Drop-in for `technical.indicators.ichimoku`, returning Series keyed the same way.
+
+    Like technical, spans are shifted by `displacement - 1` and chikou by
+    `-(displacement - 1)`.
+    """
+    lines = ichimoku(dataframe['high'].values, dataframe['low'].values, dataframe['close'].values,
+                     conversion_line_period, base_line_periods, laggin_span, displacement - 1)
+    index = dataframe.index
+    senkou_a = Series(lines['senkou_a'], index=index)
+    senkou_b = Series(lines['senkou_b'], index=index)
+    return {
+        'tenkan_sen': Series(lines['tenkan'], index=index),
+        'kijun_sen': Series(lines['kijun'], index=index),
+        'senkou_span_a': senkou_a,
+        'senkou_span_b': senkou_b,
+        'leading_senkou_span_a': Series(lines['leading_senkou_a'], index=index),
+        'leading_senkou_span_b': Series(lines['leading_senkou_b'], index=index),
+        'chikou_span': Series(lines['chikou'], index=index),
+        'cloud_green': senkou_a > senkou_b,
+        'cloud_red': senkou_b > senkou_a,
+    }
@@ -0,0 +1,660 @@
+"""Incremental `populate_indicators` for `process_only_new_candles` strategies.
+
+In live/dry-run each new candle used to recompute every indicator over the
+whole dataframe. With `"incremental_indicators": true` in the bot config a
+strategy's indicators are instead declared as a list of specs and only the
+appended rows are computed:
+
+* recursive indicators (`EMA`, `RSI`, `ATR`, `ADX`, `HeikinAshi`, `EWM`)
+  carry their TA-Lib/pandas accumulators per pair and step them candle by
+  candle, following the library's operation order (TA-Lib builds differ in
+  the last bit on Wilder smoothing, hence the tolerance in verify mode);
+* finite-window indicators (`Window`) re-run the strategy's own pandas/TA-Lib
+  code on just `lookback + new` trailing rows;
+* `Full` columns that depend on other pairs (BTC informative data) are
+  recomputed over the whole frame every time.
+
+The first call per pair, a reload, a gap in the candle dates or an edited
+candle falls back to the strategy's full computation and reseeds the state.
+`"incremental_indicators": "verify"` additionally recomputes everything
+over the accumulated history and raises if any column drifts.
+Backtesting and hyperopt always take the full path.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+import talib
+
+from compact_frame import compact_exclude, narrow_dtype
+from strategy_runtime import LIVE_RUNMODES, runmode
+
+logger = logging.getLogger(__name__)
+
+VERIFY_RTOL = 1e-9
+VERIFY_ATOL = 1e-9
+
+
+class NeedsFullRecompute(Exception):
+    """Raised by a spec whose state cannot be advanced from the cached rows."""
+
+
+# TA-Lib before 0.6 treats |v| < 1e-8 as zero (TA_IS_ZERO); newer builds
+# only special-case an exact zero. Match whichever is installed.
+_ZERO = 1e-8 if talib.RSI(np.arange(20.0) * 1e-10, 14)[-1] == 0.0 else 0.0
+
+
+# pandas 3 always copies a shared column before writing to it; pandas 2
+# only with the copy_on_write option on
+_PANDAS_MAJOR = int(pd.__version__.split('.')[0])
+
+
+def _copy_on_write():
+    return _PANDAS_MAJOR >= 3 or pd.get_option('mode.copy_on_write') is True
+
+
+def _is_zero(value):
+    return -_ZERO < value < _ZERO if _ZERO else value == 0.0
+
+
+def _true_range(high, low, prev_close):
+    # TA-Lib's TRUE_RANGE macro, comparison order included
+    out = high - low
+    candidate = abs(high - prev_close)
+    if candidate > out:
+        out = candidate
+    candidate = abs(low - prev_close)
+    if candidate > out:
+        out = candidate
+    return out
+
+
+def _last(values):
+    value = float(values[-1]) if len(values) else np.nan
+    if value != value:
+        raise NeedsFullRecompute('not enough candles to seed')
+    return value
+
+
+class Indicator:
+    """Base spec: one or more columns that can be computed for appended rows.
+
+    `lookback` is how many rows before the first new one `advance` reads.
+    Hidden columns feed later specs but are dropped from the returned frame.
+    """
+
+    columns = ()
+    lookback = 0
+    hidden = False
+
+    def seed(self, frame):
+        """Build the state from a fully computed `frame`.
+
+        Returns `{column: values}` for hidden columns, which the strategy's
+        full computation does not produce.
+        """
+        return {}
+
+    def advance(self, tail, count):
+        """Return `{column: values}` for the last `count` rows of `tail`."""
+        raise NotImplementedError
+
+
+class EMA(Indicator):
+    """`ta.EMA(source, period)`: SMA seed, then `prev + k * (x - prev)`."""
+
+    def __init__(self, column, source='close', period=30, hidden=False):
+        self.columns = (column,)
+        self.source = source
+        self.period = period
+        self.hidden = hidden
+        self._k = 2.0 / (period + 1)
+        self._prev = None
+
+    def seed(self, frame):
+        column = self.columns[0]
+        if self.hidden:
+            values = talib.EMA(frame[self.source].to_numpy(dtype=np.float64), self.period)
+            self._prev = _last(values)
+            return {column: values}
+        self._prev = _last(frame[column].to_numpy())
+        return {}
+
+    def advance(self, tail, count):
+        out = np.empty(count)
+        prev, k = self._prev, self._k
+        for i, x in enumerate(tail[self.source].to_numpy(dtype=np.float64)[-count:]):
+            prev = ((x - prev) * k) + prev
+            out[i] = prev
+        self._prev = prev
+        return {self.columns[0]: out}
+
+
+class RSI(Indicator):
+    """`ta.RSI(source, period)` with Wilder-smoothed average gain/loss."""
+
+    def __init__(self, column, source='close', period=14, hidden=False):
+        self.columns = (column,)
+        self.source = source
+        self.period = period
+        self.hidden = hidden
+        self._gain = self._loss = self._prev = None
+
+    def _step(self, x):
+        diff = x - self._prev
+        self._prev = x
+        self._loss *= self.period - 1
+        self._gain *= self.period - 1
+        if diff < 0:
+            self._loss -= diff
+        else:
+            self._gain += diff
+        self._loss /= self.period
+        self._gain /= self.period
+        total = self._gain + self._loss
+        return 0.0 if _is_zero(total) else 100.0 * (self._gain / total)
+
+    def seed(self, frame):
+        values = frame[self.source].to_numpy(dtype=np.float64)
+        period = self.period
+        if len(values) <= period or np.isnan(values).any():
+            raise NeedsFullRecompute('not enough candles to seed')
+        out = np.full(len(values), np.nan)
+        self._prev = values[0]
+        self._gain = self._loss = 0.0
+        for x in values[1:period + 1]:
+            diff = x - self._prev
+            self._prev = x
+            if diff < 0:
+                self._loss -= diff
+            else:
+                self._gain += diff
+        self._loss /= period
+        self._gain /= period
+        total = self._gain + self._loss
+        out[period] = 0.0 if _is_zero(total) else 100.0 * (self._gain / total)
+        for i in range(period + 1, len(values)):
+            out[i] = self._step(values[i])
+        return {self.columns[0]: out} if self.hidden else {}
+
+    def advance(self, tail, count):
+        values = tail[self.source].to_numpy(dtype=np.float64)[-count:]
+        return {self.columns[0]: np.array([self._step(x) for x in values])}
+
+
+class ATR(Indicator):
+    """`ta.ATR(high, low, close, period)`."""
+
+    def __init__(self, column, period=14):
+        self.columns = (column,)
+        self.period = period
+        self._prev = self._close = None
+
+    def seed(self, frame):
+        self._prev = _last(frame[self.columns[0]].to_numpy())
+        self._close = float(frame['close'].iat[-1])
+        return {}
+
+    def advance(self, tail, count):
+        out = np.empty(count)
+        rows = tail[['high', 'low', 'close']].to_numpy(dtype=np.float64)[-count:]
+        for i, (high, low, close) in enumerate(rows):
+            self._prev *= self.period - 1
+            self._prev += _true_range(high, low, self._close)
+            self._prev /= self.period
+            self._close = close
+            out[i] = self._prev
+        return {self.columns[0]: out}
+
+
+class ADX(Indicator):
+    """`ta.ADX(high, low, close, period)`, replaying TA-Lib's accumulators."""
+
+    def __init__(self, column, period=14):
+        self.columns = (column,)
+        self.period = period
+        self._state = None
+
+    def _directional(self, high, low, close):
+        high_prev, low_prev, close_prev, plus_dm, minus_dm, tr = self._state[:6]
+        diff_p = high - high_prev
+        diff_m = low_prev - low
+        period = self.period
+        minus_dm -= minus_dm / period
+        plus_dm -= plus_dm / period
+        if diff_m > 0 and diff_p < diff_m:
+            minus_dm += diff_m
+        elif diff_p > 0 and diff_p > diff_m:
+            plus_dm += diff_p
+        tr = tr - (tr / period) + _true_range(high, low, close_prev)
+        dx = None
+        if not _is_zero(tr):
+            minus_di = 100.0 * (minus_dm / tr)
+            plus_di = 100.0 * (plus_dm / tr)
+            total = minus_di + plus_di
+            if not _is_zero(total):
+                dx = 100.0 * (abs(minus_di - plus_di) / total)
+        self._state[:6] = [high, low, close, plus_dm, minus_dm, tr]
+        return dx
+
+    def seed(self, frame):
+        rows = frame[['high', 'low', 'close']].to_numpy(dtype=np.float64)
+        period = self.period
+        if len(rows) < 2 * period or np.isnan(rows).any():
+            raise NeedsFullRecompute('not enough candles to seed')
+        high_prev, low_prev, close_prev = rows[0]
+        plus_dm = minus_dm = tr = 0.0
+        for high, low, close in rows[1:period]:
+            diff_p = high - high_prev
+            diff_m = low_prev - low
+            if diff_m > 0 and diff_p < diff_m:
+                minus_dm += diff_m
+            elif diff_p > 0 and diff_p > diff_m:
+                plus_dm += diff_p
+            tr += _true_range(high, low, close_prev)
+            high_prev, low_prev, close_prev = high, low, close
+        self._state = [high_prev, low_prev, close_prev, plus_dm, minus_dm, tr, 0.0]
+        sum_dx = 0.0
+        for high, low, close in rows[period:2 * period]:
+            dx = self._directional(high, low, close)
+            if dx is not None:
+                sum_dx += dx
+        adx = sum_dx / period
+        for high, low, close in rows[2 * period:]:
+            dx = self._directional(high, low, close)
+            if dx is not None:
+                adx = ((adx * (period - 1)) + dx) / period
+        self._state[6] = adx
+        return {}
+
+    def advance(self, tail, count):
+        out = np.empty(count)
+        period = self.period
+        rows = tail[['high', 'low', 'close']].to_numpy(dtype=np.float64)[-count:]
+        for i, (high, low, close) in enumerate(rows):
+            dx = self._directional(high, low, close)
+            if dx is not None:
+                self._state[6] = ((self._state[6] * (period - 1)) + dx) / period
+            out[i] = self._state[6]
+        return {self.columns[0]: out}
+
+
+class HeikinAshi(Indicator):
+    """`qtpylib.heikinashi` close/high/low; the HA open is carried as state."""
+
+    def __init__(self, close='close_ha', high='high_ha', low='low_ha'):
+        self.columns = (close, high, low)
+        self._open = self._close = None
+
+    def _candles(self, rows):
+        out = np.empty((len(rows), 3))
+        for i, (open_, high, low, close) in enumerate(rows):
+            if self._open is None:
+                ha_open = (open_ + close) / 2
+            else:
+                ha_open = (self._open + self._close) / 2
+            ha_close = (open_ + high + low + close) / 4
+            self._open, self._close = ha_open, ha_close
+            out[i] = ha_close, max(high, ha_open, ha_close), min(low, ha_open, ha_close)
+        return out
+
+    def seed(self, frame):
+        self._open = None
+        self._candles(frame[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64))
+        return {}
+
+    def advance(self, tail, count):
+        out = self._candles(tail[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)[-count:])
+        return dict(zip(self.columns, out.T))
+
+
+class EWM(Indicator):
+    """`Series.ewm(span=..., min_periods=...).mean()` (adjust=True), as pandas steps it."""
+
+    def __init__(self, column, source='close', span=None, min_periods=0, hidden=False):
+        self.columns = (column,)
+        self.source = source
+        self.min_periods = max(int(min_periods), 1)
+        self.hidden = hidden
+        com = (span - 1) / 2.0
+        self._decay = 1. - 1. / (1. + com)
+        self._weighted = np.nan
+        self._old_wt = 1.
+        self._nobs = 0
+
+    def _run(self, values):
+        out = np.empty(len(values))
+        weighted, old_wt, nobs = self._weighted, self._old_wt, self._nobs
+        for i, cur in enumerate(values):
+            is_observation = cur == cur
+            nobs += is_observation
+            if weighted == weighted:
+                old_wt *= self._decay
+                if is_observation:
+                    if weighted != cur:
+                        weighted = old_wt * weighted + cur
+                        weighted /= (old_wt + 1.)
+                    old_wt += 1.
+            elif is_observation:
+                weighted = cur
+            out[i] = weighted if nobs >= self.min_periods else np.nan
+        self._weighted, self._old_wt, self._nobs = weighted, old_wt, nobs
+        return out
+
+    def seed(self, frame):
+        values = self._run(frame[self.source].to_numpy(dtype=np.float64))
+        return {self.columns[0]: values} if self.hidden else {}
+
+    def advance(self, tail, count):
+        return {self.columns[0]: self._run(tail[self.source].to_numpy(dtype=np.float64)[-count:])}
+
+
+class Window(Indicator):
+    """Columns that only depend on the trailing `lookback + 1` rows.
+
+    `function(frame)` is the strategy's own vectorised code and returns a
+    Series/array (one column) or a mapping keyed by `columns`; it is called
+    on just the tail of the frame. `lookback=None` makes it a `Full` column.
+    """
+
+    def __init__(self, columns, function, lookback=0, hidden=False):
+        self.columns = (columns,) if isinstance(columns, str) else tuple(columns)
+        self.function = function
+        self.lookback = lookback
+        self.hidden = hidden
+
+    def compute(self, frame):
+        result = self.function(frame)
+        if len(self.columns) == 1 and not isinstance(result, (dict, pd.DataFrame)):
+            result = {self.columns[0]: result}
+        return {column: result[column] for column in self.columns}
+
+    def seed(self, frame):
+        if not self.hidden:
+            return {}
+        return {column: np.asarray(values) for column, values in self.compute(frame).items()}
+
+    def advance(self, tail, count):
+        return {column: np.asarray(values)[-count:] for column, values in self.compute(tail).items()}
+
+
+class Full(Window):
+    """Columns recomputed over the whole frame on every call, after all others."""
+
+    def __init__(self, columns, function):
+        super().__init__(columns, function, lookback=None)
+
+
+class _ColumnBuffer:
+    """An indicator column with room to grow, viewed by the returned frames.
+
+    New rows are written after the last one and dropped rows only move the
+    start, so a candle costs its own rows instead of a copy of the column.
+    """
+
+    def __init__(self, values, dtype=None):
+        self._allocate(values, 0, dtype or values.dtype)
+
+    def _allocate(self, values, extra, dtype):
+        # a quarter of headroom: one copy of the column every len/4 candles
+        self.buffer = np.empty(len(values) + len(values) // 4 + max(extra, 1), dtype=dtype)
+        self.buffer[:len(values)] = values
+        self.start, self.stop = 0, len(values)
+
+    def tail(self, rows):
+        return self.buffer[self.stop - rows:self.stop]
+
+    def _fits(self, values):
+        kind = self.buffer.dtype.kind
+        if not len(values) or kind not in 'iub':
+            return True
+        if kind == 'b':
+            return values.dtype.kind == 'b' or all(isinstance(value, (bool, np.bool_)) for value in values)
+        info = np.iinfo(self.buffer.dtype)
+        return values.dtype.kind in 'iub' and info.min <= values.min() and values.max() <= info.max
+
+    def append(self, values, dropped):
+        self.start += dropped
+        if not self._fits(values):
+            # a narrowed column got a value its type cannot hold
+            self._allocate(self.buffer[self.start:self.stop], len(values),
+                           np.result_type(self.buffer.dtype, values.dtype))
+        elif self.stop + len(values) > len(self.buffer):
+            # earlier frames still view the old buffer, so move to a new one
+            self._allocate(self.buffer[self.start:self.stop], len(values), self.buffer.dtype)
+        self.buffer[self.stop:self.stop + len(values)] = values
+        self.stop += len(values)
+
+    def values(self):
+        return self.buffer[self.start:self.stop]
+
+
+class _PairState:
+    def __init__(self, indicators, frame, columns, tails):
+        self.indicators = indicators
+        self.dates = frame['date'].values
+        self.last_close = float(frame['close'].iat[-1])
+        # the returned columns in full; the rows any spec reads back, at
+        # float64, for every column including the hidden ones
+        self.columns = columns
+        self.tails = tails
+        # a shallow copy of the last frame returned: while it is alive pandas
+        # copies a column of that frame before writing to it, so a strategy
+        # editing the frame reaches neither the buffers nor the OHLCV.
+        # Without copy-on-write the frame gets copies instead
+        self.returned = None
+        self.history = None
+
+    def appended(self, dataframe):
+        """Rows appended since the cached frame and rows dropped from its
+        front, or None when the new frame does not simply extend it."""
+        dates = dataframe['date'].values
+        if len(dates) == 0 or len(self.dates) < 2:
+            return None
+        pos = int(np.searchsorted(dates, self.dates[-1]))
+        if pos >= len(dates) or dates[pos] != self.dates[-1]:
+            return None
+        dropped = len(self.dates) - 1 - pos
+        if dropped < 0 or dates[0] != self.dates[dropped]:
+            return None
+        if float(dataframe['close'].iat[pos]) != self.last_close:
+            return None
+        step = self.dates[-1] - self.dates[-2]
+        if (np.diff(dates[pos:]) != step).any():
+            return None
+        return len(dates) - 1 - pos, dropped
+
+
+class IncrementalIndicators:
+    """Per-pair incremental driver around a strategy's indicator code.
+
+    `full(dataframe, metadata)` is the strategy's complete computation;
+    `factory()` returns a fresh list of specs covering the columns it
+    produces, in dependency order. With `compact` set, the returned columns
+    but those in `keep` are stored with the types `compact_frames` narrows
+    them to; the specs still run on the full-width values.
+    """
+
+    def __init__(self, full, factory, verify=False, compact=False, keep=()):
+        self.full = full
+        self.factory = factory
+        self.verify = verify
+        self.compact = compact
+        self.keep = tuple(keep)
+        self._pairs = {}
+        self.full_runs = 0
+        self.incremental_runs = 0
+        self.rows_computed = 0
+
+    def reset(self, pair=None):
+        if pair is None:
+            self._pairs.clear()
+        else:
+            self._pairs.pop(pair, None)
+
+    def stats(self):
+        return {
+            'pairs': len(self._pairs),
+            'full_runs': self.full_runs,
+            'incremental_runs': self.incremental_runs,
+            'rows_computed': self.rows_computed,
+        }
+
+    def populate(self, dataframe, metadata):
+        pair = metadata['pair']
+        state = self._pairs.get(pair)
+        appended = state.appended(dataframe) if state is not None else None
+        if appended is not None:
+            try:
+                result = self._advance(state, dataframe, *appended)
+            except NeedsFullRecompute as e:
+                logger.debug('%s: full indicator recompute (%s)', pair, e)
+            else:
+                self.incremental_runs += 1
+                self.rows_computed += appended[0]
+                if self.verify:
+                    self._verify(pair, state, dataframe, result, metadata)
+                return result
+        return self._seed(pair, dataframe, metadata)
+
+    def _seed(self, pair, dataframe, metadata):
+        raw = dataframe.copy() if self.verify else None
+        frame = self.full(dataframe, metadata)
+        self.full_runs += 1
+        indicators = self.factory()
+        lookback = max((i.lookback for i in indicators if i.lookback is not None), default=0)
+        columns = {}
+        tails = {}
+        hidden = set()
+        try:
+            work = frame
+            for indicator in indicators:
+                if indicator.lookback is None:
+                    continue
+                values = indicator.seed(work)
+                if values:
+                    if work is frame:
+                        work = frame.copy(deep=False)
+                    for column, array in values.items():
+                        work[column] = array
+                        hidden.add(column)
+                for column in indicator.columns:
+                    array = np.asarray(work[column].to_numpy())
+                    tails[column] = array[max(len(array) - lookback, 0):].copy()
+                    if column not in hidden:
+                        columns[column] = _ColumnBuffer(array, self._dtype(column, array))
+        except NeedsFullRecompute:
+            self._pairs.pop(pair, None)
+            return frame
+        state = self._pairs[pair] = _PairState(indicators, frame, columns, tails)
+        if raw is not None:
+            state.history = raw
+        return frame
+
+    def _dtype(self, column, values):
+        if self.compact and column not in self.keep:
+            return narrow_dtype(values)
+        return None
+
+    def _advance(self, state, dataframe, count, dropped):
+        indicators = state.indicators
+        n = len(dataframe)
+        windowed = [i for i in indicators if i.lookback is not None]
+        lookback = max((i.lookback for i in windowed), default=0)
+        if n - count < lookback:
+            raise NeedsFullRecompute('not enough cached rows')
+        computed = {}
+        if count:
+            size = min(n, lookback + count)
+            cached = size - count
+            # one tail frame holding every column: cached rows plus room for
+            # the new ones, which each spec fills in place for the next
+            arrays = {column: dataframe[column].values[n - size:] for column in dataframe.columns}
+            for column, old in state.tails.items():
+                array = np.empty(size, dtype=old.dtype)
+                array[:cached] = old[len(old) - cached:]
+                arrays[column] = array
+            tail = pd.DataFrame(arrays, index=dataframe.index[n - size:], copy=False)
+            shared = None
+            for indicator in windowed:
+                for column, values in indicator.advance(tail, count).items():
+                    array = arrays[column]
+                    array[cached:] = values
+                    computed[column] = array[cached:]
+                    if shared is None:
+                        shared = np.shares_memory(tail[column].values, array)
+                    if not shared:
+                        tail[column] = array
+            for column in state.tails:
+                state.tails[column] = arrays[column][size - min(size, lookback):]
+        for column, buffer in state.columns.items():
+            buffer.append(computed.get(column, ()), dropped)
+        state.dates = dataframe['date'].values
+        state.last_close = float(dataframe['close'].iat[-1])
+
+        columns = {column: dataframe[column].array for column in dataframe.columns if column not in state.columns}
+        columns.update((column, buffer.values()) for column, buffer in state.columns.items())
+        cow = _copy_on_write()
+        result = pd.DataFrame(columns, index=dataframe.index, copy=not cow)
+        for indicator in indicators:
+            if indicator.lookback is None:
+                for column, values in indicator.compute(result).items():
+                    result[column] = values
+        state.returned = result.copy(deep=False) if cow else None
+        return result
+
+    def _verify(self, pair, state, dataframe, result, metadata):
+        state.history = pd.concat(
+            [state.history, dataframe.iloc[len(dataframe) - self._count_new(state.history, dataframe):]],
+            ignore_index=True)
+        expected = self.full(state.history.copy(), metadata).iloc[-len(result):]
+        mismatched = []
+        for indicator in state.indicators:
+            if indicator.hidden or indicator.lookback is None:
+                continue
+            for column in indicator.columns:
+                got = result[column].to_numpy()
+                want = expected[column].to_numpy()
+                if got.dtype.kind == 'f' or want.dtype.kind == 'f':
+                    # a float32 column can be one rounding step off
+                    rtol = max(VERIFY_RTOL, np.finfo(got.dtype).eps) if got.dtype.kind == 'f' else VERIFY_RTOL
+                    ok = np.allclose(got.astype(np.float64), want.astype(np.float64),
+                                     rtol=rtol, atol=VERIFY_ATOL, equal_nan=True)
+                else:
+                    ok = np.array_equal(got, want)
+                if not ok:
+                    mismatched.append(column)
+        if mismatched:
+            raise AssertionError(f'{pair}: incremental indicators differ from full recompute: '
+                                 f'{", ".join(mismatched)}')
+
+    @staticmethod
+    def _count_new(history, dataframe):
+        last = history['date'].iat[-1]
+        return int((dataframe['date'] > last).sum())
+
+
+def incremental_mode(config):
+    """`False`, `True` or `'verify'` for a bot config; only live/dry-run qualify."""
+    mode = config.get('incremental_indicators', False)
+    if not mode or runmode(config) not in LIVE_RUNMODES:
+        return False
+    return 'verify' if mode == 'verify' else True
+
+
+def populate_incremental(strategy, dataframe, metadata, full, factory, compact=False):
+    """Run `full` or the incremental driver depending on the strategy config.
+
+    A strategy that passes its result through `compact_from_config` sets
+    `compact`: the driver then stores those columns already narrowed, so
+    that pass does not copy the whole history on every candle.
+    """
+    mode = incremental_mode(strategy.config)
+    if not mode:
+        return full(dataframe, metadata)
+    engine = getattr(strategy, '_incremental_indicators', None)
+    if engine is None:
+        keep = compact_exclude(strategy) if compact else None
+        engine = strategy._incremental_indicators = IncrementalIndicators(
+            full, factory, verify=mode == 'verify', compact=keep is not None, keep=keep or ())
+    return engine.populate(dataframe, metadata)
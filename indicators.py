@@ -0,0 +1,300 @@
+import threading
+from bisect import bisect_right
+from collections import deque
+
+import numpy as np
+
+# Largest power of the decay factor we let a block reach before rebasing, so
+# the closed-form recurrence below never overflows a float64.
+_MAX_LOG_SCALE = 300.0
+
+
+def ewm(values, alpha, initial):
+    """y[t] = (1 - alpha) * y[t-1] + alpha * x[t] along the last axis, y[-1] = initial.
+
+    Evaluated in closed form one block at a time (cumsum over rescaled inputs)
+    instead of a Python loop per element. `alpha` and `initial` broadcast
+    against the leading axes, so a 2D input smooths every row at once.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    alpha = np.asarray(alpha, dtype=np.float64)
+    if alpha.ndim:
+        alpha = alpha[..., None]
+    decay = 1.0 - alpha
+    out = np.empty(np.broadcast_shapes(x.shape, decay.shape))
+    n = out.shape[-1]
+    if n == 0:
+        return out
+
+    # alpha == 1 (period 1) degenerates to y = x and has no usable decay.
+    passthrough = decay <= 0.0
+    safe_decay = np.where(passthrough, 0.5, decay)
+    block = max(1, int(_MAX_LOG_SCALE / float(np.max(-np.log(safe_decay)))))
+    steps = np.arange(1, min(block, n) + 1, dtype=np.float64)
+    state = np.broadcast_to(np.asarray(initial, dtype=np.float64), out.shape[:-1]).astype(np.float64)
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        powers = safe_decay ** steps[:stop - start]
+        chunk = x[..., start:stop]
+        acc = np.cumsum(alpha * chunk / powers, axis=-1)
+        out[..., start:stop] = powers * (state[..., None] + acc)
+        state = out[..., stop - 1]
+    if np.any(passthrough):
+        out[...] = np.where(passthrough, np.broadcast_to(x, out.shape), out)
+    return out
+
+
+def wilder_rsi(prices, period=14):
+    """Full Wilder RSI series (TA-Lib semantics: first value at index `period`).
+
+    Works on a 1D series or row-wise on a 2D (series x time) array.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    out = np.full(prices.shape, np.nan)
+    if prices.shape[-1] <= period:
+        return out
+    deltas = np.diff(prices, axis=-1)
+    gains = np.clip(deltas, 0.0, None)
+    losses = np.clip(-deltas, 0.0, None)
+    seed_gain = gains[..., :period].mean(axis=-1)
+    seed_loss = losses[..., :period].mean(axis=-1)
+    avg_gain = ewm(gains[..., period:], 1.0 / period, seed_gain)
+    avg_loss = ewm(losses[..., period:], 1.0 / period, seed_loss)
+    out[..., period] = _rsi(seed_gain, seed_loss)
+    out[..., period + 1:] = _rsi(avg_gain, avg_loss)
+    return out
+
+
+def sma(values, period):
+    """Full simple moving average series; the first `period - 1` values are NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if len(values) < period:
+        return out
+    base = values[0]
+    csum = np.concatenate([[0.0], np.cumsum(values - base)])
+    out[period - 1:] = (csum[period:] - csum[:-period]) / period + base
+    return out
+
+
+def pad_series(series):
+    """Stack ragged price lists into a left-aligned, NaN-padded 2D array.
+
+    Returns `(matrix, lengths)`; row i holds its points in columns
+    `[0, lengths[i])`.
+    """
+    lengths = np.array([len(s) for s in series], dtype=np.intp)
+    matrix = np.full((len(series), lengths.max(initial=0)), np.nan)
+    for row, values in enumerate(series):
+        matrix[row, :len(values)] = values
+    return matrix, lengths
+
+
+def last_sma(matrix, lengths, period):
+    """SMA of the last `period` points of every row of a padded matrix."""
+    rows = np.arange(len(lengths))
+    # cumsum relative to each row's first point keeps the window differences
+    # from cancelling large absolute sums
+    base = np.nan_to_num(matrix[:, :1])
+    csum = np.zeros((matrix.shape[0], matrix.shape[1] + 1))
+    np.cumsum(np.nan_to_num(matrix - base), axis=1, out=csum[:, 1:])
+    end = lengths
+    start = np.maximum(end - period, 0)
+    out = (csum[rows, end] - csum[rows, start]) / period + base[:, 0]
+    return np.where(lengths >= period, out, np.nan)
+
+
+def batch_signals(matrix, lengths, short_period=10, long_period=30, rsi_period=14):
+    """Short/long SMA, Wilder RSI and BUY/SELL/HOLD for every row at once."""
+    rows = np.arange(len(lengths))
+    last = np.maximum(lengths - 1, 0)
+    short_ma = last_sma(matrix, lengths, short_period)
+    long_ma = last_sma(matrix, lengths, long_period)
+    rsi = wilder_rsi(matrix, rsi_period)[rows, last]
+    action = np.select(
+        [(rsi > 70) & (short_ma < long_ma), (rsi < 30) & (short_ma > long_ma)],
+        ['SELL', 'BUY'],
+        default='HOLD',
+    )
+    return short_ma, long_ma, rsi, action
+
+
+def _rsi(avg_gain, avg_loss):
+    total = avg_gain + avg_loss
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total != 0, 100.0 * avg_gain / np.where(total != 0, total, 1.0), 0.0)
+
+
+class StreamingSMA:
+    """Simple moving average over the last `period` points via a running sum."""
+
+    def __init__(self, period):
+        self.period = period
+        self._window = deque(maxlen=period)
+        self._sum = 0.0
+        self._updates = 0
+        self.value = None
+
+    def seed(self, prices):
+        tail = np.asarray(prices, dtype=np.float64)[-self.period:]
+        self._window = deque(tail.tolist(), maxlen=self.period)
+        self._sum = float(tail.sum())
+        self._updates = 0
+        self.value = self._sum / self.period if len(self._window) == self.period else None
+        return self.value
+
+    def update(self, price):
+        if len(self._window) == self.period:
+            self._sum -= self._window[0]
+        self._window.append(price)
+        self._sum += price
+        self._updates += 1
+        if self._updates >= self.period:
+            # re-sum once per window length to keep rounding drift bounded
+            self._sum = sum(self._window)
+            self._updates = 0
+        if len(self._window) == self.period:
+            self.value = self._sum / self.period
+        return self.value
+
+
+class StreamingEMA:
+    """Exponential moving average seeded with the SMA of the first `period` points."""
+
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self._warmup = []
+        self.value = None
+
+    def seed(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        if len(prices) < self.period:
+            self._warmup = prices.tolist()
+            self.value = None
+            return None
+        self._warmup = []
+        seed = prices[:self.period].mean()
+        rest = prices[self.period:]
+        self.value = float(ewm(rest, self.alpha, seed)[-1]) if len(rest) else float(seed)
+        return self.value
+
+    def update(self, price):
+        if self.value is None:
+            self._warmup.append(price)
+            if len(self._warmup) == self.period:
+                self.value = sum(self._warmup) / self.period
+                self._warmup = []
+            return self.value
+        self.value += self.alpha * (price - self.value)
+        return self.value
+
+
+class StreamingRSI:
+    """Wilder-smoothed RSI updated one price at a time."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self._reset()
+
+    def _reset(self):
+        self._last = None
+        self._gains = []
+        self._losses = []
+        self.avg_gain = None
+        self.avg_loss = None
+        self.value = None
+
+    def seed(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        self._reset()
+        if len(prices) == 0:
+            return None
+        self._last = float(prices[-1])
+        if len(prices) <= self.period:
+            deltas = np.diff(prices)
+            self._gains = np.clip(deltas, 0.0, None).tolist()
+            self._losses = np.clip(-deltas, 0.0, None).tolist()
+            return None
+        deltas = np.diff(prices)
+        gains = np.clip(deltas, 0.0, None)
+        losses = np.clip(-deltas, 0.0, None)
+        alpha = 1.0 / self.period
+        avg_gain = gains[:self.period].mean()
+        avg_loss = losses[:self.period].mean()
+        if len(deltas) > self.period:
+            avg_gain = ewm(gains[self.period:], alpha, avg_gain)[-1]
+            avg_loss = ewm(losses[self.period:], alpha, avg_loss)[-1]
+        self.avg_gain = float(avg_gain)
+        self.avg_loss = float(avg_loss)
+        self.value = float(_rsi(self.avg_gain, self.avg_loss))
+        return self.value
+
+    def update(self, price):
+        if self._last is None:
+            self._last = price
+            return None
+        delta = price - self._last
+        self._last = price
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if self.avg_gain is None:
+            self._gains.append(gain)
+            self._losses.append(loss)
+            if len(self._gains) < self.period:
+                return None
+            self.avg_gain = sum(self._gains) / self.period
+            self.avg_loss = sum(self._losses) / self.period
+            self._gains = []
+            self._losses = []
+        else:
+            self.avg_gain += (gain - self.avg_gain) / self.period
+            self.avg_loss += (loss - self.avg_loss) / self.period
+        total = self.avg_gain + self.avg_loss
+        self.value = 100.0 * self.avg_gain / total if total != 0 else 0.0
+        return self.value
+
+
+class IndicatorEngine:
+    """Resident indicator state for one price series.
+
+    `ingest` takes the full (timestamps, prices) series as returned by the
+    upstream and only feeds the points newer than the last one it has seen.
+    """
+
+    def __init__(self, short_period=10, long_period=30, rsi_period=14):
+        self.short_ma = StreamingSMA(short_period)
+        self.long_ma = StreamingSMA(long_period)
+        self.rsi = StreamingRSI(rsi_period)
+        self.last_timestamp = None
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def seed(self, timestamps, prices):
+        for indicator in (self.short_ma, self.long_ma, self.rsi):
+            indicator.seed(prices)
+        self.last_timestamp = timestamps[-1] if len(timestamps) else None
+        self.count = len(prices)
+
+    def update(self, timestamp, price):
+        for indicator in (self.short_ma, self.long_ma, self.rsi):
+            indicator.update(price)
+        self.last_timestamp = timestamp
+        self.count += 1
+
+    def ingest(self, timestamps, prices):
+        with self._lock:
+            if self.last_timestamp is None:
+                self.seed(timestamps, prices)
+            else:
+                start = bisect_right(timestamps, self.last_timestamp)
+                for i in range(start, len(prices)):
+                    self.update(timestamps[i], prices[i])
+            return self.snapshot()
+
+    def snapshot(self):
+        return {
+            'short_ma': self.short_ma.value,
+            'long_ma': self.long_ma.value,
+            'rsi': self.rsi.value,
+        }
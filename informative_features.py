@@ -0,0 +1,114 @@
+"""Informative-pair (BTC) features computed once per candle and joined by date.
+
+Strategies used to copy and shift the whole BTC frame for every pair, then
+line it up with the pair by row position, which is wrong whenever the two
+histories differ in length. `InformativeFeatures` derives the columns once
+per informative candle. It joins them onto a pair frame by timestamp: the
+last informative candle at or before each pair candle. The alignment is
+cached per (pair dates, informative dates) and returns read-only slices of
+the cached arrays when the dates are a contiguous run of the informative
+dates, which is the usual case.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ichimoku_kernel import shift
+
+
+def _features(informative, day_candles):
+    open_ = informative['open'].to_numpy(dtype=np.float64)
+    high = informative['high'].to_numpy(dtype=np.float64)
+    low = informative['low'].to_numpy(dtype=np.float64)
+    close = informative['close'].to_numpy(dtype=np.float64)
+    source = (open_ + close + high + low) / 4
+    past_close = shift(close, 1)
+    return {
+        'close': close,
+        'source': source,
+        # previous candle, so a signal never sees the candle it is on
+        'past_source': shift(source, 1),
+        # positive when the previous candle dumped
+        'past_delta': shift(past_close, 1) - past_close,
+        'day_source': shift(source, day_candles),
+    }
+
+
+class InformativeFeatures:
+    def __init__(self, pair='BTC/USDT', day_candles=288, maxsize=64):
+        self.pair = pair
+        self.day_candles = day_candles
+        self.maxsize = maxsize
+        self._features = {}
+        self._alignments = OrderedDict()
+        self._lock = threading.Lock()
+        self.computations = 0
+        self.hits = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def features(self, informative, timeframe):
+        """Derived columns for `informative`, one array per name, row-aligned with it."""
+        dates = informative['date'].values
+        key = (dates[0], dates[-1], len(dates)) if len(dates) else None
+        with self._lock:
+            cached = self._features.get(timeframe)
+            if cached is not None and cached[0] == key:
+                self.hits += 1
+                return cached[1], cached[2]
+            columns = _features(informative, self.day_candles)
+            for values in columns.values():
+                values.flags.writeable = False
+            self._features[timeframe] = (key, columns, dates)
+            self.computations += 1
+            return columns, dates
+
+    def _alignment(self, timeframe, dates, informative_dates):
+        key = (timeframe, dates[0], dates[-1], len(dates),
+               informative_dates[0], informative_dates[-1], len(informative_dates))
+        with self._lock:
+            found = self._alignments.get(key)
+            if found is not None:
+                self._alignments.move_to_end(key)
+                return found
+        pos = np.searchsorted(informative_dates, dates, side='right') - 1
+        start = int(pos[0])
+        if start >= 0 and int(pos[-1]) == start + len(dates) - 1 \
+                and np.array_equal(informative_dates[start:start + len(dates)], dates):
+            found = slice(start, start + len(dates))
+        else:
+            found = pos
+        with self._lock:
+            self._alignments[key] = found
+            while len(self._alignments) > self.maxsize:
+                self._alignments.popitem(last=False)
+        return found
+
+    def join(self, dataframe, informative, timeframe, names):
+        """`{name: values}` aligned to `dataframe['date']`; NaN before the
+        informative history starts."""
+        columns, informative_dates = self.features(informative, timeframe)
+        dates = dataframe['date'].values
+        if len(dates) == 0 or len(informative_dates) == 0:
+            return {name: np.full(len(dates), np.nan) for name in names}
+        where = self._alignment(timeframe, dates, informative_dates)
+        if isinstance(where, slice):
+            return {name: columns[name][where] for name in names}
+        missing = where < 0
+        out = {}
+        for name in names:
+            values = columns[name][np.maximum(where, 0)]
+            values[missing] = np.nan
+            out[name] = values
+        return out
+
+    def stats(self):
+        return {'computations': self.computations, 'hits': self.hits, 'alignments': len(self._alignments)}
@@ -0,0 +1,129 @@
+"""BTC market regime shared by every pair of a strategy.
+
+`RegimeService` classifies each BTC candle as BULL/CHOPPY/BEAR/NEUTRAL from
+EMA25, EMA100, ADX14 and ATR14. The result is cached per (timeframe, last
+candle), so the first pair analysed on a new candle pays for it and the rest
+reuse it. New BTC candles are folded in incrementally through
+`IncrementalIndicators`. The whole history is kept as a series, so a
+backtest can look up the regime that held at each candle instead of the
+latest one.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import talib
+
+from incremental_indicators import ADX, ATR, EMA, IncrementalIndicators, Window
+
+REGIMES = ('BULL', 'CHOPPY', 'BEAR', 'NEUTRAL')
+TIMEFRAME_UNITS = {'m': 'min', 'h': 'h', 'd': 'D', 'w': 'W'}
+
+
+def timeframe_delta(timeframe):
+    """Candle length of a timeframe such as '5m', '1h' or '1d'."""
+    return pd.Timedelta(int(timeframe[:-1]), unit=TIMEFRAME_UNITS[timeframe[-1]])
+
+
+def classify(frame, default='CHOPPY'):
+    """Regime per row of a frame holding close, ema25, ema100, adx and atr."""
+    close = frame['close']
+    ema_fast = frame['ema25']
+    ema_slow = frame['ema100']
+    adx = frame['adx']
+    atr_pct = frame['atr'] / close
+    bull = (close > ema_fast) & (ema_fast > ema_slow) & (adx > 25) & (atr_pct > 0.01)
+    choppy = (adx < 20) & ((ema_fast - ema_slow).abs() / close < 0.03) & (atr_pct < 0.008)
+    bear = (close < ema_fast) & (ema_fast < ema_slow) & (adx > 28)
+    # before EMA100 has warmed up there is no regime yet
+    return np.select([ema_slow.isna(), bull, choppy, bear], [default, 'BULL', 'CHOPPY', 'BEAR'],
+                     default='NEUTRAL').astype(object)
+
+
+class RegimeService:
+    def __init__(self, pair='BTC/USDT', default='CHOPPY'):
+        self.pair = pair
+        self.default = default
+        self._engines = {}
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.computations = 0
+        self.hits = 0
+
+    def __getstate__(self):
+        # hyperopt pickles the strategy for its workers. Keep the regime
+        # history custom_stoploss reads; engines rebuild on the next history()
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_engines'] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _compute(self, frame, metadata):
+        frame['ema25'] = talib.EMA(frame['close'].values, 25)
+        frame['ema100'] = talib.EMA(frame['close'].values, 100)
+        frame['adx'] = talib.ADX(frame['high'].values, frame['low'].values, frame['close'].values, 14)
+        frame['atr'] = talib.ATR(frame['high'].values, frame['low'].values, frame['close'].values, 14)
+        frame['regime'] = classify(frame, self.default)
+        return frame
+
+    def _indicators(self):
+        return [
+            EMA('ema25', period=25),
+            EMA('ema100', period=100),
+            ADX('adx', period=14),
+            ATR('atr', period=14),
+            Window('regime', lambda frame: classify(frame, self.default)),
+        ]
+
+    def history(self, dataframe, timeframe):
+        """Regime per BTC candle, indexed by candle date."""
+        key = (dataframe['date'].iat[-1], len(dataframe))
+        with self._lock:
+            cached = self._cache.get(timeframe)
+            if cached is not None and cached[0] == key:
+                self.hits += 1
+                return cached[1]
+            engine = self._engines.get(timeframe)
+            if engine is None:
+                engine = self._engines[timeframe] = IncrementalIndicators(self._compute, self._indicators)
+            frame = engine.populate(dataframe[['date', 'open', 'high', 'low', 'close', 'volume']],
+                                    {'pair': self.pair})
+            series = pd.Series(frame['regime'].values, index=pd.DatetimeIndex(frame['date']), name='regime')
+            self._cache[timeframe] = (key, series)
+            self.computations += 1
+            return series
+
+    def latest(self, dataframe, timeframe):
+        return self.history(dataframe, timeframe).iat[-1]
+
+    def align(self, dates, dataframe, timeframe):
+        """Regime in force at each of `dates`: the last BTC candle at or before it."""
+        series = self.history(dataframe, timeframe)
+        pos = series.index.searchsorted(pd.DatetimeIndex(dates), side='right') - 1
+        out = series.values[np.maximum(pos, 0)]
+        out[pos < 0] = self.default
+        return out
+
+    def regime_at(self, timeframe, when, default=None):
+        """Regime of the last BTC candle closed at `when`, from the last
+        computed history, without refetching.
+
+        Candles are dated by their open, so that is the candle at or before
+        `when - timeframe`; the one opening at `when` is still forming.
+        """
+        with self._lock:
+            cached = self._cache.get(timeframe)
+        if cached is None:
+            return default if default is not None else self.default
+        series = cached[1]
+        pos = series.index.searchsorted(pd.Timestamp(when) - timeframe_delta(timeframe), side='right') - 1
+        if pos < 0:
+            return default if default is not None else self.default
+        return series.iat[pos]
+
+    def stats(self):
+        return {'computations': self.computations, 'hits': self.hits}
@@ -0,0 +1,154 @@
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _ShardOwner:
+    """Lives in a thread-local; when the thread exits it is collected and
+    its shard is folded into the registry's retired totals."""
+
+
+class Registry:
+    """Prometheus-style metrics with per-thread shards.
+
+    Every thread writes only to its own shard, so recording never takes a
+    lock; `render` sums the shards when scraped. Totals are per process, so
+    under gunicorn each worker reports its own series.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = {}
+        self._retired = {}
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(self, name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(self, name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = {}
+            owner = _ShardOwner()
+            with self._lock:
+                self._shards[id(owner)] = shard
+            weakref.finalize(owner, self._retire, id(owner))
+            self._local.owner = owner
+            self._local.shard = shard
+        return shard
+
+    def _retire(self, owner_id):
+        with self._lock:
+            shard = self._shards.pop(owner_id, None)
+            if shard:
+                _merge(self._retired, shard)
+
+    def _totals(self):
+        with self._lock:
+            totals = {}
+            _merge(totals, self._retired)
+            for shard in list(self._shards.values()):
+                _merge(totals, shard)
+        return totals
+
+    def render(self):
+        totals = self._totals()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(totals))
+        return '\n'.join(lines) + '\n'
+
+
+def _merge(into, shard):
+    for key, values in list(shard.items()):
+        current = into.get(key)
+        if current is None:
+            into[key] = list(values)
+        else:
+            for i, value in enumerate(values):
+                current[i] += value
+
+
+def _labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+class Counter:
+    def __init__(self, registry, name, help, labelnames):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, *labelvalues, amount=1.0):
+        shard = self.registry._shard()
+        key = (self.name, labelvalues)
+        values = shard.get(key)
+        if values is None:
+            shard[key] = [amount]
+        else:
+            values[0] += amount
+
+    def render(self, totals):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for (name, labelvalues), values in sorted(totals.items()):
+            if name == self.name:
+                lines.append(f'{self.name}{_labels(self.labelnames, labelvalues)} {values[0]:g}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, registry, name, help, labelnames, buckets):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labelvalues):
+        shard = self.registry._shard()
+        key = (self.name, labelvalues)
+        values = shard.get(key)
+        if values is None:
+            # one slot per bucket plus +Inf, then sum and count
+            values = shard[key] = [0.0] * (len(self.buckets) + 3)
+        values[bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def render(self, totals):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for (name, labelvalues), values in sorted(totals.items()):
+            if name != self.name:
+                continue
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + ('+Inf',), values):
+                cumulative += count
+                le = bound if bound == '+Inf' else f'{bound:g}'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labelvalues, [("le", le)])} {cumulative:g}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labelvalues)} {values[-2]:.9g}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labelvalues)} {values[-1]:g}')
+        return lines
@@ -0,0 +1,52 @@
+"""Many periods of one indicator family computed together.
+
+`ema`, `sma`, `rsi` and `cci` take a price array (or high/low/close for CCI)
+and a list of periods and return a `(len(periods), len(values))` array with
+one row per period, identical to the matching TA-Lib call. The inputs are
+converted to contiguous float64 once for the whole batch and every row is
+written by TA-Lib's C routine directly, which skips the per-call dataframe
+handling of `talib.abstract` that the strategies used to pay per period.
+A NumPy closed-form pass over all periods at once was measured and is
+slower than TA-Lib's own loops (see benchmarks/bench_multi_period.py).
+
+`named(prefix, periods, matrix)` turns a result into `{prefix + period:
+row}` for populating dataframe columns.
+"""
+import numpy as np
+import talib
+
+
+def _array(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _rows(function, inputs, periods):
+    periods = [int(period) for period in periods]
+    out = np.empty((len(periods), len(inputs[0])))
+    for row, period in enumerate(periods):
+        out[row] = function(*inputs, timeperiod=period)
+    return out
+
+
+def ema(values, periods):
+    """`talib.EMA(values, p)` for every p."""
+    return _rows(talib.EMA, (_array(values),), periods)
+
+
+def sma(values, periods):
+    """`talib.SMA(values, p)` for every p."""
+    return _rows(talib.SMA, (_array(values),), periods)
+
+
+def rsi(values, periods):
+    """`talib.RSI(values, p)` for every p."""
+    return _rows(talib.RSI, (_array(values),), periods)
+
+
+def cci(high, low, close, periods):
+    """`talib.CCI(high, low, close, p)` for every p."""
+    return _rows(talib.CCI, (_array(high), _array(low), _array(close)), periods)
+
+
+def named(prefix, periods, matrix):
+    return {f'{prefix}{period}': row for period, row in zip(periods, matrix)}
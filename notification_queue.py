@@ -0,0 +1,233 @@
+"""Non-blocking, batched delivery of strategy trade alerts.
+
+A strategy that calls `dp.send_msg` from populate_*_trend waits for the
+message sink before it can analyse the next pair. Here the strategy only
+`put`s an alert: a kind ('buy', 'sell'), the pair, the candle and the raw
+values the message needs. A background thread formats and sends them:
+
+- alerts of the same candle are coalesced into one message, after waiting
+  `interval` seconds for the other pairs' alerts of that candle;
+- at most `rate` messages go out per `per` seconds, and alerts that arrive
+  meanwhile join the waiting batch;
+- the queue holds at most `maxsize` alerts. Beyond that the oldest are
+  dropped and counted, and the next message says how many of each kind;
+- one message lists at most `max_alerts` alerts and summarises the rest.
+
+`put` never blocks on the sink. `stats` reports queue depth, drops and
+send latency.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+logger = logging.getLogger(__name__)
+
+
+class Alert:
+    __slots__ = ('kind', 'pair', 'candle', 'fields', 'queued_at')
+
+    def __init__(self, kind, pair, candle, fields, queued_at):
+        self.kind = kind
+        self.pair = pair
+        self.candle = candle
+        self.fields = fields
+        self.queued_at = queued_at
+
+
+class NotificationQueue:
+    """Delivers `format(alert)` texts through `send(text)` on a background thread."""
+
+    def __init__(self, send, format, maxsize=1000, interval=1.0, rate=20, per=60.0, max_alerts=20,
+                 clock=time.monotonic):
+        self.send = send
+        self.format = format
+        self.maxsize = maxsize
+        self.interval = interval
+        self.rate = rate
+        self.per = per
+        self.max_alerts = max_alerts
+        self._clock = clock
+        self._pending = deque()
+        self._dropped = Counter()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._sending = False
+        self._thread = None
+        self._tokens = float(rate)
+        self._refilled = clock()
+        self._stats = {'queued': 0, 'max_depth': 0, 'dropped': 0, 'messages': 0, 'alerts': 0,
+                       'send_errors': 0}
+        self._send_seconds = deque(maxlen=256)
+        self._delay_seconds = deque(maxlen=256)
+
+    def __getstate__(self):
+        # a copy in another process (hyperopt workers) starts empty, with its
+        # own thread; alerts still pending here are delivered here
+        state = self.__dict__.copy()
+        for name in ('_cond', '_thread', '_pending', '_dropped', '_closing', '_sending'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._pending = deque()
+        self._dropped = Counter()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._sending = False
+        self._thread = None
+        atexit.register(self.close)
+
+    def put(self, kind, pair, candle, **fields):
+        """Queue an alert; returns at once whatever the sink is doing."""
+        with self._cond:
+            if self._closing:
+                return
+            if len(self._pending) >= self.maxsize:
+                self._dropped[self._pending.popleft().kind] += 1
+                self._stats['dropped'] += 1
+            self._pending.append(Alert(kind, pair, candle, fields, self._clock()))
+            self._stats['queued'] += 1
+            self._stats['max_depth'] = max(self._stats['max_depth'], len(self._pending))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='notification-queue', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _take_token(self, now):
+        """0 if a message may go out now, else seconds until one may."""
+        self._tokens = min(self.rate, self._tokens + (now - self._refilled) * self.rate / self.per)
+        self._refilled = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) * self.per / self.rate
+
+    def _next_batch(self):
+        """The oldest candle's alerts and the drop counts, once they may be sent."""
+        with self._cond:
+            while True:
+                while not self._pending and not self._dropped and not self._closing:
+                    self._cond.wait()
+                if not self._pending and not self._dropped:
+                    return None
+                now = self._clock()
+                if not self._closing:
+                    # give the other pairs of this candle time to report
+                    oldest = self._pending[0].queued_at if self._pending else now
+                    wait = oldest + self.interval - now
+                    if wait <= 0:
+                        wait = self._take_token(now)
+                    if wait > 0:
+                        self._cond.wait(wait)
+                        continue
+                candle = self._pending[0].candle if self._pending else None
+                batch = [alert for alert in self._pending if alert.candle == candle]
+                self._pending = deque(alert for alert in self._pending if alert.candle != candle)
+                dropped, self._dropped = self._dropped, Counter()
+                self._sending = True
+                return batch, dropped
+
+    def _render(self, batch, dropped):
+        """The message's paragraphs: one per alert, then any summaries."""
+        parts = []
+        for alert in batch[:self.max_alerts]:
+            try:
+                parts.append(self.format(alert))
+            except Exception as e:
+                logger.error('formatting %s alert for %s failed: %s', alert.kind, alert.pair, e)
+        rest = Counter(alert.kind for alert in batch[self.max_alerts:])
+        if rest:
+            pairs = ', '.join(alert.pair for alert in batch[self.max_alerts:])
+            parts.append(f"+{sum(rest.values())} more ({_counts(rest)}): {pairs}")
+        if dropped:
+            parts.append(f"⚠️ {sum(dropped.values())} alerts dropped under backpressure ({_counts(dropped)})")
+        return parts
+
+    def _run(self):
+        while True:
+            taken = self._next_batch()
+            if taken is None:
+                return
+            batch, dropped = taken
+            try:
+                parts = self._render(batch, dropped)
+                for part in parts:
+                    logger.info(part)
+                start = time.perf_counter()
+                try:
+                    self.send("\n\n".join(parts))
+                    error = False
+                except Exception as e:
+                    logger.error('sending message failed: %s', e)
+                    error = True
+                seconds = time.perf_counter() - start
+                now = self._clock()
+                with self._cond:
+                    self._stats['messages'] += 1
+                    self._stats['alerts'] += len(batch)
+                    self._stats['send_errors'] += error
+                    self._send_seconds.append(seconds)
+                    self._delay_seconds.extend(now - alert.queued_at for alert in batch)
+                logger.debug('sent %d alerts in %.3fs, %d queued', len(batch), seconds, len(self._pending))
+            except Exception:
+                logger.exception('notification queue worker failed')
+            finally:
+                with self._cond:
+                    self._sending = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far has been sent; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._dropped or self._sending:
+                if self._thread is None:
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        """Send what is queued without waiting for the window or rate, then stop."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats, depth=len(self._pending))
+            sends, delays = list(self._send_seconds), list(self._delay_seconds)
+        stats['send_seconds'] = _summary(sends)
+        stats['delay_seconds'] = _summary(delays)
+        return stats
+
+
+def _counts(counter):
+    return ', '.join(f"{count} {kind}" for kind, count in sorted(counter.items()))
+
+
+def _summary(values):
+    if not values:
+        return {'last': None, 'mean': None, 'max': None}
+    return {'last': values[-1], 'mean': sum(values) / len(values), 'max': max(values)}
+
+
+def notifications_from_config(strategy, send, format):
+    """A `NotificationQueue` tuned by the config's `"notifications"` dict.
+
+    Keys are the constructor's: `maxsize`, `interval`, `rate`, `per` and
+    `max_alerts`. The queue is drained when the process exits.
+    """
+    options = (getattr(strategy, 'config', None) or {}).get('notifications') or {}
+    keys = ('maxsize', 'interval', 'rate', 'per', 'max_alerts')
+    queue = NotificationQueue(send, format, **{key: options[key] for key in keys if key in options})
+    atexit.register(queue.close)
+    return queue
@@ -0,0 +1,348 @@
+"""Analyse a strategy's pairs in a persistent pool of worker processes.
+
+At candle close a live bot runs `populate_indicators` and the entry/exit
+methods for every whitelisted pair, one after another on one core. With
+`ParallelAnalysis` the strategy's `bot_loop_start` hands the whole batch to
+worker processes before freqtrade starts its per-pair loop; the pair's own
+`populate_indicators` then picks up the result instead of computing it.
+
+- Each worker loads the strategy from its file and instantiates it once,
+  with the bot config minus the options that only make sense in the main
+  process. Pairs are pinned to workers by a stable hash, so per-pair state
+  such as `incremental_indicators` stays warm across candles.
+- The batch's OHLCV goes into one shared-memory block (int64 dates, then
+  the five float64 columns, per pair). Informative pairs from
+  `informative_pairs()` get a block of their own that is only rewritten
+  when their candles change, and workers rebuild that frame once per
+  version instead of receiving a pickled copy with every task.
+- Workers send back only the requested columns (by default the signal
+  columns) and any `send_msg` text, which the main process forwards when
+  the pair is taken.
+
+A pair whose task failed or timed out, or whose dataframe changed since
+the batch was built, is simply computed in-process as before. The
+analyzed dataframe then holds OHLCV plus the returned columns only, so
+callbacks that read indicator columns from `get_analyzed_dataframe` need
+those columns listed in `columns`.
+"""
+import atexit
+import importlib.machinery
+import importlib.util
+import logging
+import os
+import pickle
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from strategy_runtime import LIVE_RUNMODES, own_method, runmode
+
+logger = logging.getLogger(__name__)
+
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+ENTRY = ('populate_entry_trend', 'populate_buy_trend')
+EXIT = ('populate_exit_trend', 'populate_sell_trend')
+# config keys a worker must not act on: they belong to the main process
+MAIN_PROCESS_OPTIONS = ('parallel_analysis', 'strategy_profiler', 'signal_journal')
+
+
+def _frame_size(rows):
+    return rows * 8 * (1 + len(OHLCV))
+
+
+def _pack(buffer, offset, dataframe):
+    rows = len(dataframe)
+    view = np.ndarray((1 + len(OHLCV), rows), dtype=np.float64, buffer=buffer, offset=offset)
+    view[0].view(np.int64)[:] = pd.DatetimeIndex(dataframe['date']).as_unit('ns').asi8
+    for index, column in enumerate(OHLCV, 1):
+        view[index] = dataframe[column].to_numpy(dtype=np.float64)
+
+
+def _unpack(buffer, offset, rows):
+    view = np.ndarray((1 + len(OHLCV), rows), dtype=np.float64, buffer=buffer, offset=offset)
+    columns = {'date': pd.to_datetime(view[0].view(np.int64).copy(), utc=True)}
+    for index, column in enumerate(OHLCV, 1):
+        columns[column] = view[index].copy()
+    return pd.DataFrame(columns)
+
+
+def _signature(dataframe):
+    dates = dataframe['date']
+    return len(dataframe), dates.iat[0], dates.iat[-1], float(dataframe['close'].iat[-1])
+
+
+class _WorkerDataProvider:
+    """What a strategy sees as `self.dp` inside a worker."""
+
+    def __init__(self, runmode):
+        self.runmode = runmode
+        self.shared = {}
+        self.frame = None
+        self.pair = None
+        self.current_time = None
+        self.messages = []
+
+    def get_pair_dataframe(self, pair, timeframe=None):
+        frame = self.shared.get((pair, timeframe))
+        if frame is None and pair == self.pair:
+            frame = self.frame
+        return frame.copy() if frame is not None else pd.DataFrame()
+
+    def get_analyzed_dataframe(self, pair, timeframe):
+        return pd.DataFrame(), None
+
+    def get_current_time(self):
+        return self.current_time
+
+    def current_whitelist(self):
+        return [self.pair]
+
+    def send_msg(self, message, **kwargs):
+        self.messages.append(message)
+
+
+_worker = {}
+
+
+def _load_class(path, name):
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    module_name = os.path.splitext(os.path.basename(path))[0]
+    # the loader is explicit because some strategy files have no .py suffix
+    loader = importlib.machinery.SourceFileLoader(module_name, path)
+    module = importlib.util.module_from_spec(importlib.util.spec_from_loader(module_name, loader))
+    sys.modules[module_name] = module
+    loader.exec_module(module)
+    return getattr(module, name)
+
+
+def _init_worker(path, name, config):
+    strategy = _load_class(path, name)(config)
+    strategy.dp = _WorkerDataProvider(runmode(config))
+    bot_start = own_method(strategy, ('bot_start',))
+    if bot_start is not None:
+        bot_start()
+    _worker.update(strategy=strategy, shared={}, blocks={})
+
+
+def _shared_frame(descriptor):
+    name, offset, rows = descriptor
+    frame = _worker['shared'].get(descriptor)
+    if frame is None:
+        block = _worker['blocks'].get(name)
+        if block is None:
+            block = _worker['blocks'][name] = shared_memory.SharedMemory(name=name)
+        frame = _unpack(block.buf, offset, rows)
+        # keep only the newest version of each informative frame
+        _worker['shared'] = {key: value for key, value in _worker['shared'].items() if key[0] != name}
+        _worker['shared'][descriptor] = frame
+    return frame
+
+
+def _analyze(pair, timeframe, batch, offset, rows, shared, current_time, columns):
+    strategy = _worker['strategy']
+    dp = strategy.dp
+    block = shared_memory.SharedMemory(name=batch)
+    try:
+        dataframe = _unpack(block.buf, offset, rows)
+    finally:
+        block.close()
+    live = {descriptor[0] for descriptor in shared.values()}
+    for name in set(_worker['blocks']) - live:
+        _worker['blocks'].pop(name).close()
+    _worker['shared'] = {key: frame for key, frame in _worker['shared'].items() if key[0] in live}
+    dp.shared = {key: _shared_frame(descriptor) for key, descriptor in shared.items()}
+    dp.pair, dp.frame, dp.current_time, dp.messages = pair, dataframe, current_time, []
+    metadata = {'pair': pair}
+    dataframe = strategy.populate_indicators(dataframe, metadata)
+    for names in (ENTRY, EXIT):
+        method = own_method(strategy, names)
+        if method is not None:
+            dataframe = method(dataframe, metadata)
+    result = {column: dataframe[column].to_numpy() for column in columns if column in dataframe.columns}
+    return result, dp.messages
+
+
+class ParallelAnalysis:
+    """A pool of `workers` processes running `class_name` from `path`.
+
+    `columns` are the dataframe columns sent back per pair. After `timeout`
+    seconds `analyze` cancels the tasks that have not started and leaves
+    those pairs to the caller. A worker still busy with a task by then is
+    stopped and replaced by a fresh one, so a hung strategy cannot hold up
+    the next batch; its pairs start cold on the new worker.
+    """
+
+    def __init__(self, path, class_name, config, workers=None, columns=('buy', 'sell'), timeout=None,
+                 start_method='spawn'):
+        self.columns = list(columns)
+        self.timeout = timeout
+        config = {key: value for key, value in config.items() if key not in MAIN_PROCESS_OPTIONS}
+        # drop whatever cannot cross the process boundary (exchange handles and the like)
+        for key, value in list(config.items()):
+            try:
+                pickle.dumps(value)
+            except Exception:
+                config.pop(key)
+        self._context = get_context(start_method)
+        self._initargs = (path, class_name, config)
+        workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        # one single-process executor per worker, so a pair always lands on the same one
+        self._executors = [self._new_executor() for _ in range(workers)]
+        self._shared = {}
+        self._results = {}
+        self._prefetched = {}
+
+    @property
+    def workers(self):
+        return len(self._executors)
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(1, mp_context=self._context, initializer=_init_worker, initargs=self._initargs)
+
+    def _slot(self, pair):
+        return zlib.crc32(pair.encode()) % len(self._executors)
+
+    def _recycle(self, slot):
+        """Stop the worker in `slot`, whatever it is doing, and start another."""
+        executor = self._executors[slot]
+        # ProcessPoolExecutor has no public way to stop a task that is running
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        self._executors[slot] = self._new_executor()
+
+    def _share(self, key, dataframe):
+        signature = _signature(dataframe)
+        current = self._shared.get(key)
+        if current is not None and current[1] == signature:
+            return current[2]
+        block = shared_memory.SharedMemory(create=True, size=max(_frame_size(len(dataframe)), 1))
+        _pack(block.buf, 0, dataframe)
+        if current is not None:
+            current[0].close()
+            current[0].unlink()
+        self._shared[key] = (block, signature, (block.name, 0, len(dataframe)))
+        return self._shared[key][2]
+
+    def analyze(self, frames, timeframe, informative=None, current_time=None):
+        """Run every `{pair: ohlcv}` in `frames` through the strategy.
+
+        `informative` maps `(pair, timeframe)` to the frames workers may ask
+        for with `get_pair_dataframe`. Returns `{pair: (columns, messages)}`
+        for the pairs that finished in time.
+        """
+        frames = {pair: frame for pair, frame in frames.items() if frame is not None and not frame.empty}
+        if not frames:
+            return {}
+        shared = {key: self._share(key, frame) for key, frame in (informative or {}).items()
+                  if frame is not None and not frame.empty}
+        for key in set(self._shared) - set(shared):
+            block = self._shared.pop(key)[0]
+            block.close()
+            block.unlink()
+        batch = shared_memory.SharedMemory(create=True, size=sum(_frame_size(len(f)) for f in frames.values()))
+        try:
+            futures = {}
+            offset = 0
+            for pair, frame in frames.items():
+                _pack(batch.buf, offset, frame)
+                futures[self._executors[self._slot(pair)].submit(_analyze, pair, timeframe, batch.name, offset, len(frame),
+                                                    shared, current_time, self.columns)] = pair
+                offset += _frame_size(len(frame))
+            done, pending = wait(futures, timeout=self.timeout)
+            # workers copy their frames out of shared memory, so a running
+            # task can be abandoned: its mapping outlives the unlink below
+            hung = {self._slot(futures[future]) for future in pending if not future.cancel()}
+            if pending:
+                logger.warning('parallel analysis: %d of %d pairs timed out, restarting %d workers',
+                               len(pending), len(frames), len(hung))
+            for slot in hung:
+                self._recycle(slot)
+        finally:
+            batch.close()
+            batch.unlink()
+        results = {}
+        for future in done:
+            pair = futures[future]
+            try:
+                results[pair] = future.result()
+            except Exception as e:
+                logger.error('parallel analysis of %s failed: %s', pair, e)
+        return results
+
+    def prefetch(self, strategy, current_time=None):
+        """Analyse the whitelist pairs that have a new candle, for `take` to hand out.
+
+        freqtrade calls `bot_loop_start` every few seconds, not once per
+        candle, so pairs already sent with their current candles are skipped.
+        """
+        dp = strategy.dp
+        pairs = dp.current_whitelist()
+        frames = {pair: dp.get_pair_dataframe(pair, strategy.timeframe) for pair in pairs}
+        signatures = {pair: _signature(frame) for pair, frame in frames.items()
+                      if frame is not None and not frame.empty}
+        self._prefetched = {pair: signature for pair, signature in self._prefetched.items() if pair in signatures}
+        self._results = {pair: result for pair, result in self._results.items()
+                         if signatures.get(pair) == result[0]}
+        frames = {pair: frames[pair] for pair, signature in signatures.items()
+                  if self._prefetched.get(pair) != signature}
+        if not frames:
+            return
+        informative = {(pair, timeframe): dp.get_pair_dataframe(pair, timeframe)
+                       for pair, timeframe in strategy.informative_pairs()}
+        results = self.analyze(frames, strategy.timeframe, informative, current_time)
+        # a pair that failed or timed out is computed in-process, not resent
+        self._prefetched.update((pair, signatures[pair]) for pair in frames)
+        self._results.update((pair, (signatures[pair], columns, messages))
+                             for pair, (columns, messages) in results.items())
+
+    def take(self, pair, dataframe, dp=None):
+        """The worker's columns for `dataframe`, or None to compute in-process.
+
+        Messages the worker sent go out through `dp.send_msg` now.
+        """
+        result = self._results.pop(pair, None)
+        if result is None or dataframe.empty or result[0] != _signature(dataframe):
+            return None
+        signature, columns, messages = result
+        if dp is not None:
+            for message in messages:
+                dp.send_msg(message)
+        return pd.DataFrame(columns, index=dataframe.index)
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+        for block, _, _ in self._shared.values():
+            block.close()
+            block.unlink()
+        self._shared = {}
+
+
+def parallel_from_config(strategy, columns=('buy', 'sell')):
+    """A `ParallelAnalysis` if the config has `"parallel_analysis"`; else None.
+
+    `"parallel_analysis": true` uses one worker per core but one; a dict may
+    set `workers`, `columns` (extra ones to send back), `timeout` and
+    `start_method`. Only live and dry-run bots use it.
+    """
+    config = getattr(strategy, 'config', None) or {}
+    options = config.get('parallel_analysis')
+    if not options or runmode(config) not in LIVE_RUNMODES:
+        return None
+    if options is True:
+        options = {}
+    module = sys.modules.get(type(strategy).__module__)
+    path = getattr(module, '__file__', None) or type(strategy).populate_indicators.__code__.co_filename
+    analysis = ParallelAnalysis(path, type(strategy).__name__, config, workers=options.get('workers'),
+                                columns=list(columns) + list(options.get('columns', ())),
+                                timeout=options.get('timeout'), start_method=options.get('start_method', 'spawn'))
+    atexit.register(analysis.close)
+    return analysis
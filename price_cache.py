@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def granularity_ttl(days):
+    """Seconds between points CoinGecko returns for a market_chart of `days`."""
+    days = float(days)
+    if days <= 1:
+        return 5 * 60       # 5-minute candles
+    if days <= 90:
+        return 60 * 60      # hourly candles
+    return 24 * 60 * 60     # daily candles
+
+
+class Expiring:
+    """Loader result that should be cached for `ttl` seconds instead of the default."""
+
+    def __init__(self, value, ttl):
+        self.value = value
+        self.ttl = ttl
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PriceCache:
+    """TTL + LRU cache with single-flight loading.
+
+    Concurrent `get` calls for a missing key wait on the one caller that is
+    already loading it instead of hitting the upstream themselves.
+    """
+
+    def __init__(self, maxsize=256, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def ttl_for(self, key):
+        if self.ttl is not None:
+            return self.ttl
+        # keys are (symbol, currency, days)
+        return granularity_ttl(key[-1])
+
+    def get(self, key, loader):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+                self.misses += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader()
+            ttl = None
+            if isinstance(value, Expiring):
+                value, ttl = value.value, value.ttl
+            flight.value = value
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            self.set(key, flight.value, ttl)
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl_for(key)
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'inflight': len(self._flights),
+            }
@@ -0,0 +1,133 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class _SymbolState:
+    def __init__(self, next_due):
+        self.next_due = next_due
+        self.failures = 0
+        self.refreshes = deque()
+        self.snapshot = None
+
+
+class SignalRefresher:
+    """Refreshes `analyze(symbol)` for a fixed set of symbols on a background thread.
+
+    Each symbol is refreshed every `interval` seconds (+/- `jitter`), backs off
+    exponentially up to `max_backoff` while the upstream fails, and is never
+    refreshed more than `budget` times per `budget_window` seconds. Readers get
+    the last good result from `snapshot` without touching the upstream.
+    """
+
+    def __init__(self, analyze, symbols, interval=60.0, jitter=5.0, max_backoff=900.0,
+                 budget=120, budget_window=3600.0, stale_after=None,
+                 clock=time.monotonic, wall_clock=time.time):
+        self.analyze = analyze
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.budget_window = budget_window
+        self.stale_after = stale_after if stale_after is not None else 3 * interval
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._random = random.Random()
+        now = clock()
+        self._state = {symbol: _SymbolState(now) for symbol in self.symbols}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _jittered(self, delay):
+        return max(0.0, delay + self._random.uniform(-self.jitter, self.jitter))
+
+    def _within_budget(self, state, now):
+        while state.refreshes and state.refreshes[0] <= now - self.budget_window:
+            state.refreshes.popleft()
+        if len(state.refreshes) < self.budget:
+            return True
+        state.next_due = state.refreshes[0] + self.budget_window
+        return False
+
+    def refresh(self, symbol):
+        state = self._state[symbol]
+        now = self._clock()
+        state.refreshes.append(now)
+        try:
+            result = self.analyze(symbol)
+        except Exception as e:
+            state.failures += 1
+            backoff = min(self.interval * 2 ** state.failures, self.max_backoff)
+            state.next_due = now + self._jittered(backoff)
+            logger.warning('refresh of %s failed (%d in a row): %s', symbol, state.failures, e)
+            with self._lock:
+                if state.snapshot is not None:
+                    state.snapshot = dict(state.snapshot, error=str(e), failures=state.failures)
+            return False
+        state.failures = 0
+        state.next_due = now + self._jittered(self.interval)
+        with self._lock:
+            state.snapshot = {
+                'result': result,
+                'updated_at': self._wall_clock(),
+                'refreshed_at': now,
+                'error': None,
+                'failures': 0,
+            }
+        return True
+
+    def run_pending(self):
+        """Refresh every symbol that is due; returns seconds until the next one is."""
+        now = self._clock()
+        for symbol, state in self._state.items():
+            if state.next_due <= now and self._within_budget(state, now):
+                self.refresh(symbol)
+        return max(0.0, min(s.next_due for s in self._state.values()) - self._clock())
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                delay = self.run_pending()
+            except Exception:
+                logger.exception('signal refresher loop failed')
+                delay = self.interval
+            self._stop.wait(delay)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='signal-refresher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def snapshot(self, symbol):
+        state = self._state.get(symbol)
+        if state is None:
+            return None
+        with self._lock:
+            snap = state.snapshot
+        if snap is None:
+            return None
+        age = self._clock() - snap['refreshed_at']
+        return {
+            'result': snap['result'],
+            'updated_at': snap['updated_at'],
+            'age': age,
+            'stale': age > self.stale_after,
+            'error': snap['error'],
+            'failures': snap['failures'],
+        }
+
+    def snapshots(self):
+        return {symbol: self.snapshot(symbol) for symbol in self.symbols}
@@ -0,0 +1,63 @@
+import threading
+
+import numpy as np
+
+
+class RingSeries:
+    """Fixed-capacity ring buffer of (timestamp, price) points, oldest first.
+
+    New points are merged in at the tail; once `capacity` is reached the
+    oldest points are overwritten, so memory stays constant however long the
+    service runs.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._timestamps = np.empty(capacity)
+        self._prices = np.empty(capacity)
+        self._start = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def last_timestamp(self):
+        if not self._count:
+            return None
+        return float(self._timestamps[(self._start + self._count - 1) % self.capacity])
+
+    def extend(self, timestamps, prices, min_spacing=0.0):
+        """Append points newer than the tail, keeping at least `min_spacing` between them."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        with self._lock:
+            last = self.last_timestamp
+            added = 0
+            for ts, price in zip(timestamps.tolist(), prices.tolist()):
+                if last is not None and ts - last < max(min_spacing, 1e-9):
+                    continue
+                end = (self._start + self._count) % self.capacity
+                self._timestamps[end] = ts
+                self._prices[end] = price
+                if self._count == self.capacity:
+                    self._start = (self._start + 1) % self.capacity
+                else:
+                    self._count += 1
+                last = ts
+                added += 1
+            return added
+
+    def trim(self, min_timestamp):
+        """Drop points older than `min_timestamp`."""
+        with self._lock:
+            while self._count and self._timestamps[self._start] < min_timestamp:
+                self._start = (self._start + 1) % self.capacity
+                self._count -= 1
+
+    def arrays(self):
+        """Ordered `(timestamps, prices)` copies of the buffered points."""
+        with self._lock:
+            idx = (self._start + np.arange(self._count)) % self.capacity
+            return self._timestamps[idx], self._prices[idx]
@@ -0,0 +1,116 @@
+import json
+import struct
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional, only needed for Arrow IPC responses
+    pa = None
+
+COLUMNAR_MIMETYPE = 'application/vnd.coingecko-series.columnar'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+_MAGIC = b'CGSR'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHI')
+
+
+def encode_columnar(columns):
+    """Encode equal-length float columns as one little-endian binary blob.
+
+    Layout: magic `CGSR`, uint16 version, uint16 column count, uint32 row
+    count, then per column a uint16 name length and UTF-8 name, zero padding
+    to an 8-byte boundary, and finally each column as contiguous float64.
+    """
+    names = list(columns)
+    arrays = [np.ascontiguousarray(columns[name], dtype='<f8') for name in names]
+    rows = len(arrays[0]) if arrays else 0
+    parts = [_HEADER.pack(_MAGIC, _VERSION, len(names), rows)]
+    for name in names:
+        encoded = name.encode()
+        parts.append(struct.pack('<H', len(encoded)) + encoded)
+    size = sum(len(p) for p in parts)
+    parts.append(b'\0' * (-size % 8))
+    parts.extend(a.tobytes() for a in arrays)
+    return b''.join(parts)
+
+
+def decode_columnar(data):
+    """Inverse of `encode_columnar`; returns a dict of zero-copy float64 views."""
+    magic, version, ncols, rows = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError('not a CGSR v1 payload')
+    offset = _HEADER.size
+    names = []
+    for _ in range(ncols):
+        (length,) = struct.unpack_from('<H', data, offset)
+        offset += 2
+        names.append(bytes(data[offset:offset + length]).decode())
+        offset += length
+    offset += -offset % 8
+    return {name: np.frombuffer(data, dtype='<f8', count=rows, offset=offset + i * rows * 8)
+            for i, name in enumerate(names)}
+
+
+def encode_arrow(columns):
+    if pa is None:
+        raise RuntimeError('pyarrow is not installed')
+    table = pa.table({name: pa.array(np.asarray(values, dtype=np.float64), from_pandas=True)
+                      for name, values in columns.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_json(columns):
+    """JSON with NaN mapped to null, which `jsonify` would emit as invalid `NaN`."""
+    out = {}
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=np.float64)
+        out[name] = [None if v != v else v for v in values.tolist()]
+    return json.dumps({'rows': len(next(iter(out.values()), [])), 'columns': out})
+
+
+def lttb_indices(x, y, threshold):
+    """Indices picked by Largest-Triangle-Three-Buckets down to `threshold` points."""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    every = (n - 2) / (threshold - 2)
+    picked = np.empty(threshold, dtype=np.intp)
+    picked[0] = 0
+    picked[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        stop = int((i + 1) * every) + 1
+        next_stop = min(int((i + 2) * every) + 1, n)
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a])
+                      - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def minmax_indices(y, threshold):
+    """Indices of the min and max of `y` in each of `threshold // 2` buckets, in order."""
+    n = len(y)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = threshold // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.intp)
+    picked = []
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop <= start:
+            continue
+        chunk = y[start:stop]
+        lo, hi = start + int(np.argmin(chunk)), start + int(np.argmax(chunk))
+        picked.extend(sorted({lo, hi}))
+    return np.asarray(picked, dtype=np.intp)
@@ -0,0 +1,56 @@
+import os
+import re
+import threading
+
+import numpy as np
+
+
+class SeriesStore:
+    """On-disk columnar store for market_chart series.
+
+    Each (symbol, currency, days) series is one `.npy` file holding a 2 x N
+    float64 array: row 0 the millisecond timestamps, row 1 the prices, each
+    contiguous. Reads are memory-mapped so every gunicorn worker shares the
+    same pages; writes go to a temp file that is atomically renamed over the
+    old one, which leaves readers holding the previous mapping unaffected.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        name = '-'.join(re.sub(r'[^A-Za-z0-9_.]', '_', str(part)) for part in key)
+        return os.path.join(self.directory, f'{name}.npy')
+
+    def read(self, key):
+        """Return `(timestamps, prices)` views of the stored series, or None."""
+        try:
+            data = np.load(self.path(key), mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            return None
+        return data[0], data[1]
+
+    def append(self, key, timestamps, prices):
+        """Merge points newer than the stored tail, trim to the window and persist."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        with self._lock:
+            current = self.read(key)
+            if current is not None and len(current[0]):
+                newer = timestamps > current[0][-1]
+                if not newer.any():
+                    return current
+                timestamps = np.concatenate([current[0], timestamps[newer]])
+                prices = np.concatenate([current[1], prices[newer]])
+            window_ms = float(key[-1]) * 86400 * 1000
+            keep = timestamps >= timestamps[-1] - window_ms if len(timestamps) else slice(None)
+            data = np.ascontiguousarray(np.stack([timestamps[keep], prices[keep]]))
+
+            path = self.path(key)
+            tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                np.save(f, data)
+            os.replace(tmp, path)
+        return self.read(key)
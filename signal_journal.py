@@ -0,0 +1,299 @@
+"""Append-only journal of strategy signals with memory-mapped replay.
+
+Each (strategy, pair) gets one binary file of fixed-size records: candle
+timestamp, a hash of the candle's OHLCV, a bit per signal column
+(`buy`/`sell`, `enter_long`/`exit_long`, ...), the entry tag as an index
+into a side file of tag strings, and the float64 indicator values that
+drove the decision. A JSON header names the columns. `record` appends the
+candles newer than the last journaled one; `replay` memory-maps the file
+and rebuilds the signal frame for a date range without touching the
+strategy. `signals_for` returns that frame only when every candle of a
+dataframe is journaled with identical OHLCV, for comparing a run against
+an earlier one. The journal is a post-trade analysis and replay tool:
+strategies still compute their indicators and signals on every run.
+
+Journals live under `<directory>/<strategy>-<fingerprint>/`. The
+fingerprint hashes the strategy source and parameters, so editing either
+starts a fresh journal and leaves the old one readable. Live and dry-run
+bots append to one file per pair. A backtest gets one file per pair and
+date span (`segment`), because indicator warm-up and windows anchored to
+the last candle make its signals depend on where the data starts and
+ends; `save` and `segment` pick the right file for the runmode.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from strategy_runtime import LIVE_RUNMODES, runmode
+
+MAGIC = b'SJNL\x01\x00\x00\x00'
+HEADER_ALIGN = 64
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+
+def candle_hash(dataframe):
+    """64-bit FNV-style hash of each row's OHLCV bit patterns."""
+    h = np.full(len(dataframe), 0xcbf29ce484222325, dtype=np.uint64)
+    prime = np.uint64(0x100000001b3)
+    for column in OHLCV:
+        bits = np.ascontiguousarray(dataframe[column].to_numpy(dtype=np.float64)).view(np.uint64)
+        h = (h ^ bits) * prime
+    return h
+
+
+def _timestamps(dates):
+    return pd.DatetimeIndex(dates).as_unit('ns').asi8
+
+
+def fingerprint(strategy, *extra):
+    """Short hash of the strategy's source file, parameters and `extra`."""
+    digest = hashlib.sha1(type(strategy).__name__.encode())
+    module = sys.modules.get(type(strategy).__module__)
+    path = getattr(module, '__file__', None) or type(strategy).populate_indicators.__code__.co_filename
+    try:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    except OSError:
+        pass
+    params = {name: getattr(strategy, name, None)
+              for name in ('timeframe', 'buy_params', 'sell_params', 'minimal_roi', 'stoploss')}
+    for name in dir(type(strategy)):
+        value = getattr(type(strategy), name, None)
+        if hasattr(value, 'value') and hasattr(value, 'optimize'):
+            params[name] = value.value
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    digest.update(repr(extra).encode())
+    return digest.hexdigest()[:12]
+
+
+class _File:
+    """One journal file: header, records and the tag side file."""
+
+    def __init__(self, path, header):
+        self.path = path
+        self.tags_path = path + '.tags'
+        self.dtype = np.dtype([('date', '<i8'), ('inputs', '<u8'), ('tag', '<u4'), ('flags', 'u1'),
+                               ('values', '<f8', (len(header['values']),))], align=True)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                stored = self._read_header(f)
+            if stored['signals'] != header['signals'] or stored['values'] != header['values'] \
+                    or stored['tag'] != header['tag']:
+                raise ValueError(f'{path} was written with different columns')
+            self.header = stored
+            self._truncate_partial()
+        else:
+            self.header = header
+            self._write_header()
+        self.tags = ['']
+        if os.path.exists(self.tags_path):
+            with open(self.tags_path, encoding='utf-8') as f:
+                self.tags += f.read().split('\n')[:-1]
+        self.tag_ids = {tag: index for index, tag in enumerate(self.tags)}
+        records = self.records()
+        self.last = int(records['date'][-1]) if len(records) else None
+
+    @staticmethod
+    def _read_header(f):
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('not a signal journal')
+        size = int.from_bytes(f.read(4), 'little')
+        header = json.loads(f.read(size))
+        header['offset'] = -(-(len(MAGIC) + 4 + size) // HEADER_ALIGN) * HEADER_ALIGN
+        return header
+
+    def _write_header(self):
+        payload = json.dumps(self.header, sort_keys=True).encode()
+        offset = -(-(len(MAGIC) + 4 + len(payload)) // HEADER_ALIGN) * HEADER_ALIGN
+        blob = MAGIC + len(payload).to_bytes(4, 'little') + payload
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(blob.ljust(offset, b'\0'))
+        os.replace(tmp, self.path)
+        self.header = dict(self.header, offset=offset)
+
+    def _truncate_partial(self):
+        # a crash mid-append leaves a partial record; drop it
+        size = os.path.getsize(self.path) - self.header['offset']
+        if size % self.dtype.itemsize:
+            with open(self.path, 'r+b') as f:
+                f.truncate(self.header['offset'] + size - size % self.dtype.itemsize)
+
+    def records(self):
+        count = (os.path.getsize(self.path) - self.header['offset']) // self.dtype.itemsize
+        if count <= 0:
+            return np.empty(0, dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode='r', offset=self.header['offset'], shape=(count,))
+
+    def tag_id(self, tag, pending):
+        index = self.tag_ids.get(tag)
+        if index is None:
+            index = self.tag_ids[tag] = len(self.tags)
+            self.tags.append(tag)
+            pending.append(tag)
+        return index
+
+    def append(self, rows, new_tags):
+        if new_tags:
+            with open(self.tags_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(f'{tag}\n' for tag in new_tags))
+        with open(self.path, 'ab') as f:
+            f.write(rows.tobytes())
+        self.last = int(rows['date'][-1])
+
+
+class SignalJournal:
+    """Signals of one strategy, one journal file per pair.
+
+    `signals` are the 0/1 columns to keep (at most 8), `tag` the entry tag
+    column or None, `values` the indicator columns worth keeping.
+    """
+
+    def __init__(self, directory, strategy, fingerprint, signals=('buy', 'sell'), tag=None, values=(),
+                 backtest=False):
+        if len(signals) > 8:
+            raise ValueError('at most 8 signal columns fit the flags byte')
+        self.directory = os.path.join(directory, f'{strategy}-{fingerprint}')
+        self.strategy = strategy
+        self.signals = list(signals)
+        self.tag = tag
+        self.values = list(values)
+        self.backtest = backtest
+        self._files = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, pair, segment=None):
+        name = re.sub(r'[^A-Za-z0-9_.]', '_', pair)
+        if segment is not None:
+            name += '@' + segment
+        return os.path.join(self.directory, f'{name}.sjnl')
+
+    def _file(self, pair, segment=None, create=True):
+        path = self.path(pair, segment)
+        journal = self._files.get(path)
+        if journal is None:
+            if not create and not os.path.exists(path):
+                return None
+            header = {'strategy': self.strategy, 'pair': pair, 'signals': self.signals, 'tag': self.tag,
+                      'values': self.values, 'segment': segment}
+            journal = self._files[path] = _File(path, header)
+        return journal
+
+    def record(self, pair, dataframe, segment=None):
+        """Append the rows of `dataframe` newer than the last journaled candle."""
+        if dataframe.empty:
+            return 0
+        with self._lock:
+            journal = self._file(pair, segment)
+            dates = _timestamps(dataframe['date'])
+            start = 0 if journal.last is None else int(np.searchsorted(dates, journal.last, side='right'))
+            if start >= len(dates):
+                return 0
+            frame = dataframe.iloc[start:]
+            rows = np.zeros(len(frame), dtype=journal.dtype)
+            rows['date'] = dates[start:]
+            rows['inputs'] = candle_hash(frame)
+            flags = np.zeros(len(frame), dtype=np.uint8)
+            for bit, column in enumerate(self.signals):
+                if column in frame.columns:
+                    flags |= (frame[column].fillna(0).to_numpy() == 1).astype(np.uint8) << bit
+            rows['flags'] = flags
+            new_tags = []
+            if self.tag is not None and self.tag in frame.columns:
+                rows['tag'] = [journal.tag_id(tag, new_tags) if isinstance(tag, str) and tag else 0
+                               for tag in frame[self.tag].to_numpy()]
+            for index, column in enumerate(self.values):
+                if column in frame.columns:
+                    rows['values'][:, index] = frame[column].to_numpy(dtype=np.float64)
+                else:
+                    rows['values'][:, index] = np.nan
+            journal.append(rows, new_tags)
+            return len(rows)
+
+    def replay(self, pair, start=None, end=None, segment=None):
+        """Journaled signals for `start <= date <= end` as a DataFrame, or None."""
+        with self._lock:
+            journal = self._file(pair, segment, create=False)
+            if journal is None:
+                return None
+            records = journal.records()
+            tags = list(journal.tags)
+        dates = records['date']
+        lo = 0 if start is None else int(np.searchsorted(dates, _timestamps([pd.Timestamp(start)])[0]))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, _timestamps([pd.Timestamp(end)])[0],
+                                                                side='right'))
+        return self._frame(records[lo:hi], tags)
+
+    def signals_for(self, pair, dataframe, segment=None):
+        """The journaled frame for exactly `dataframe`'s candles, or None if
+        any candle is missing or its OHLCV changed."""
+        if dataframe.empty:
+            return None
+        with self._lock:
+            journal = self._file(pair, segment, create=False)
+            if journal is None:
+                return None
+            records = journal.records()
+            tags = list(journal.tags)
+        dates = _timestamps(dataframe['date'])
+        lo = int(np.searchsorted(records['date'], dates[0]))
+        window = records[lo:lo + len(dates)]
+        if len(window) != len(dates) or not np.array_equal(window['date'], dates) \
+                or not np.array_equal(window['inputs'], candle_hash(dataframe)):
+            return None
+        frame = self._frame(window, tags)
+        frame.index = dataframe.index
+        return frame
+
+    def segment(self, dataframe):
+        """The file segment `save` uses for `dataframe`: its date span in a
+        backtest, None for live and dry-run bots."""
+        if not self.backtest or dataframe.empty:
+            return None
+        dates = pd.DatetimeIndex(dataframe['date'][[dataframe.index[0], dataframe.index[-1]]])
+        return '-'.join(dates.strftime('%Y%m%dT%H%M%S'))
+
+    def save(self, pair, dataframe):
+        """Journal a freshly populated frame in the file for this runmode."""
+        return self.record(pair, dataframe, self.segment(dataframe))
+
+    def _frame(self, records, tags):
+        columns = {'date': pd.to_datetime(np.asarray(records['date']), utc=True)}
+        flags = np.asarray(records['flags'])
+        for bit, column in enumerate(self.signals):
+            columns[column] = ((flags >> bit) & 1).astype(np.int64)
+        if self.tag is not None:
+            lookup = np.array(tags, dtype=object)
+            columns[self.tag] = lookup[np.asarray(records['tag'])]
+            columns[self.tag][columns[self.tag] == ''] = None
+        values = np.asarray(records['values'])
+        for index, column in enumerate(self.values):
+            columns[column] = values[:, index]
+        return pd.DataFrame(columns)
+
+
+def journal_from_config(strategy, signals=('buy', 'sell'), tag=None, values=()):
+    """A `SignalJournal` if the config has `"signal_journal"`; else None.
+
+    `"signal_journal": true` writes under user_data/signal_journal; a dict
+    may set `directory`. Hyperopt never journals, since it re-runs the entry
+    and exit logic with parameters the fingerprint does not see.
+    """
+    config = getattr(strategy, 'config', None) or {}
+    options = config.get('signal_journal')
+    mode = runmode(config)
+    if not options or (mode not in LIVE_RUNMODES and mode != 'backtest'):
+        return None
+    if options is True:
+        options = {}
+    directory = options.get('directory', os.path.join('user_data', 'signal_journal'))
+    return SignalJournal(directory, type(strategy).__name__,
+                         fingerprint(strategy, tuple(signals), tag, tuple(values)),
+                         signals=signals, tag=tag, values=values, backtest=mode == 'backtest')
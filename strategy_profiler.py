@@ -0,0 +1,366 @@
+"""Opt-in profiler that attributes strategy time to dataframe columns.
+
+`StrategyProfiler.attach(strategy)` wraps the strategy's
+`populate_indicators`/`populate_*_trend` methods. While one of them runs,
+its dataframe records every `df[column] = ...` and `df.loc[..., column] =
+...`. The wall time (and, with `memory=True`, the tracemalloc high-water
+allocation) since the previous assignment is charged to that column,
+because that is where the right-hand side was computed. Helper calls made
+through the strategy module's globals (its own functions such as `EWO` and
+`williams_r`, and anything reached through `ta.`, `talib.`, `qtpylib.`,
+`pta.` or the repo's indicator modules) are timed as children of the
+column they feed. Totals accumulate across pairs and candles until
+`report()` / `write_collapsed()`; the collapsed-stack output feeds
+flamegraph.pl or speedscope directly. Under `incremental_indicators` the
+engine fills columns in its own frames, so that time shows up as
+`(unassigned)` with the helper calls broken out beneath it.
+
+Nothing is wrapped unless a profiler is attached, so a strategy without
+one runs exactly as before. `profile_from_config(strategy)` attaches one
+when the bot config has `"strategy_profiler": true` (or a dict with
+`report`, `stacks` and `memory`), and writes both files at exit.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import types
+from collections import defaultdict
+
+from pandas import DataFrame
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('populate_indicators', 'populate_entry_trend', 'populate_exit_trend',
+           'populate_buy_trend', 'populate_sell_trend')
+# modules whose functions count as helpers when a strategy calls them
+HELPER_MODULES = ('talib', 'pandas_ta', 'freqtrade.vendor.qtpylib', 'technical', 'multi_period',
+                  'ichimoku_kernel', 'indicators', 'informative_features', 'market_regime')
+UNASSIGNED = '(unassigned)'
+_MISSING = object()
+
+
+def _is_helper_module(name):
+    return any(name == prefix or name.startswith(prefix + '.') for prefix in HELPER_MODULES)
+
+
+class _Scope:
+    __slots__ = ('start', 'children', 'memory', 'peak')
+
+    def __init__(self, start, memory):
+        self.start = start
+        self.children = 0.0
+        self.memory = memory
+        self.peak = memory
+
+
+class _Run:
+    """State of one populate_* call: the open segment and its helper stack."""
+
+    def __init__(self, profiler, method):
+        self.profiler = profiler
+        self.method = method
+        self.helpers = []
+        self.pending = []
+        self.segment = profiler._open()
+
+    def assigned(self, column, last=False):
+        profiler = self.profiler
+        seconds, allocated = profiler._close(self.segment)
+        for path, spent, total, memory in self.pending:
+            profiler._add((self.method, column) + path, spent, total, memory)
+        profiler._add((self.method, column), seconds - self.segment.children, seconds, allocated)
+        self.pending = []
+        self.segment = None if last else profiler._open()
+
+
+class _ProfiledLoc:
+    def __init__(self, frame, indexer):
+        self._frame = frame
+        self._indexer = indexer
+
+    def __getattr__(self, name):
+        return getattr(self._indexer, name)
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __setitem__(self, key, value):
+        column = key[1] if isinstance(key, tuple) and len(key) > 1 else key
+        self._indexer[key] = value
+        self._frame._profiler_assigned(column)
+
+
+class _ProfiledFrame(DataFrame):
+    """A DataFrame that reports column assignments to the running profile.
+
+    Only ever produced by swapping `__class__` on the frame handed to a
+    wrapped method; anything derived from it is a plain DataFrame again.
+    """
+
+    @property
+    def _constructor(self):
+        return DataFrame
+
+    def __setitem__(self, key, value):
+        DataFrame.__setitem__(self, key, value)
+        self._profiler_assigned(key)
+
+    @property
+    def loc(self):
+        return _ProfiledLoc(self, DataFrame.loc.__get__(self))
+
+    def _profiler_assigned(self, key):
+        run = _current_run()
+        if run is not None:
+            run.assigned(key if isinstance(key, str) else str(key))
+
+
+_local = threading.local()
+
+
+def _current_run():
+    runs = getattr(_local, 'runs', None)
+    return runs[-1] if runs else None
+
+
+class StrategyProfiler:
+    def __init__(self, memory=True):
+        self.memory = memory
+        # path -> [seconds (self), bytes, calls, seconds (inclusive)]
+        self._totals = defaultdict(lambda: [0.0, 0, 0, 0.0])
+        self._lock = threading.Lock()
+        self._patched = []
+        self._started_tracing = False
+
+    # attaching ---------------------------------------------------------
+
+    def attach(self, strategy):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        for name in METHODS:
+            function = getattr(type(strategy), name, None)
+            # IStrategy's own defaults only forward to the legacy names
+            if function is None or function.__module__.startswith('freqtrade'):
+                continue
+            self._patch(vars(strategy), name, self._wrap_method(name, getattr(strategy, name)))
+        # the strategy module's namespace: its helpers and indicator libraries
+        namespace = type(strategy).populate_indicators.__globals__
+        for name, value in list(namespace.items()):
+            wrapped = self._wrap_global(name, value, namespace.get('__name__', ''))
+            if wrapped is not None:
+                self._patch(namespace, name, wrapped)
+        return self
+
+    def detach(self):
+        for namespace, name, original in reversed(self._patched):
+            if original is _MISSING:
+                namespace.pop(name, None)
+            else:
+                namespace[name] = original
+        self._patched = []
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _patch(self, namespace, name, replacement):
+        self._patched.append((namespace, name, namespace.get(name, _MISSING)))
+        namespace[name] = replacement
+
+    def _wrap_method(self, name, method):
+        profiler = self
+
+        def profiled(dataframe, metadata, *args, **kwargs):
+            runs = getattr(_local, 'runs', None)
+            if runs is None:
+                runs = _local.runs = []
+            swapped = type(dataframe) is DataFrame
+            if swapped:
+                dataframe.__class__ = _ProfiledFrame
+            run = _Run(profiler, name)
+            runs.append(run)
+            try:
+                result = method(dataframe, metadata, *args, **kwargs)
+            finally:
+                runs.pop()
+                if swapped:
+                    dataframe.__class__ = DataFrame
+                run.assigned(UNASSIGNED, last=True)
+            if type(result) is _ProfiledFrame:
+                result.__class__ = DataFrame
+            return result
+
+        profiled.__wrapped__ = method
+        return profiled
+
+    def _wrap_global(self, name, value, module_name):
+        if name.startswith('__'):
+            return None
+        if isinstance(value, types.ModuleType):
+            return _HelperModule(self, name, value) if _is_helper_module(value.__name__) else None
+        if isinstance(value, type) or not callable(value):
+            return None
+        owner = getattr(value, '__module__', None) or ''
+        if owner == module_name or _is_helper_module(owner):
+            return self.helper(name, value)
+        return None
+
+    def helper(self, name, function):
+        """`function` timed as a helper called `name` when inside a profiled method."""
+        profiler = self
+
+        def timed(*args, **kwargs):
+            run = _current_run()
+            if run is None:
+                return function(*args, **kwargs)
+            scope = profiler._open()
+            run.helpers.append(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                path = tuple(run.helpers)
+                run.helpers.pop()
+                seconds, allocated = profiler._close(scope)
+                run.pending.append((path, seconds - scope.children, seconds, allocated))
+                scopes = profiler._scopes()
+                if scopes:
+                    scopes[-1].children += seconds
+
+        timed.__wrapped__ = function
+        timed.__name__ = getattr(function, '__name__', name)
+        return timed
+
+    # measuring -----------------------------------------------------------
+
+    def _scopes(self):
+        scopes = getattr(_local, 'scopes', None)
+        if scopes is None:
+            scopes = _local.scopes = []
+        return scopes
+
+    def _traced(self):
+        if not self.memory or not tracemalloc.is_tracing():
+            return 0
+        current, peak = tracemalloc.get_traced_memory()
+        # fold the high-water mark into every open scope before resetting it
+        for scope in self._scopes():
+            scope.peak = max(scope.peak, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def _open(self):
+        scope = _Scope(time.perf_counter(), self._traced())
+        self._scopes().append(scope)
+        return scope
+
+    def _close(self, scope):
+        self._traced()
+        seconds = time.perf_counter() - scope.start
+        scopes = self._scopes()
+        if scope in scopes:
+            scopes.remove(scope)
+        return seconds, max(0, scope.peak - scope.memory)
+
+    def _add(self, path, own, total, allocated):
+        with self._lock:
+            entry = self._totals[path]
+            entry[0] += own
+            entry[1] += allocated
+            entry[2] += 1
+            entry[3] += total
+
+    # reporting ---------------------------------------------------------
+
+    def columns(self):
+        """`{(method, column): {'seconds', 'bytes', 'calls'}}`, helpers included in seconds."""
+        out = {}
+        with self._lock:
+            for path, (own, allocated, calls, total) in self._totals.items():
+                if len(path) == 2:
+                    out[path] = {'seconds': total, 'bytes': allocated, 'calls': calls}
+        return out
+
+    def report(self, limit=40):
+        columns = sorted(self.columns().items(), key=lambda item: item[1]['seconds'], reverse=True)
+        grand = sum(stats['seconds'] for _, stats in columns) or 1.0
+        lines = [f'{"method":<22} {"column":<28} {"calls":>7} {"total ms":>10} {"mean ms":>9} '
+                 f'{"peak KiB":>10} {"share":>6}']
+        for (method, column), stats in columns[:limit]:
+            calls = max(stats['calls'], 1)
+            lines.append(f'{method:<22} {column[:28]:<28} {stats["calls"]:>7} {stats["seconds"] * 1e3:>10.2f} '
+                         f'{stats["seconds"] * 1e3 / calls:>9.3f} {stats["bytes"] / 1024 / calls:>10.1f} '
+                         f'{100 * stats["seconds"] / grand:>5.1f}%')
+        helpers = defaultdict(float)
+        with self._lock:
+            for path, (own, _, _, _) in self._totals.items():
+                if len(path) > 2:
+                    helpers[path[-1]] += own
+        if helpers:
+            lines.append('')
+            lines.append(f'{"helper (self time)":<51} {"total ms":>10}')
+            for name, seconds in sorted(helpers.items(), key=lambda item: item[1], reverse=True)[:limit]:
+                lines.append(f'{name:<51} {seconds * 1e3:>10.2f}')
+        return '\n'.join(lines)
+
+    def collapsed(self):
+        """Collapsed stacks (`a;b;c microseconds`) of self time."""
+        with self._lock:
+            items = sorted(self._totals.items())
+        return ''.join(f'{";".join(path)} {int(round(own * 1e6))}\n'
+                       for path, (own, _, _, _) in items if own > 0)
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+
+
+class _HelperModule:
+    """Stand-in for a module global (`ta`, `qtpylib`, ...) whose functions are timed."""
+
+    def __init__(self, profiler, alias, module):
+        self._profiler = profiler
+        self._alias = alias
+        self._module = module
+        self._wrapped = {}
+
+    def __getattr__(self, name):
+        value = getattr(self._module, name)
+        if not callable(value) or isinstance(value, type):
+            return value
+        wrapped = self._wrapped.get(name)
+        if wrapped is None:
+            wrapped = self._wrapped[name] = self._profiler.helper(f'{self._alias}.{name}', value)
+        return wrapped
+
+
+def profile_from_config(strategy):
+    """Attach a profiler if the strategy's config asks for one; else do nothing."""
+    options = (getattr(strategy, 'config', None) or {}).get('strategy_profiler')
+    if not options:
+        return None
+    if options is True:
+        options = {}
+    name = type(strategy).__name__
+    report = options.get('report', os.path.join('user_data', f'profile_{name}.txt'))
+    stacks = options.get('stacks', os.path.join('user_data', f'profile_{name}.folded'))
+    profiler = StrategyProfiler(memory=options.get('memory', True)).attach(strategy)
+    strategy._strategy_profiler = profiler
+
+    def write():
+        try:
+            with open(report, 'w') as f:
+                f.write(profiler.report() + '\n')
+            profiler.write_collapsed(stacks)
+            logger.info('strategy profile written to %s and %s', report, stacks)
+        except OSError as e:
+            logger.error('could not write strategy profile: %s', e)
+
+    atexit.register(write)
+    return profiler
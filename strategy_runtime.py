@@ -0,0 +1,26 @@
+"""What the strategy support modules need to know about the bot they run in:
+the runmode from its config, and which methods a strategy overrides.
+"""
+
+# runmodes of a bot trading on live candles
+LIVE_RUNMODES = ('live', 'dry_run')
+
+
+def runmode(config):
+    """The config's runmode as a string ('live', 'backtest', ...), or None.
+
+    freqtrade stores a RunMode enum; configs built by hand hold the string.
+    """
+    mode = (config or {}).get('runmode')
+    return getattr(mode, 'value', mode)
+
+
+def own_method(strategy, names):
+    """The first of `names` the strategy defines itself, not IStrategy's default."""
+    for name in names:
+        for klass in type(strategy).__mro__:
+            if klass.__module__.startswith('freqtrade') or klass is object:
+                break
+            if name in vars(klass):
+                return getattr(strategy, name)
+    return None
@@ -0,0 +1,150 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and fails fast
+    until `reset_timeout` seconds pass, then lets a single probe through."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def stats(self):
+        return {'state': self.state, 'failures': self._failures, 'rejected': self.rejected}
+
+
+class Transport:
+    """Shared HTTP client for upstream price APIs.
+
+    One keep-alive connection pool per host, gzip, connect/read timeouts,
+    bounded retries with exponential backoff on connection errors and
+    429/5xx, and a circuit breaker per host.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=32, connect_timeout=3.05,
+                 read_timeout=10.0, retries=2, backoff_factor=0.3,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.timeout = (connect_timeout, read_timeout)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                   max_retries=retry, pool_block=False)
+        self.session = requests.Session()
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Accept': 'application/json'})
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, host):
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    host, CircuitBreaker(self.failure_threshold, self.reset_timeout))
+        return breaker
+
+    def get(self, url, params=None):
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            raise CircuitOpenError(f'circuit open for {host}')
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        # a 4xx is the caller's problem, not a sign the upstream is unhealthy
+        if response.status_code == 429 or response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        response.raise_for_status()
+        return response
+
+    def get_json(self, url, params=None):
+        return self.get(url, params).json()
+
+    def stats(self):
+        pools = {}
+        manager = self.adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            maxsize = pool.pool.maxsize if pool.pool is not None else 0
+            idle_slots = pool.pool.qsize() if pool.pool is not None else 0
+            pools[f'{pool.scheme}://{pool.host}:{pool.port}'] = {
+                'maxsize': maxsize,
+                'in_use': maxsize - idle_slots,
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests,
+            }
+        with self._lock:
+            breakers = {host: b.stats() for host, b in self._breakers.items()}
+        return {'pools': pools, 'breakers': breakers}